@@ -3,13 +3,16 @@ from .credentials import (
     get_turn_credentials,
     get_twilio_turn_credentials,
 )
+from .decoder import EncodedAudio
+from .jitter_buffer import JitterBufferOptions
 from .pause_detection import (
+    EnergyGateOptions,
     ModelOptions,
     PauseDetectionModel,
     SileroVadOptions,
     get_silero_model,
 )
-from .reply_on_pause import AlgoOptions, ReplyOnPause
+from .reply_on_pause import AlgoOptions, AsyncReplyOnPause, ReplyOnPause
 from .reply_on_stopwords import ReplyOnStopWords
 from .speech_to_text import MoonshineSTT, get_stt_model
 from .stream import Stream, UIArgs
@@ -24,6 +27,8 @@ from .tracks import (
 )
 from .utils import (
     AdditionalOutputs,
+    AudioAccumulator,
+    OpusPacket,
     Warning,
     WebRTCError,
     aggregate_bytes_to_16bit,
@@ -34,17 +39,24 @@ from .utils import (
     audio_to_int16,
     wait_for_item,
 )
+from .video_processing import VideoBatcher, VideoProcessPool
 from .webrtc import (
     WebRTC,
 )
 
 __all__ = [
     "AsyncStreamHandler",
+    "AsyncReplyOnPause",
     "AudioVideoStreamHandler",
     "AudioEmitType",
     "AsyncAudioVideoStreamHandler",
     "AlgoOptions",
+    "EnergyGateOptions",
+    "JitterBufferOptions",
     "AdditionalOutputs",
+    "AudioAccumulator",
+    "EncodedAudio",
+    "OpusPacket",
     "aggregate_bytes_to_16bit",
     "async_aggregate_bytes_to_16bit",
     "audio_to_bytes",
@@ -61,6 +73,8 @@ __all__ = [
     "MoonshineSTT",
     "StreamHandler",
     "Stream",
+    "VideoBatcher",
+    "VideoProcessPool",
     "VideoEmitType",
     "WebRTC",
     "WebRTCError",
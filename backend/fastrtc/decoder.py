@@ -0,0 +1,210 @@
+"""Incremental decoding of encoded audio yielded by stream handlers."""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Literal, cast
+
+import av
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EncodedAudioFormat = Literal["pcm_s16le", "mp3", "ogg"]
+
+
+@dataclass
+class EncodedAudio:
+    """
+    A chunk of an encoded audio byte stream.
+
+    Chunks can be split at arbitrary byte offsets. Consecutive chunks with the same
+    format are decoded as one continuous stream on the server.
+
+    Parameters
+    ----------
+    data : bytes
+        The next bytes of the stream
+    format : Literal["pcm_s16le", "mp3", "ogg"]
+        Encoding of the stream. "ogg" is Opus in an Ogg container.
+    sample_rate : int | None
+        Sample rate of the stream. Required for "pcm_s16le", ignored otherwise.
+    channels : int
+        Number of interleaved channels of a "pcm_s16le" stream
+    """
+
+    data: bytes
+    format: EncodedAudioFormat
+    sample_rate: int | None = None
+    channels: int = 1
+
+
+class _OggPacketReader:
+    """Splits an Ogg byte stream into the packets of its logical stream."""
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._partial = bytearray()
+
+    def feed(self, data: bytes) -> list[bytes]:
+        self._buffer += data
+        packets = []
+        while True:
+            start = self._buffer.find(b"OggS")
+            if start < 0:
+                # Keep a possible partial capture pattern
+                del self._buffer[: max(0, len(self._buffer) - 3)]
+                return packets
+            del self._buffer[:start]
+            if len(self._buffer) < 27:
+                return packets
+            n_segments = self._buffer[26]
+            header_size = 27 + n_segments
+            if len(self._buffer) < header_size:
+                return packets
+            lacing = self._buffer[27:header_size]
+            if len(self._buffer) < header_size + sum(lacing):
+                return packets
+            offset = header_size
+            for size in lacing:
+                self._partial += self._buffer[offset : offset + size]
+                offset += size
+                # A lacing value of 255 means the packet continues
+                if size < 255:
+                    packets.append(bytes(self._partial))
+                    self._partial.clear()
+            del self._buffer[:offset]
+
+
+class AudioStreamDecoder:
+    """
+    Decodes `EncodedAudio` chunks into `av.AudioFrame`s.
+
+    The codec context is kept between chunks, so frames that are split across
+    chunks are decoded once the rest arrives. A new stream is started whenever the
+    format, sample rate or number of channels changes.
+    """
+
+    def __init__(self):
+        self._key: tuple | None = None
+        self._codec: av.CodecContext | None = None
+        self._ogg: _OggPacketReader | None = None
+        self._pcm_remainder = b""
+
+    @property
+    def is_active(self) -> bool:
+        return self._key is not None
+
+    @property
+    def format(self) -> str | None:
+        """Format of the stream being decoded, "opus" for raw Opus packets."""
+        return self._key[0] if self._key is not None else None
+
+    def reset(self):
+        self._key = None
+        self._codec = None
+        self._ogg = None
+        self._pcm_remainder = b""
+
+    def _start(self, chunk: EncodedAudio):
+        self.reset()
+        self._key = (chunk.format, chunk.sample_rate, chunk.channels)
+        if chunk.format == "pcm_s16le":
+            if chunk.sample_rate is None:
+                raise ValueError("sample_rate is required for pcm_s16le audio")
+        elif chunk.format == "mp3":
+            self._codec = av.CodecContext.create("mp3", "r")
+        elif chunk.format == "ogg":
+            self._ogg = _OggPacketReader()
+        else:
+            raise ValueError(f"Unsupported audio format: {chunk.format}")
+
+    def _opus_decoder(self, channels: int) -> av.CodecContext:
+        codec = av.CodecContext.create("libopus", "r")
+        codec.format = "s16"  # type: ignore
+        codec.layout = "stereo" if channels == 2 else "mono"  # type: ignore
+        codec.sample_rate = 48000  # type: ignore
+        return codec
+
+    def decode_opus(
+        self, packets: list[bytes], channels: int = 1
+    ) -> list[av.AudioFrame]:
+        """Decode raw Opus packets that are not in a container."""
+        if self._key != ("opus", 48000, channels):
+            self.reset()
+            self._key = ("opus", 48000, channels)
+            self._codec = self._opus_decoder(channels)
+        return self._decode_packets([av.Packet(packet) for packet in packets])
+
+    def decode(self, chunk: EncodedAudio) -> list[av.AudioFrame]:
+        """Decode the next chunk of a stream. Returns the frames that are complete."""
+        if self._key != (chunk.format, chunk.sample_rate, chunk.channels):
+            self._start(chunk)
+        if chunk.format == "pcm_s16le":
+            return self._decode_pcm(chunk)
+        if chunk.format == "ogg":
+            packets = []
+            for data in self._ogg.feed(chunk.data):  # type: ignore
+                if data.startswith(b"OpusHead"):
+                    # Header of a new logical stream
+                    self._codec = self._opus_decoder(data[9])
+                elif not data.startswith(b"OpusTags") and self._codec is not None:
+                    packets.append(av.Packet(data))
+            return self._decode_packets(packets)
+        return self._decode_packets(self._codec.parse(chunk.data))  # type: ignore
+
+    def flush(self) -> list[av.AudioFrame]:
+        """Decode whatever is still buffered and end the stream."""
+        frames = []
+        if self._codec is not None:
+            if self._key is not None and self._key[0] == "mp3":
+                frames = self._decode_packets(self._codec.parse(None))  # type: ignore
+            try:
+                frames += self._codec.decode(None)
+            except (av.error.EOFError, av.error.InvalidDataError):
+                pass
+        self.reset()
+        return frames
+
+    def _decode_packets(self, packets: list[av.Packet]) -> list[av.AudioFrame]:
+        frames = []
+        for packet in packets:
+            try:
+                frames.extend(self._codec.decode(packet))  # type: ignore
+            except av.error.InvalidDataError:
+                # e.g. ID3 tags or a Xing header at the start of an mp3 stream
+                logger.debug("skipping undecodable packet of %d bytes", packet.size)
+        return frames
+
+    def _decode_pcm(self, chunk: EncodedAudio) -> list[av.AudioFrame]:
+        data = self._pcm_remainder + chunk.data
+        usable = len(data) - len(data) % (2 * chunk.channels)
+        self._pcm_remainder = data[usable:]
+        if not usable:
+            return []
+        frame = av.AudioFrame.from_ndarray(
+            np.frombuffer(data[:usable], dtype=np.int16).reshape(1, -1),
+            format="s16",
+            layout="stereo" if chunk.channels == 2 else "mono",
+        )
+        frame.sample_rate = cast(int, chunk.sample_rate)
+        return [frame]
+
+
+def frames_to_array(frames: list[av.AudioFrame]) -> tuple[int, np.ndarray] | None:
+    """Mix decoded frames down to a single mono int16 array."""
+    if not frames:
+        return None
+    resampler = av.AudioResampler(  # type: ignore
+        format="s16", layout="mono", rate=frames[0].sample_rate
+    )
+    arrays = [
+        resampled.to_ndarray().reshape(-1)
+        for frame in frames
+        for resampled in resampler.resample(frame)
+    ]
+    arrays += [
+        resampled.to_ndarray().reshape(-1) for resampled in resampler.resample(None)
+    ]
+    return frames[0].sample_rate, np.concatenate(arrays)
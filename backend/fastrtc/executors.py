@@ -0,0 +1,85 @@
+"""Executors used to run sync stream handlers."""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Literal, TypeAlias
+
+ExecutorOption: TypeAlias = Literal["default", "stream", "connection"] | Executor
+
+
+@dataclass
+class ExecutorStats:
+    """Snapshot of an executor's load.
+
+    Attributes:
+      queue_depth: Calls submitted but not started yet.
+      completed: Calls that have started running.
+      mean_wait: Mean time in seconds a call waited before it started.
+      max_wait: Longest time in seconds a call waited before it started.
+    """
+
+    queue_depth: int = 0
+    completed: int = 0
+    mean_wait: float = 0.0
+    max_wait: float = 0.0
+
+
+class InstrumentedExecutor(Executor):
+    """Wraps an executor and records queue depth and wait time of submitted calls."""
+
+    def __init__(self, executor: Executor):
+        self.executor = executor
+        self._lock = threading.Lock()
+        self._queue_depth = 0
+        self._completed = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def submit(self, fn: Callable, /, *args: Any, **kwargs: Any) -> Future:
+        submitted = time.monotonic()
+        with self._lock:
+            self._queue_depth += 1
+
+        def run():
+            waited = time.monotonic() - submitted
+            with self._lock:
+                self._queue_depth -= 1
+                self._completed += 1
+                self._total_wait += waited
+                self._max_wait = max(self._max_wait, waited)
+            return fn(*args, **kwargs)
+
+        try:
+            return self.executor.submit(run)
+        except Exception:
+            with self._lock:
+                self._queue_depth -= 1
+            raise
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        self.executor.shutdown(wait, cancel_futures=cancel_futures)
+
+    def stats(self) -> ExecutorStats:
+        with self._lock:
+            completed = self._completed
+            return ExecutorStats(
+                queue_depth=self._queue_depth,
+                completed=completed,
+                mean_wait=self._total_wait / completed if completed else 0.0,
+                max_wait=self._max_wait,
+            )
+
+
+def create_executor(
+    max_workers: int | None = None, thread_name_prefix: str = "fastrtc"
+) -> InstrumentedExecutor:
+    return InstrumentedExecutor(
+        ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=thread_name_prefix
+        )
+    )
@@ -0,0 +1,104 @@
+"""Decoding of inbound Opus audio in the channel layout of the stream handler."""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+import weakref
+from contextvars import ContextVar
+from importlib.metadata import PackageNotFoundError, version
+from typing import Literal
+
+from aiortc import MediaStreamTrack, rtcrtpreceiver
+from aiortc.codecs.opus import OpusDecoder
+from aiortc.rtcrtpparameters import RTCRtpCodecParameters
+
+logger = logging.getLogger(__name__)
+
+# Major version of aiortc whose receiver internals this module relies on
+SUPPORTED_AIORTC_MAJOR = 1
+
+_layouts: weakref.WeakKeyDictionary[asyncio.Queue, str] = weakref.WeakKeyDictionary()
+_output_queue: ContextVar[asyncio.Queue | None] = ContextVar(
+    "output_queue", default=None
+)
+_aiortc_decoder_worker = rtcrtpreceiver.decoder_worker
+_aiortc_get_decoder = rtcrtpreceiver.get_decoder
+
+
+def _parameters(fn) -> list[str]:
+    try:
+        return list(inspect.signature(fn).parameters)
+    except (TypeError, ValueError):
+        return []
+
+
+def _aiortc_supported() -> bool:
+    """Whether the aiortc receiver internals look the way this module expects.
+
+    The decoding thread of an RTCRtpReceiver runs the module level
+    `decoder_worker(loop, input_q, output_q)`, which creates its decoders with
+    `get_decoder(codec)` and puts frames on the `_queue` of the remote track.
+    """
+    try:
+        major = int(version("aiortc").split(".")[0])
+    except (PackageNotFoundError, ValueError):
+        return False
+    return (
+        major == SUPPORTED_AIORTC_MAJOR
+        and _parameters(_aiortc_decoder_worker) == ["loop", "input_q", "output_q"]
+        and _parameters(_aiortc_get_decoder) == ["codec"]
+        and isinstance(
+            getattr(rtcrtpreceiver.RemoteStreamTrack(kind="audio"), "_queue", None),
+            asyncio.Queue,
+        )
+    )
+
+
+def _decoder_worker(loop: asyncio.AbstractEventLoop, input_q, output_q: asyncio.Queue):
+    # Runs in the decoding thread of a receiver, so the queue identifies the
+    # track that the decoder created by _get_decoder belongs to
+    _output_queue.set(output_q)
+    _aiortc_decoder_worker(loop, input_q, output_q)
+
+
+def _get_decoder(codec: RTCRtpCodecParameters):
+    output_q = _output_queue.get()
+    layout = _layouts.get(output_q) if output_q is not None else None
+    if layout is not None and codec.mimeType.lower() == "audio/opus":
+        decoder = OpusDecoder()
+        decoder.codec.layout = layout  # type: ignore
+        return decoder
+    return _aiortc_get_decoder(codec)
+
+
+SUPPORTED = _aiortc_supported()
+if SUPPORTED:
+    # Both functions are looked up when a receiver starts its decoding thread.
+    # Tracks that were not registered with decode_in_layout decode as before.
+    rtcrtpreceiver.decoder_worker = _decoder_worker  # type: ignore
+    rtcrtpreceiver.get_decoder = _get_decoder  # type: ignore
+
+
+def decode_in_layout(
+    track: MediaStreamTrack, layout: Literal["mono", "stereo"]
+) -> bool:
+    """
+    Decode the Opus audio of a remote track in `layout` instead of stereo.
+
+    aiortc always decodes Opus to 48 kHz stereo. Decoding a mono track as mono
+    skips the downmix, and spares the resampler entirely for handlers that take
+    48 kHz input. The sample rate stays 48 kHz because FFmpeg's Opus decoders
+    always output at that rate.
+
+    Must be called before the first packet of the track is decoded, e.g. in the
+    "track" event handler of the peer connection. Returns False if `track` is
+    not a remote aiortc track or if the installed aiortc version is not
+    supported, in which case the track is decoded as stereo.
+    """
+    queue = getattr(track, "_queue", None)
+    if not SUPPORTED or not isinstance(queue, asyncio.Queue):
+        return False
+    _layouts[queue] = layout
+    return True
@@ -0,0 +1,114 @@
+"""Flushing the output of a reply when the user interrupts it."""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+
+import av
+import numpy as np
+
+
+class CancellationToken:
+    """
+    Marks the output frames of one reply.
+
+    Every output frame is marked with the token of the reply it was produced for.
+    Cancelling the token makes each stage of the output pipeline drop those
+    frames, including frames that are still being decoded or are waiting for
+    their playback deadline.
+    """
+
+    def __init__(self):
+        self.cancelled_at: float | None = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancelled_at is not None
+
+    def cancel(self):
+        """Cancel the reply. The time of the first call is kept."""
+        if self.cancelled_at is None:
+            self.cancelled_at = time.monotonic()
+
+    def mark(self, frame: av.AudioFrame | av.Packet):
+        # PyAV keys `opaque` values by object id and drops the value when any
+        # frame holding it is freed, so every frame needs its own object
+        frame.opaque = _FrameMark(self)
+
+
+class _FrameMark:
+    __slots__ = ("token",)
+
+    def __init__(self, token: CancellationToken):
+        self.token = token
+
+
+def is_cancelled(frame: av.AudioFrame | av.Packet | None) -> bool:
+    """Whether `frame` belongs to a reply that was interrupted."""
+    mark = getattr(frame, "opaque", None)
+    return isinstance(mark, _FrameMark) and mark.token.cancelled
+
+
+@dataclass
+class InterruptStats:
+    """
+    Time from an interruption until the interrupted reply stopped playing.
+
+    Attributes:
+      interruptions: Replies interrupted while audio was queued or playing.
+      mean_latency: Mean time in seconds until the last frame of the reply,
+        including the fade-out, finished playing.
+      max_latency: Longest time in seconds until the reply finished playing.
+    """
+
+    interruptions: int = 0
+    mean_latency: float = 0.0
+    max_latency: float = 0.0
+
+    def record(self, latency: float):
+        latency = max(0.0, latency)
+        self.interruptions += 1
+        self.mean_latency += (latency - self.mean_latency) / self.interruptions
+        self.max_latency = max(self.max_latency, latency)
+
+
+def fade_out(
+    frames: list[av.AudioFrame | av.Packet], fade_out_ms: float
+) -> list[av.AudioFrame]:
+    """
+    Fade the first `fade_out_ms` of `frames` to silence.
+
+    Whole frames are kept until at least `fade_out_ms` of audio is covered and a
+    linear ramp is applied across them. Frames that are not `s16` audio, such as
+    Opus packets, cannot be faded and end the fade early.
+    """
+    selected: list[av.AudioFrame] = []
+    n_samples = 0
+    for frame in frames:
+        if (
+            not isinstance(frame, av.AudioFrame)
+            or frame.format.name != "s16"
+            or n_samples >= fade_out_ms / 1000 * frame.sample_rate
+        ):
+            break
+        selected.append(frame)
+        n_samples += frame.samples
+    gain = np.linspace(1.0, 0.0, n_samples, dtype=np.float32)
+    faded = []
+    offset = 0
+    for frame in selected:
+        channels = len(frame.layout.channels)
+        samples = frame.to_ndarray().reshape(-1, channels)
+        ramp = gain[offset : offset + frame.samples, None]
+        offset += frame.samples
+        new_frame = av.AudioFrame.from_ndarray(
+            (samples * ramp).astype(np.int16).reshape(1, -1),
+            format="s16",
+            layout=frame.layout.name,
+        )
+        new_frame.sample_rate = frame.sample_rate
+        new_frame.pts = frame.pts
+        new_frame.time_base = frame.time_base
+        faded.append(new_frame)
+    return faded
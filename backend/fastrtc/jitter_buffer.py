@@ -0,0 +1,186 @@
+"""Playout buffer that smooths bursty handler output."""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import math
+from dataclasses import dataclass, field
+from typing import cast
+
+import av
+import numpy as np
+
+from .interruption import is_cancelled
+from .pacing import PacingStats, get_pacing_clock
+from .utils import frame_samples
+
+DEPTH_BUCKETS_MS = (20, 40, 80, 160, 320, 640, 1280, math.inf)
+
+
+@dataclass
+class JitterBufferOptions:
+    """
+    Options of the output jitter buffer.
+
+    Attributes:
+      preroll_ms: Audio buffered before the first frame of a reply is played.
+      max_preroll_ms: Upper bound of the pre-roll, which grows after underruns.
+      max_comfort_ms: Silence inserted during an underrun before the reply is
+        considered finished and timing is reset.
+    """
+
+    preroll_ms: float = 40
+    max_preroll_ms: float = 300
+    max_comfort_ms: float = 300
+
+
+@dataclass
+class JitterBufferStats:
+    """
+    Counters of an output jitter buffer.
+
+    Attributes:
+      underruns: Times playback ran dry in the middle of a reply.
+      comfort_frames: Silent frames inserted while waiting for output.
+      preroll_ms: Current pre-roll.
+      depth_histogram: Number of played frames by buffered audio at the time,
+        keyed by the upper bound of the bucket in milliseconds.
+    """
+
+    underruns: int = 0
+    comfort_frames: int = 0
+    preroll_ms: float = 0.0
+    depth_histogram: dict[float, int] = field(
+        default_factory=lambda: dict.fromkeys(DEPTH_BUCKETS_MS, 0)
+    )
+
+
+class OutputJitterBuffer:
+    """
+    Paces the frames of an output queue and hides gaps between them.
+
+    The first frame of a reply is held until `preroll_ms` of audio is buffered, or
+    until that long has passed. When the queue runs dry mid-reply, silent frames
+    are played instead of resetting the playback clock, and the pre-roll of the
+    next reply grows by the length of the gap. Frames are re-stamped on a
+    continuous timeline so inserted silence never overlaps real audio.
+    """
+
+    def __init__(
+        self,
+        queue: asyncio.Queue,
+        options: JitterBufferOptions,
+        pacing_stats: PacingStats | None = None,
+    ):
+        self.queue = queue
+        self.options = options
+        self.stats = JitterBufferStats(preroll_ms=options.preroll_ms)
+        self.pacing_stats = pacing_stats
+        self._start: float | None = None
+        self._pts = 0
+        self._time_base = None
+        self._template: av.AudioFrame | None = None
+        self._silent_run = 0.0
+        self._reply_underruns = 0
+        self._finishing = False
+
+    def reset(self):
+        """End the current reply, e.g. after an interruption."""
+        self._start = None
+        self._silent_run = 0.0
+        self._reply_underruns = 0
+        self._finishing = False
+
+    def finish(self):
+        """End the current reply once the queued frames have played, e.g. a fade-out."""
+        self._finishing = True
+
+    async def _preroll(self, frame_duration: float):
+        clock = get_pacing_clock()
+        preroll = self.stats.preroll_ms / 1000
+        deadline = clock.now() + preroll
+        while clock.now() < deadline:
+            # The frame being held counts towards the pre-roll
+            if (self.queue.qsize() + 1) * frame_duration >= preroll:
+                break
+            await clock.wait_until(min(deadline, clock.now() + frame_duration))
+
+    def _stamp(self, frame: av.AudioFrame | av.Packet) -> av.AudioFrame | av.Packet:
+        duration = float(frame_samples(frame) * frame.time_base)
+        depth_ms = self.queue.qsize() * duration * 1000
+        bucket = DEPTH_BUCKETS_MS[bisect.bisect_left(DEPTH_BUCKETS_MS, depth_ms)]
+        self.stats.depth_histogram[bucket] += 1
+        self._time_base = frame.time_base
+        frame.pts = self._pts
+        self._pts += frame_samples(frame)
+        return frame
+
+    def _comfort_frame(self) -> av.AudioFrame:
+        template = cast(av.AudioFrame, self._template)
+        frame = av.AudioFrame.from_ndarray(
+            np.zeros((1, template.samples * len(template.layout.channels)), np.int16),
+            format="s16",
+            layout=template.layout.name,
+        )
+        frame.sample_rate = template.sample_rate
+        frame.time_base = template.time_base
+        return frame
+
+    async def get(self) -> av.AudioFrame | av.Packet | None:
+        """Next frame to play, returned once it is due."""
+        clock = get_pacing_clock()
+        if self._start is None:
+            frame = await self.queue.get()
+            while is_cancelled(frame):
+                frame = await self.queue.get()
+            if frame is None:
+                return None
+            await self._preroll(float(frame_samples(frame) * frame.time_base))
+            if is_cancelled(frame):
+                # Interrupted during the pre-roll
+                return await self.get()
+            self._start = clock.now() - float(self._pts * frame.time_base)
+        else:
+            await clock.wait_until(
+                self._start + float(self._pts * self._time_base), self.pacing_stats
+            )
+            try:
+                frame = self.queue.get_nowait()
+                while is_cancelled(frame):
+                    frame = self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                if self._template is None or self._finishing:
+                    # Nothing to build silence from, e.g. Opus passthrough, or
+                    # the fade-out of an interrupted reply has played
+                    self.reset()
+                    return await self.get()
+                return self._fill_gap()
+            if frame is None:
+                return None
+            if self._silent_run:
+                # Audio resumed in the middle of the reply
+                self.stats.underruns += 1
+                self._reply_underruns += 1
+                self.stats.preroll_ms = min(
+                    self.options.max_preroll_ms,
+                    self.stats.preroll_ms + self._silent_run * 1000,
+                )
+                self._silent_run = 0.0
+        if isinstance(frame, av.AudioFrame) and frame.format.name == "s16":
+            self._template = frame
+        return self._stamp(frame)
+
+    def _fill_gap(self) -> av.AudioFrame:
+        frame = self._comfort_frame()
+        self.stats.comfort_frames += 1
+        self._silent_run += frame.samples / frame.sample_rate
+        if self._silent_run * 1000 >= self.options.max_comfort_ms:
+            # The reply is over and the next one starts with a pre-roll. A reply
+            # that played without underruns lets the pre-roll shrink again.
+            if not self._reply_underruns:
+                self.stats.preroll_ms = max(
+                    self.options.preroll_ms, self.stats.preroll_ms * 0.9
+                )
+            self.reset()
+        return cast(av.AudioFrame, self._stamp(frame))
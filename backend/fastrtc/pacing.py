@@ -0,0 +1,117 @@
+"""Shared clock that paces outgoing audio frames."""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+import weakref
+from dataclasses import dataclass
+
+from .utils import AUDIO_PTIME
+
+
+@dataclass
+class PacingStats:
+    """Lateness of the frames released for one track.
+
+    Attributes:
+      frames: Number of frames released.
+      late_frames: Frames released more than one tick after their deadline.
+      mean_lateness: Mean time in seconds between a frame's deadline and its release.
+      max_lateness: Longest time in seconds between a frame's deadline and its release.
+    """
+
+    frames: int = 0
+    late_frames: int = 0
+    mean_lateness: float = 0.0
+    max_lateness: float = 0.0
+
+    def record(self, lateness: float, tick: float):
+        lateness = max(0.0, lateness)
+        self.frames += 1
+        if lateness > tick:
+            self.late_frames += 1
+        self.mean_lateness += (lateness - self.mean_lateness) / self.frames
+        self.max_lateness = max(self.max_lateness, lateness)
+
+
+class PacingClock:
+    """
+    Releases frames at their playback deadline, for all tracks of an event loop.
+
+    Instead of every track sleeping once per frame, a single task wakes up once
+    per `tick` and releases every frame whose deadline has been reached. Ticks
+    are scheduled on an absolute `time.monotonic` grid, so sleep overshoot does
+    not accumulate into drift, and the task only runs while frames are waiting.
+    """
+
+    def __init__(self, tick: float = AUDIO_PTIME / 2):
+        self.tick = tick
+        self._waiters: list[tuple[float, int, asyncio.Future, PacingStats | None]] = []
+        self._counter = itertools.count()
+        self._origin = time.monotonic()
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self.n_ticks = 0
+
+    def now(self) -> float:
+        return time.monotonic()
+
+    async def wait_until(
+        self, deadline: float, stats: PacingStats | None = None
+    ) -> None:
+        """Wait until `deadline`, a `time.monotonic` timestamp."""
+        # Frames within half a tick of their deadline are released right away
+        if deadline - self.now() <= self.tick / 2:
+            if stats is not None:
+                stats.record(self.now() - deadline, self.tick)
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (deadline, next(self._counter), future, stats))
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        elif deadline == self._waiters[0][0]:
+            self._wakeup.set()
+        await future
+
+    def _next_tick(self, deadline: float) -> float:
+        ticks = math.ceil((deadline - self.tick / 2 - self._origin) / self.tick)
+        return self._origin + ticks * self.tick
+
+    async def _run(self):
+        while self._waiters:
+            # Sleep until the tick at which the earliest frame is due, but wake
+            # up early if a track submits an earlier deadline meanwhile
+            self._wakeup.clear()
+            delay = self._next_tick(self._waiters[0][0]) - self.now()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                    continue
+                except (TimeoutError, asyncio.TimeoutError):
+                    pass
+            self.n_ticks += 1
+            now = self.now()
+            while self._waiters and self._waiters[0][0] - now <= self.tick / 2:
+                deadline, _, future, stats = heapq.heappop(self._waiters)
+                if future.done():
+                    continue
+                if stats is not None:
+                    stats.record(now - deadline, self.tick)
+                future.set_result(None)
+
+
+_clocks: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, PacingClock] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_pacing_clock() -> PacingClock:
+    """Pacing clock shared by all tracks of the running event loop."""
+    loop = asyncio.get_running_loop()
+    if loop not in _clocks:
+        _clocks[loop] = PacingClock()
+    return _clocks[loop]
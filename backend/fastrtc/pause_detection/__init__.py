@@ -1,10 +1,25 @@
-from .protocol import ModelOptions, PauseDetectionModel
-from .silero import SileroVADModel, SileroVadOptions, get_silero_model
+from .energy_gate import EnergyGate, EnergyGateOptions
+from .protocol import (
+    ModelOptions,
+    PauseDetectionModel,
+    PauseDetectionStream,
+    StreamingPauseDetectionModel,
+    VADStreamResult,
+)
+from .scheduler import VADBatchScheduler
+from .silero import SileroVADModel, SileroVadOptions, SileroVADStream, get_silero_model
 
 __all__ = [
+    "EnergyGate",
+    "EnergyGateOptions",
     "SileroVADModel",
+    "SileroVADStream",
     "SileroVadOptions",
     "PauseDetectionModel",
+    "PauseDetectionStream",
+    "StreamingPauseDetectionModel",
+    "VADStreamResult",
+    "VADBatchScheduler",
     "ModelOptions",
     "get_silero_model",
 ]
@@ -0,0 +1,93 @@
+from dataclasses import dataclass
+
+import numpy as np
+from numpy.typing import NDArray
+
+
+@dataclass
+class EnergyGateOptions:
+    """Options for the energy / zero-crossing pre-gate run before the VAD model.
+
+    A window is considered clearly silent, and the VAD model is skipped for it, when
+    every sub-frame in it is silent. A sub-frame is silent if it is quieter than
+    silence_threshold_db, if it is less than noise_margin_db above the tracked noise
+    floor, or if it is noise-like (zero-crossing rate above noise_zcr_hz) and less
+    than 2 * noise_margin_db above the noise floor. The noise floor is only learned
+    from sub-frames quieter than silence_threshold_db, so until such audio has been
+    seen only the absolute threshold applies.
+
+    Attributes:
+      silence_threshold_db: Level in dBFS below which audio is always silence.
+      noise_margin_db: Margin in dB above the noise floor that is still treated as silence.
+      noise_zcr_hz: Zero crossings per second above which a sub-frame is considered noise-like.
+      noise_floor_rise_db: Maximum rate, in dB per second, at which the noise floor
+        estimate rises when the background gets louder. It drops immediately.
+      subframe_ms: Length in milliseconds of the sub-frames the level is measured on.
+    """
+
+    silence_threshold_db: float = -60.0
+    noise_margin_db: float = 10.0
+    noise_zcr_hz: float = 5000.0
+    noise_floor_rise_db: float = 3.0
+    subframe_ms: float = 10.0
+
+
+class EnergyGate:
+    """Cheap pre-gate that flags windows which are clearly silent.
+
+    Keeps a noise floor estimate, so use one instance per audio stream. The
+    estimate describes the stream rather than a single turn, so `reset` keeps it.
+    """
+
+    def __init__(self, options: EnergyGateOptions | None = None):
+        self.options = options or EnergyGateOptions()
+        self.noise_floor: float | None = None
+        self.n_windows = 0
+        self.n_skipped = 0
+
+    def reset(self):
+        """Start a new turn of the stream. The learned noise floor is kept."""
+
+    def is_silent(
+        self, audio: NDArray[np.int16] | NDArray[np.float32], sampling_rate: int
+    ) -> bool:
+        audio = np.asarray(audio).reshape(-1)
+        if audio.dtype == np.int16:
+            audio = audio.astype(np.float32) / 32768.0
+        if not len(audio):
+            return True
+        opts = self.options
+        subframe = max(1, min(len(audio), int(sampling_rate * opts.subframe_ms / 1000)))
+        n_subframes = len(audio) // subframe
+        frames = audio[: n_subframes * subframe].reshape(n_subframes, subframe)
+
+        level_db = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+        signs = np.signbit(frames)
+        zcr_hz = (
+            np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1)
+            * sampling_rate
+            / subframe
+        )
+
+        silent = level_db < opts.silence_threshold_db
+        floor = self.noise_floor
+        if floor is not None:
+            silent |= (level_db < floor + opts.noise_margin_db) | (
+                (zcr_hz > opts.noise_zcr_hz)
+                & (level_db < floor + 2 * opts.noise_margin_db)
+            )
+
+        # Loud sub-frames may be speech, so they never raise the floor
+        quiet = level_db[level_db <= opts.silence_threshold_db]
+        if len(quiet):
+            quietest = float(quiet.min())
+            if floor is None:
+                self.noise_floor = quietest
+            else:
+                max_rise = opts.noise_floor_rise_db * len(audio) / sampling_rate
+                self.noise_floor = min(quietest, floor + max_rise)
+
+        self.n_windows += 1
+        is_silent = bool(silent.all())
+        self.n_skipped += is_silent
+        return is_silent
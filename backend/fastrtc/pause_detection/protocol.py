@@ -1,13 +1,32 @@
+from dataclasses import dataclass
 from typing import Any, Protocol, TypeAlias
 
 import numpy as np
 from numpy.typing import NDArray
 
 from ..utils import AudioChunk
+from .energy_gate import EnergyGate
 
 ModelOptions: TypeAlias = Any
 
 
+@dataclass
+class VADStreamResult:
+    """Result of feeding one frame to a streaming VAD.
+
+    Attributes:
+      speech_prob: Speech probability of the most recently scored window.
+      speech_duration: Seconds of speech within the trailing window of the stream.
+      speaking: Whether the stream is currently inside a speech segment.
+      end_of_speech: True only for the frame on which a speech segment ended.
+    """
+
+    speech_prob: float = 0.0
+    speech_duration: float = 0.0
+    speaking: bool = False
+    end_of_speech: bool = False
+
+
 class PauseDetectionModel(Protocol):
     def vad(
         self,
@@ -18,3 +37,23 @@ class PauseDetectionModel(Protocol):
     def warmup(
         self,
     ) -> None: ...
+
+
+class PauseDetectionStream(Protocol):
+    def process(
+        self,
+        audio: tuple[int, NDArray[np.int16] | NDArray[np.float32]],
+    ) -> VADStreamResult: ...
+
+    def reset(
+        self,
+    ) -> None: ...
+
+
+class StreamingPauseDetectionModel(PauseDetectionModel, Protocol):
+    def create_stream(
+        self,
+        options: ModelOptions,
+        window_duration: float,
+        gate: EnergyGate | None = None,
+    ) -> PauseDetectionStream: ...
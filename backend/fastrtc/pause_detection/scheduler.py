@@ -0,0 +1,158 @@
+import logging
+import queue
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+RunFn = Callable[
+    [np.ndarray, np.ndarray, np.ndarray, int], tuple[np.ndarray, np.ndarray, np.ndarray]
+]
+
+
+@dataclass
+class _VADRequest:
+    x: np.ndarray
+    h: np.ndarray
+    c: np.ndarray
+    sr: int
+    future: Future = field(default_factory=Future)
+
+
+class VADBatchScheduler:
+    """Batches VAD windows submitted by many connections into a single model call.
+
+    Callers submit a window together with their own LSTM state. A worker thread
+    collects the pending requests for up to `max_wait_ms` (or until `max_batch_size`
+    rows are waiting), stacks windows and state rows, runs the model once and hands
+    every caller back its own probability and updated state.
+
+    Waiting only pays off when other connections are submitting at the same time.
+    A request that finds the queue empty is run at once unless the previous batch
+    had several requests, so a single connection never waits and `max_wait_ms` is
+    only added to the latency of windows while the model is under load.
+
+    Args:
+      run: Function running the model on a batch: (x, h, c, sr) -> (out, h, c), where
+        x has shape (batch, window) and h, c have shape (2, batch, 64).
+      max_batch_size: Maximum number of rows in one model call.
+      max_wait_ms: Maximum time a request waits for other requests to join its batch.
+    """
+
+    def __init__(
+        self,
+        run: RunFn,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+    ):
+        self.run = run
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.n_batches = 0
+        self.n_rows = 0
+        self._queue: queue.SimpleQueue[_VADRequest | None] = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+        # Whether the last batch had requests from several callers
+        self._concurrent = False
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.n_rows / self.n_batches if self.n_batches else 0.0
+
+    def in_worker(self) -> bool:
+        return threading.current_thread() is self._thread
+
+    def start(self):
+        if not self.is_running:
+            self._thread = threading.Thread(
+                target=self._worker, name="vad-batch-scheduler", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def submit(self, x: np.ndarray, state: tuple[np.ndarray, np.ndarray], sr: int):
+        """Queue a window and its state. The future resolves to (out, (h, c))."""
+        h, c = state
+        request = _VADRequest(x, h, c, sr)
+        self._queue.put(request)
+        return request.future
+
+    def _collect(self, first: _VADRequest) -> tuple[list[_VADRequest], bool]:
+        batch = [first]
+        rows = first.x.shape[0]
+        # Requests that are already queued join without waiting
+        while rows < self.max_batch_size:
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                return batch, True
+            batch.append(request)
+            rows += request.x.shape[0]
+        if len(batch) == 1 and not self._concurrent:
+            return batch, False
+        deadline = time.monotonic() + self.max_wait
+        while rows < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is None:
+                return batch, True
+            batch.append(request)
+            rows += request.x.shape[0]
+        return batch, False
+
+    def _run_group(self, group: list[_VADRequest]):
+        try:
+            x = np.concatenate([r.x for r in group], axis=0)
+            h = np.concatenate([r.h for r in group], axis=1)
+            c = np.concatenate([r.c for r in group], axis=1)
+            out, h, c = self.run(x, h, c, group[0].sr)
+        except Exception as e:  # noqa: BLE001 - raised again in every waiting caller
+            for request in group:
+                request.future.set_exception(e)
+            return
+        self.n_batches += 1
+        self.n_rows += x.shape[0]
+        start = 0
+        for request in group:
+            end = start + request.x.shape[0]
+            request.future.set_result(
+                (out[start:end], (h[:, start:end], c[:, start:end]))
+            )
+            start = end
+
+    def _worker(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch, quit = self._collect(first)
+            self._concurrent = len(batch) > 1
+            groups: dict[tuple[int, int], list[_VADRequest]] = {}
+            for request in batch:
+                groups.setdefault((request.sr, request.x.shape[1]), []).append(request)
+            for group in groups.values():
+                self._run_group(group)
+            logger.debug("VAD batch of %d requests", len(batch))
+            if quit:
+                return
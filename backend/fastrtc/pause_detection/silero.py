@@ -1,5 +1,6 @@
 import logging
 import warnings
+from collections import deque
 from dataclasses import dataclass
 from functools import lru_cache
 from typing import List
@@ -9,8 +10,11 @@ import numpy as np
 from huggingface_hub import hf_hub_download
 from numpy.typing import NDArray
 
+from ..resampler import StreamingResampler, resample_audio
 from ..utils import AudioChunk
-from .protocol import PauseDetectionModel
+from .energy_gate import EnergyGate
+from .protocol import PauseDetectionModel, VADStreamResult
+from .scheduler import VADBatchScheduler
 
 logger = logging.getLogger(__name__)
 
@@ -95,6 +99,28 @@ class SileroVADModel:
             providers=["CPUExecutionProvider"],
             sess_options=opts,
         )
+        self.scheduler: VADBatchScheduler | None = None
+
+    def start_batching(
+        self, max_batch_size: int = 64, max_wait_ms: float = 5.0
+    ) -> VADBatchScheduler:
+        """Batch windows scored by every handler sharing this model into one session call.
+
+        Once started, calls to the model from any thread are queued and run together
+        with the windows of other connections. Call `stop_batching` to go back to
+        running every window on its own.
+        """
+        if self.scheduler is None:
+            self.scheduler = VADBatchScheduler(
+                self._run, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms
+            )
+        self.scheduler.start()
+        return self.scheduler
+
+    def stop_batching(self):
+        if self.scheduler is not None:
+            self.scheduler.stop()
+            self.scheduler = None
 
     def get_initial_state(self, batch_size: int):
         h = np.zeros((2, batch_size, 64), dtype=np.float32)
@@ -262,6 +288,15 @@ class SileroVADModel:
 
         return speeches
 
+    def create_stream(
+        self,
+        options: None | SileroVadOptions = None,
+        window_duration: float = 0.6,
+        gate: EnergyGate | None = None,
+    ) -> "SileroVADStream":
+        """Returns a streaming VAD that keeps its state across calls."""
+        return SileroVADStream(self, options, window_duration, gate)
+
     def warmup(self):
         for _ in range(10):
             dummy_audio = np.zeros(102400, dtype=np.float32)
@@ -279,13 +314,7 @@ class SileroVADModel:
                 audio_ = audio_.astype(np.float32) / 32768.0
             sr = 16000
             if sr != sampling_rate:
-                try:
-                    import librosa  # type: ignore
-                except ImportError as e:
-                    raise RuntimeError(
-                        "Applying the VAD filter requires the librosa if the input sampling rate is not 16000hz"
-                    ) from e
-                audio_ = librosa.resample(audio_, orig_sr=sampling_rate, target_sr=sr)
+                audio_ = resample_audio(audio_, sampling_rate, sr)
 
             if not options:
                 options = SileroVadOptions()
@@ -314,16 +343,132 @@ class SileroVADModel:
         if sr / x.shape[1] > 31.25:  # type: ignore
             raise ValueError("Input audio chunk is too short")
 
+        scheduler = self.scheduler
+        if scheduler is not None and scheduler.is_running and not scheduler.in_worker():
+            return scheduler.submit(x, state, sr).result()
+
         h, c = state
+        out, h, c = self._run(x, h, c, sr)
+        state = (h, c)
+
+        return out, state
 
+    def _run(self, x, h, c, sr: int):
         ort_inputs = {
             "input": x,
             "h": h,
             "c": c,
             "sr": np.array(sr, dtype="int64"),
         }
+        return self.session.run(None, ort_inputs)
 
-        out, h, c = self.session.run(None, ort_inputs)
-        state = (h, c)
 
-        return out, state
+class SileroVADStream:
+    """Streaming VAD that scores consecutive frames of a single audio stream.
+
+    The LSTM state, the resampler and any partial 16 kHz window are carried
+    between calls to `process`, so each window is scored exactly once no matter
+    how small the incoming frames are.
+
+    Args:
+      model: The SileroVADModel used to score windows.
+      options: VAD options. The threshold, min_silence_duration_ms and
+        window_size_samples fields are used.
+      window_duration: Length in seconds of the trailing window over which
+        `speech_duration` is reported.
+      gate: Optional pre-gate. Windows it flags as silent are not scored by the
+        model and count as silence.
+    """
+
+    sampling_rate = 16000
+
+    def __init__(
+        self,
+        model: SileroVADModel,
+        options: None | SileroVadOptions = None,
+        window_duration: float = 0.6,
+        gate: EnergyGate | None = None,
+    ):
+        self.model = model
+        self.gate = gate
+        self.options = options or SileroVadOptions()
+        self.window_size_samples = self.options.window_size_samples
+        self.window_duration = window_duration
+        self.min_silence_samples = (
+            self.sampling_rate * self.options.min_silence_duration_ms / 1000
+        )
+        n_windows = max(
+            1, round(window_duration * self.sampling_rate / self.window_size_samples)
+        )
+        self._speech_windows: deque[bool] = deque(maxlen=n_windows)
+        self.reset()
+
+    def reset(self):
+        """Forget all audio seen so far."""
+        self._state = self.model.get_initial_state(batch_size=1)
+        self._resampler: StreamingResampler | None = None
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._speech_windows.clear()
+        self._speaking = False
+        self._silence_samples = 0
+        self._last_prob = 0.0
+        if self.gate is not None:
+            self.gate.reset()
+
+    def _to_16k(self, sampling_rate: int, audio: np.ndarray) -> np.ndarray:
+        if self._resampler is None or self._resampler.input_rate != sampling_rate:
+            self._resampler = StreamingResampler(
+                sampling_rate, self.sampling_rate, dtype=np.float32
+            )
+        return self._resampler.resample(audio)
+
+    def score(self, window: np.ndarray) -> float:
+        """Score a single window, advancing the LSTM state."""
+        out, self._state = self.model(window, self._state, self.sampling_rate)
+        return float(np.asarray(out).reshape(-1)[0])
+
+    def process(
+        self, audio: tuple[int, NDArray[np.float32] | NDArray[np.int16]]
+    ) -> VADStreamResult:
+        sampling_rate, audio_ = audio
+        audio_16k = self._to_16k(sampling_rate, np.asarray(audio_).reshape(-1))
+        if len(self._pending):
+            audio_16k = np.concatenate((self._pending, audio_16k))
+
+        threshold = self.options.threshold
+        neg_threshold = threshold - 0.15
+        end_of_speech = False
+        n_windows = len(audio_16k) // self.window_size_samples
+        for i in range(n_windows):
+            window = audio_16k[
+                i * self.window_size_samples : (i + 1) * self.window_size_samples
+            ]
+            if self.gate is not None and self.gate.is_silent(
+                window, self.sampling_rate
+            ):
+                prob = 0.0
+            else:
+                prob = self.score(window)
+            self._last_prob = prob
+            if prob >= threshold:
+                self._speaking = True
+                self._silence_samples = 0
+            elif self._speaking and prob < neg_threshold:
+                self._silence_samples += self.window_size_samples
+                if self._silence_samples >= self.min_silence_samples:
+                    self._speaking = False
+                    self._silence_samples = 0
+                    end_of_speech = True
+            self._speech_windows.append(
+                prob >= threshold or (self._speaking and prob >= neg_threshold)
+            )
+        self._pending = audio_16k[n_windows * self.window_size_samples :]
+
+        return VADStreamResult(
+            speech_prob=self._last_prob,
+            speech_duration=sum(self._speech_windows)
+            * self.window_size_samples
+            / self.sampling_rate,
+            speaking=self._speaking,
+            end_of_speech=end_of_speech,
+        )
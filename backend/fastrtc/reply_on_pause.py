@@ -1,6 +1,8 @@
 import asyncio
 import inspect
+from concurrent.futures import Executor, ThreadPoolExecutor
 from dataclasses import dataclass, field
+from functools import lru_cache
 from logging import getLogger
 from threading import Event
 from typing import Any, AsyncGenerator, Callable, Generator, Literal, cast
@@ -8,31 +10,63 @@ from typing import Any, AsyncGenerator, Callable, Generator, Literal, cast
 import numpy as np
 from numpy.typing import NDArray
 
-from .pause_detection import ModelOptions, PauseDetectionModel, get_silero_model
-from .tracks import EmitType, StreamHandler
-from .utils import create_message, split_output
+from .pause_detection import (
+    EnergyGate,
+    EnergyGateOptions,
+    ModelOptions,
+    PauseDetectionModel,
+    PauseDetectionStream,
+    StreamingPauseDetectionModel,
+    get_silero_model,
+)
+from .tracks import AsyncStreamHandler, EmitType, StreamHandler
+from .utils import (
+    AudioAccumulator,
+    PrefetchGenerator,
+    PrefetchStats,
+    create_message,
+    split_output,
+)
 
 logger = getLogger(__name__)
 
 
 @dataclass
 class AlgoOptions:
-    """Algorithm options."""
+    """Algorithm options.
+
+    Attributes:
+      audio_chunk_duration: Duration in seconds of the audio window the VAD is run on.
+      started_talking_threshold: Seconds of speech in a window after which the user
+        is considered to have started talking.
+      speech_threshold: Once the user started talking, a window with less speech than
+        this (in seconds) is considered a pause.
+      streaming_vad: Run the VAD on every incoming frame with a stream that keeps its
+        state between calls instead of re-scoring each audio_chunk_duration window.
+        The thresholds are then applied to the trailing audio_chunk_duration window
+        on every frame, so a pause is detected without waiting for a full chunk.
+      energy_gate: If set, windows that an energy / zero-crossing pre-gate flags as
+        clearly silent skip the VAD model and count as 0 seconds of speech.
+    """
 
     audio_chunk_duration: float = 0.6
     started_talking_threshold: float = 0.2
     speech_threshold: float = 0.1
+    streaming_vad: bool = False
+    energy_gate: EnergyGateOptions | None = None
 
 
 @dataclass
 class AppState:
-    stream: np.ndarray | None = None
+    stream: AudioAccumulator = field(default_factory=AudioAccumulator)
     sampling_rate: int = 0
     pause_detected: bool = False
+    # Set once the detected pause has triggered a reply, so it does so only once
+    pause_handled: bool = False
     started_talking: bool = False
     responding: bool = False
     stopped: bool = False
-    buffer: np.ndarray | None = None
+    buffer: AudioAccumulator = field(default_factory=AudioAccumulator)
     responded_audio: bool = False
     interrupted: asyncio.Event = field(default_factory=asyncio.Event)
 
@@ -64,7 +98,127 @@ async def iterate(generator: Generator) -> Any:
     return next(generator)
 
 
-class ReplyOnPause(StreamHandler):
+class PauseDetectionMixin:
+    """Pause detection shared by ReplyOnPause and AsyncReplyOnPause."""
+
+    input_chunk_duration: float | None
+
+    def init_pause_detection(
+        self,
+        algo_options: AlgoOptions | None,
+        model_options: ModelOptions | None,
+        model: PauseDetectionModel | None,
+    ):
+        self.model = model or get_silero_model()
+        self.model_options = model_options
+        self.algo_options = algo_options or AlgoOptions()
+        self.state = AppState()
+        self.vad_stream: PauseDetectionStream | None = None
+        if self.input_chunk_duration is None and not self.algo_options.streaming_vad:
+            # The VAD only runs once a whole chunk has been received
+            self.input_chunk_duration = self.algo_options.audio_chunk_duration
+        self.energy_gate = (
+            EnergyGate(self.algo_options.energy_gate)
+            if self.algo_options.energy_gate
+            else None
+        )
+        if self.algo_options.streaming_vad and not hasattr(self.model, "create_stream"):
+            raise ValueError(
+                "AlgoOptions.streaming_vad requires a model that implements create_stream."
+            )
+
+    def reset_pause_detection(self):
+        self.state = AppState()
+        if self.vad_stream is not None:
+            self.vad_stream.reset()
+        elif self.energy_gate is not None:
+            self.energy_gate.reset()
+
+    def speech_duration(self, audio: np.ndarray, sampling_rate: int) -> float:
+        """Seconds of speech in audio, skipping the model for clearly silent audio"""
+        if self.energy_gate is not None and self.energy_gate.is_silent(
+            audio, sampling_rate
+        ):
+            return 0.0
+        dur_vad, _ = self.model.vad((sampling_rate, audio), self.model_options)
+        return dur_vad
+
+    def determine_pause(
+        self, audio: np.ndarray, sampling_rate: int, state: AppState
+    ) -> bool:
+        """Take in the stream, determine if a pause happened"""
+        duration = len(audio) / sampling_rate
+
+        if duration >= self.algo_options.audio_chunk_duration:
+            dur_vad = self.speech_duration(audio, sampling_rate)
+            logger.debug("VAD duration: %s", dur_vad)
+            if (
+                dur_vad > self.algo_options.started_talking_threshold
+                and not state.started_talking
+            ):
+                state.started_talking = True
+                logger.debug("Started talking")
+            if state.started_talking:
+                state.stream.append(audio)
+            state.buffer.clear()
+            if dur_vad < self.algo_options.speech_threshold and state.started_talking:
+                return True
+        return False
+
+    def determine_pause_streaming(
+        self, audio: np.ndarray, sampling_rate: int, state: AppState
+    ) -> bool:
+        """Feed a single frame to the streaming VAD, determine if a pause happened"""
+        if self.vad_stream is None:
+            self.vad_stream = cast(
+                StreamingPauseDetectionModel, self.model
+            ).create_stream(
+                self.model_options,
+                self.algo_options.audio_chunk_duration,
+                self.energy_gate,
+            )
+        result = self.vad_stream.process((sampling_rate, audio))
+
+        if state.started_talking:
+            state.stream.append(audio)
+        else:
+            # Keep one chunk of audio around so the onset of speech is not lost
+            if state.buffer.max_samples is None:
+                state.buffer = AudioAccumulator(
+                    max_samples=int(
+                        self.algo_options.audio_chunk_duration * sampling_rate
+                    )
+                )
+            state.buffer.append(audio)
+            if result.speech_duration > self.algo_options.started_talking_threshold:
+                state.started_talking = True
+                logger.debug("Started talking")
+                state.stream.append(state.buffer.view())
+                state.buffer.clear()
+        return (
+            state.started_talking
+            and result.speech_duration < self.algo_options.speech_threshold
+        )
+
+    def process_audio(self, audio: tuple[int, np.ndarray], state: AppState) -> None:
+        frame_rate, array = audio
+        array = np.squeeze(array)
+        if not state.sampling_rate:
+            state.sampling_rate = frame_rate
+        if self.algo_options.streaming_vad:
+            state.pause_detected = self.determine_pause_streaming(
+                array, state.sampling_rate, state
+            )
+            return
+        state.buffer.append(array)
+
+        pause_detected = self.determine_pause(
+            state.buffer.view(), state.sampling_rate, state
+        )
+        state.pause_detected = pause_detected
+
+
+class ReplyOnPause(PauseDetectionMixin, StreamHandler):
     def __init__(
         self,
         fn: ReplyFnGenerator,
@@ -77,27 +231,31 @@ class ReplyOnPause(StreamHandler):
         output_frame_size: int = 480,
         input_sample_rate: int = 48000,
         model: PauseDetectionModel | None = None,
+        output_layout: Literal["mono", "stereo"] = "stereo",
+        prefetch: int = 0,
+        interrupt_fade_ms: float = 0,
     ):
         super().__init__(
             expected_layout,
             output_sample_rate,
             output_frame_size,
             input_sample_rate=input_sample_rate,
+            output_layout=output_layout,
         )
         self.can_interrupt = can_interrupt
+        self.interrupt_fade_ms = interrupt_fade_ms
+        self.prefetch = prefetch
+        self.prefetch_stats = PrefetchStats()
         self.expected_layout: Literal["mono", "stereo"] = expected_layout
         self.output_sample_rate = output_sample_rate
         self.output_frame_size = output_frame_size
-        self.model = model or get_silero_model()
+        self.init_pause_detection(algo_options, model_options, model)
         self.fn = fn
         self.is_async = inspect.isasyncgenfunction(fn)
         self.event = Event()
-        self.state = AppState()
         self.generator: (
             Generator[EmitType, None, None] | AsyncGenerator[EmitType, None] | None
         ) = None
-        self.model_options = model_options
-        self.algo_options = algo_options or AlgoOptions()
         self.startup_fn = startup_fn
 
     @property
@@ -113,6 +271,7 @@ class ReplyOnPause(StreamHandler):
                 args = ()
             self.generator = self.startup_fn(*args)
             self.event.set()
+            self.signal_output()
 
     def copy(self):
         return ReplyOnPause(
@@ -126,59 +285,29 @@ class ReplyOnPause(StreamHandler):
             self.output_frame_size,
             self.input_sample_rate,
             self.model,
+            output_layout=self.output_layout,
+            prefetch=self.prefetch,
+            interrupt_fade_ms=self.interrupt_fade_ms,
         )
 
-    def determine_pause(
-        self, audio: np.ndarray, sampling_rate: int, state: AppState
-    ) -> bool:
-        """Take in the stream, determine if a pause happened"""
-        duration = len(audio) / sampling_rate
-
-        if duration >= self.algo_options.audio_chunk_duration:
-            dur_vad, _ = self.model.vad((sampling_rate, audio), self.model_options)
-            logger.debug("VAD duration: %s", dur_vad)
-            if (
-                dur_vad > self.algo_options.started_talking_threshold
-                and not state.started_talking
-            ):
-                state.started_talking = True
-                logger.debug("Started talking")
-            if state.started_talking:
-                if state.stream is None:
-                    state.stream = audio
-                else:
-                    state.stream = np.concatenate((state.stream, audio))
-            state.buffer = None
-            if dur_vad < self.algo_options.speech_threshold and state.started_talking:
-                return True
-        return False
-
-    def process_audio(self, audio: tuple[int, np.ndarray], state: AppState) -> None:
-        frame_rate, array = audio
-        array = np.squeeze(array)
-        if not state.sampling_rate:
-            state.sampling_rate = frame_rate
-        if state.buffer is None:
-            state.buffer = array
-        else:
-            state.buffer = np.concatenate((state.buffer, array))
-
-        pause_detected = self.determine_pause(
-            state.buffer, state.sampling_rate, self.state
-        )
-        state.pause_detected = pause_detected
-
     def receive(self, frame: tuple[int, np.ndarray]) -> None:
         if self.state.responding and not self.can_interrupt:
             return
-        self.process_audio(frame, self.state)
-        if self.state.pause_detected:
+        state = self.state
+        self.process_audio(frame, state)
+        # The state is only replaced once the reply starts, so later frames see
+        # the same pause. Flushing again would cancel the new reply's token.
+        if state.pause_detected and not state.pause_handled:
+            state.pause_handled = True
+            if self.can_interrupt:
+                # Cancel the reply before its generator is closed, so a chunk
+                # it is still producing is dropped instead of played
+                self.clear_queue(self.interrupt_fade_ms)
             self.event.set()
+            self.signal_output()
             if self.can_interrupt and self.state.responding:
                 self._close_generator()
                 self.generator = None
-            if self.can_interrupt:
-                self.clear_queue()
 
     def _close_generator(self):
         """Properly close the generator to ensure resources are released."""
@@ -204,9 +333,15 @@ class ReplyOnPause(StreamHandler):
         super().reset()
         if self.phone_mode:
             self.args_set.set()
+        if isinstance(self.generator, PrefetchGenerator):
+            # Stop the worker thread of an unfinished reply
+            self.generator.close()
         self.generator = None
         self.event.clear()
-        self.state = AppState()
+        self.reset_pause_detection()
+
+    def has_output(self) -> bool:
+        return self.event.is_set()
 
     async def async_iterate(self, generator) -> EmitType:
         return await anext(generator)
@@ -224,12 +359,18 @@ class ReplyOnPause(StreamHandler):
                         self.latest_args = [None]
                         self.args_set.set()
                 logger.debug("Creating generator")
-                audio = cast(np.ndarray, self.state.stream).reshape(1, -1)
+                audio = self.state.stream.to_array().reshape(1, -1)
                 if self._needs_additional_inputs:
                     self.latest_args[0] = (self.state.sampling_rate, audio)
                     self.generator = self.fn(*self.latest_args)  # type: ignore
                 else:
                     self.generator = self.fn((self.state.sampling_rate, audio))  # type: ignore
+                if self.prefetch and not self.is_async:
+                    self.generator = PrefetchGenerator(
+                        cast(Generator[EmitType, None, None], self.generator),
+                        self.prefetch,
+                        self.prefetch_stats,
+                    )
                 logger.debug("Latest args: %s", self.latest_args)
                 self.state = self.state.new()
             self.state.responding = True
@@ -259,3 +400,179 @@ class ReplyOnPause(StreamHandler):
                 logger.debug("Error in ReplyOnPause: %s", e)
                 self.reset()
                 raise e
+
+
+@lru_cache
+def get_vad_executor() -> ThreadPoolExecutor:
+    """Executor shared by all AsyncReplyOnPause handlers to run the VAD."""
+    return ThreadPoolExecutor(thread_name_prefix="fastrtc-vad")
+
+
+class AsyncReplyOnPause(PauseDetectionMixin, AsyncStreamHandler):
+    """ReplyOnPause that runs the reply function on the event loop.
+
+    Async reply generators are iterated directly on the event loop, so no thread
+    is blocked while waiting for output. The VAD runs in `executor` (a shared
+    pool by default). Sync reply generators are still supported and are advanced
+    in the default executor.
+    """
+
+    def __init__(
+        self,
+        fn: ReplyFnGenerator,
+        startup_fn: Callable | None = None,
+        algo_options: AlgoOptions | None = None,
+        model_options: ModelOptions | None = None,
+        can_interrupt: bool = True,
+        expected_layout: Literal["mono", "stereo"] = "mono",
+        output_sample_rate: int = 24000,
+        output_frame_size: int = 480,
+        input_sample_rate: int = 48000,
+        model: PauseDetectionModel | None = None,
+        executor: Executor | None = None,
+        output_layout: Literal["mono", "stereo"] = "stereo",
+        interrupt_fade_ms: float = 0,
+    ):
+        super().__init__(
+            expected_layout,
+            output_sample_rate,
+            output_frame_size,
+            input_sample_rate=input_sample_rate,
+            output_layout=output_layout,
+        )
+        self.can_interrupt = can_interrupt
+        self.interrupt_fade_ms = interrupt_fade_ms
+        self.init_pause_detection(algo_options, model_options, model)
+        self.fn = fn
+        self.is_async = inspect.isasyncgenfunction(fn)
+        self.event = asyncio.Event()
+        self.generator: (
+            Generator[EmitType, None, None] | AsyncGenerator[EmitType, None] | None
+        ) = None
+        self.startup_fn = startup_fn
+        self.executor = executor
+
+    @property
+    def _needs_additional_inputs(self) -> bool:
+        return len(inspect.signature(self.fn).parameters) > 1
+
+    async def start_up(self):
+        if self.startup_fn:
+            if self._needs_additional_inputs:
+                await self.wait_for_args()
+                args = self.latest_args[1:]
+            else:
+                args = ()
+            self.generator = self.startup_fn(*args)
+            self.event.set()
+
+    def copy(self):
+        return AsyncReplyOnPause(
+            self.fn,
+            self.startup_fn,
+            self.algo_options,
+            self.model_options,
+            self.can_interrupt,
+            self.expected_layout,
+            self.output_sample_rate,
+            self.output_frame_size,
+            self.input_sample_rate,
+            self.model,
+            self.executor,
+            output_layout=self.output_layout,
+            interrupt_fade_ms=self.interrupt_fade_ms,
+        )
+
+    async def receive(self, frame: tuple[int, np.ndarray]) -> None:
+        if self.state.responding and not self.can_interrupt:
+            return
+        state = self.state
+        await asyncio.get_running_loop().run_in_executor(
+            self.executor or get_vad_executor(), self.process_audio, frame, state
+        )
+        if state.pause_detected and not state.pause_handled:
+            state.pause_handled = True
+            if self.can_interrupt:
+                self.clear_queue(self.interrupt_fade_ms)
+            self.event.set()
+            if self.can_interrupt and self.state.responding:
+                await self._close_generator()
+                self.generator = None
+
+    async def _close_generator(self):
+        """Properly close the generator to ensure resources are released."""
+        if self.generator is None:
+            return
+        try:
+            if self.is_async:
+                await cast(AsyncGenerator[EmitType, None], self.generator).aclose()
+            else:
+                cast(Generator[EmitType, None, None], self.generator).close()
+        except Exception as e:  # noqa: BLE001 - cleanup errors of the reply must not stop the reset
+            logger.debug(f"Error closing generator: {e}")
+
+    def reset(self):
+        super().reset()
+        if self.phone_mode:
+            self.args_set.set()
+        self.generator = None
+        self.event.clear()
+        self.reset_pause_detection()
+
+    def has_output(self) -> bool:
+        return self.event.is_set()
+
+    async def wait_for_output(self):
+        await self.event.wait()
+
+    async def _next_output(self) -> EmitType:
+        if self.is_async:
+            return await anext(cast(AsyncGenerator[EmitType, None], self.generator))
+        output = await asyncio.get_running_loop().run_in_executor(
+            None, next, self.generator, StopIteration
+        )
+        if output is StopIteration:
+            # StopIteration cannot propagate out of a coroutine
+            raise StopAsyncIteration
+        return output
+
+    async def emit(self):
+        if not self.event.is_set():
+            return None
+        if not self.generator:
+            await self.send_message(create_message("log", "pause_detected"))
+            if self._needs_additional_inputs and not self.args_set.is_set():
+                if not self.phone_mode:
+                    await self.wait_for_args()
+                else:
+                    self.latest_args = [None]
+                    self.args_set.set()
+            logger.debug("Creating generator")
+            audio = self.state.stream.to_array().reshape(1, -1)
+            if self._needs_additional_inputs:
+                self.latest_args[0] = (self.state.sampling_rate, audio)
+                self.generator = self.fn(*self.latest_args)  # type: ignore
+            else:
+                self.generator = self.fn((self.state.sampling_rate, audio))  # type: ignore
+            self.state = self.state.new()
+        self.state.responding = True
+        try:
+            output = await self._next_output()
+            audio, additional_outputs = split_output(output)
+            if audio is not None:
+                await self.send_message(create_message("log", "response_starting"))
+                self.state.responded_audio = True
+            if self.phone_mode and additional_outputs:
+                self.latest_args = [None] + list(additional_outputs.args)
+            return output
+        except StopAsyncIteration:
+            if not self.state.responded_audio:
+                await self.send_message(create_message("log", "response_starting"))
+            self.reset()
+        except Exception as e:
+            import traceback
+
+            traceback.print_exc()
+            logger.debug("Error in AsyncReplyOnPause: %s", e)
+            self.reset()
+            raise
@@ -1,6 +1,7 @@
 import asyncio
 import logging
 import re
+from dataclasses import dataclass, field
 from typing import Callable, Literal
 
 import numpy as np
@@ -13,15 +14,19 @@ from .reply_on_pause import (
     ReplyFnGenerator,
     ReplyOnPause,
 )
+from .resampler import StreamingResampler
 from .speech_to_text import get_stt_model, stt_for_chunks
-from .utils import audio_to_float32, create_message
+from .utils import AudioAccumulator, create_message
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
 class ReplyOnStopWordsState(AppState):
     stop_word_detected: bool = False
-    post_stop_word_buffer: np.ndarray | None = None
+    post_stop_word_buffer: AudioAccumulator = field(
+        default_factory=lambda: AudioAccumulator(max_samples=32000)
+    )
     started_talking_pre_stop_word: bool = False
 
     def new(self):
@@ -42,6 +47,9 @@ class ReplyOnStopWords(ReplyOnPause):
         output_frame_size: int = 480,
         input_sample_rate: int = 48000,
         model: PauseDetectionModel | None = None,
+        output_layout: Literal["mono", "stereo"] = "stereo",
+        prefetch: int = 0,
+        interrupt_fade_ms: float = 0,
     ):
         super().__init__(
             fn,
@@ -54,9 +62,15 @@ class ReplyOnStopWords(ReplyOnPause):
             output_frame_size=output_frame_size,
             input_sample_rate=input_sample_rate,
             model=model,
+            output_layout=output_layout,
+            prefetch=prefetch,
+            interrupt_fade_ms=interrupt_fade_ms,
         )
+        if self.algo_options.streaming_vad:
+            raise ValueError("ReplyOnStopWords does not support streaming_vad.")
         self.stop_words = stop_words
         self.state = ReplyOnStopWordsState()
+        self._stt_resampler: StreamingResampler | None = None
         self.stt_model = get_stt_model("moonshine/base")
 
     def stop_word_detected(self, text: str) -> bool:
@@ -86,39 +100,35 @@ class ReplyOnStopWords(ReplyOnPause):
         self, audio: np.ndarray, sampling_rate: int, state: ReplyOnStopWordsState
     ) -> bool:
         """Take in the stream, determine if a pause happened"""
-        import librosa
-
         duration = len(audio) / sampling_rate
 
         if duration >= self.algo_options.audio_chunk_duration:
             if not state.stop_word_detected:
-                audio_f32 = audio_to_float32((sampling_rate, audio))
-                audio_rs = librosa.resample(
-                    audio_f32, orig_sr=sampling_rate, target_sr=16000
-                )
-                if state.post_stop_word_buffer is None:
-                    state.post_stop_word_buffer = audio_rs
-                else:
-                    state.post_stop_word_buffer = np.concatenate(
-                        (state.post_stop_word_buffer, audio_rs)
+                if (
+                    self._stt_resampler is None
+                    or self._stt_resampler.input_rate != sampling_rate
+                ):
+                    self._stt_resampler = StreamingResampler(
+                        sampling_rate, 16000, dtype=np.float32
                     )
-                if len(state.post_stop_word_buffer) / 16000 > 2:
-                    state.post_stop_word_buffer = state.post_stop_word_buffer[-32000:]
+                # The buffer keeps the last two seconds of 16 kHz audio
+                state.post_stop_word_buffer.append(self._stt_resampler.resample(audio))
+                post_stop_word_audio = state.post_stop_word_buffer.view()
                 dur_vad, chunks = self.model.vad(
-                    (16000, state.post_stop_word_buffer),
+                    (16000, post_stop_word_audio),
                     self.model_options,
                 )
                 text = stt_for_chunks(
-                    self.stt_model, (16000, state.post_stop_word_buffer), chunks
+                    self.stt_model, (16000, post_stop_word_audio), chunks
                 )
                 logger.debug(f"STT: {text}")
                 state.stop_word_detected = self.stop_word_detected(text)
                 if state.stop_word_detected:
                     logger.debug("Stop word detected")
                     self.send_stopword()
-                state.buffer = None
+                state.buffer.clear()
             else:
-                dur_vad, _ = self.model.vad((sampling_rate, audio), self.model_options)
+                dur_vad = self.speech_duration(audio, sampling_rate)
                 logger.debug("VAD duration: %s", dur_vad)
                 if (
                     dur_vad > self.algo_options.started_talking_threshold
@@ -128,11 +138,8 @@ class ReplyOnStopWords(ReplyOnPause):
                     state.started_talking = True
                     logger.debug("Started talking")
                 if state.started_talking:
-                    if state.stream is None:
-                        state.stream = audio
-                    else:
-                        state.stream = np.concatenate((state.stream, audio))
-                state.buffer = None
+                    state.stream.append(audio)
+                state.buffer.clear()
                 if (
                     dur_vad < self.algo_options.speech_threshold
                     and state.started_talking
@@ -146,6 +153,8 @@ class ReplyOnStopWords(ReplyOnPause):
         self.generator = None
         self.event.clear()
         self.state = ReplyOnStopWordsState()
+        if self._stt_resampler is not None:
+            self._stt_resampler.reset()
 
     def copy(self):
         return ReplyOnStopWords(
@@ -160,4 +169,7 @@ class ReplyOnStopWords(ReplyOnPause):
             self.output_frame_size,
             self.input_sample_rate,
             self.model,
+            output_layout=self.output_layout,
+            prefetch=self.prefetch,
+            interrupt_fade_ms=self.interrupt_fade_ms,
         )
@@ -0,0 +1,133 @@
+"""Streaming audio resampling."""
+
+from __future__ import annotations
+
+import av
+import numpy as np
+from numpy.typing import DTypeLike, NDArray
+
+_AV_FORMATS = {np.dtype(np.int16): "s16", np.dtype(np.float32): "flt"}
+
+
+class StreamingResampler:
+    """
+    Resample consecutive chunks of a single mono audio stream.
+
+    The underlying `av.AudioResampler` builds its filter once and carries the
+    filter history from one chunk to the next, so chunk boundaries do not
+    introduce edge artifacts. Use one instance per stream.
+
+    Parameters
+    ----------
+    input_rate : int
+        Sample rate of the audio passed to `resample`
+    output_rate : int
+        Sample rate of the returned audio
+    dtype : DTypeLike
+        Data type of the returned audio, either int16 or float32
+
+    Example
+    -------
+    >>> resampler = StreamingResampler(48000, 16000, dtype=np.float32)
+    >>> for chunk in chunks:
+    ...     audio_16k = resampler.resample(chunk)
+    """
+
+    def __init__(
+        self, input_rate: int, output_rate: int, dtype: DTypeLike = np.int16
+    ) -> None:
+        self.input_rate = input_rate
+        self.output_rate = output_rate
+        self.dtype = np.dtype(dtype)
+        if self.dtype not in _AV_FORMATS:
+            raise TypeError(f"Unsupported audio data type: {self.dtype}")
+        self._resampler: av.AudioResampler | None = None  # type: ignore
+
+    def reset(self) -> None:
+        """Drop any audio carried over from previous chunks."""
+        self._resampler = None
+
+    def _convert(self, audio: np.ndarray) -> np.ndarray:
+        if audio.dtype == self.dtype:
+            return audio
+        if self.dtype == np.float32:
+            return audio.astype(np.float32) / 32768.0
+        return (np.clip(audio, -1.0, 1.0) * 32767.0).astype(np.int16)
+
+    def _to_array(self, frames: list) -> NDArray:
+        if not frames:
+            return np.zeros(0, dtype=self.dtype)
+        if len(frames) == 1:
+            return frames[0].to_ndarray().reshape(-1)
+        return np.concatenate([f.to_ndarray().reshape(-1) for f in frames])
+
+    def resample(self, audio: NDArray[np.int16 | np.float32]) -> NDArray:
+        """Resample the next chunk of the stream.
+
+        The output may lag the input by a few samples, which are returned by
+        later calls or by `flush`.
+        """
+        audio = np.asarray(audio).reshape(-1)
+        if self.input_rate == self.output_rate:
+            return self._convert(audio)
+        if not len(audio):
+            # FFmpeg rejects empty frames
+            return np.zeros(0, dtype=self.dtype)
+        if audio.dtype not in _AV_FORMATS:
+            audio = audio.astype(np.float32)
+        if self._resampler is None:
+            self._resampler = av.AudioResampler(  # type: ignore
+                format=_AV_FORMATS[self.dtype], layout="mono", rate=self.output_rate
+            )
+        frame = av.AudioFrame.from_ndarray(  # type: ignore
+            np.ascontiguousarray(audio).reshape(1, -1),
+            format=_AV_FORMATS[audio.dtype],
+            layout="mono",
+        )
+        frame.sample_rate = self.input_rate
+        return self._to_array(self._resampler.resample(frame))
+
+    def flush(self) -> NDArray:
+        """Return the samples still held by the resampler and reset it."""
+        if self._resampler is None:
+            return np.zeros(0, dtype=self.dtype)
+        out = self._to_array(self._resampler.resample(None))
+        self._resampler = None
+        return out
+
+
+def resample_audio(
+    audio: NDArray[np.int16 | np.float32],
+    input_rate: int,
+    output_rate: int,
+    dtype: DTypeLike | None = None,
+) -> NDArray:
+    """
+    Resample a complete piece of mono audio in one call.
+
+    Parameters
+    ----------
+    audio : np.ndarray
+        The audio data as an int16 or float32 numpy array
+    input_rate : int
+        Sample rate of `audio`
+    output_rate : int
+        Desired sample rate
+    dtype : DTypeLike | None
+        Data type of the returned audio. Defaults to int16 for int16 input and
+        float32 otherwise.
+
+    Returns
+    -------
+    np.ndarray
+        The resampled audio as a one dimensional array
+    """
+    audio = np.asarray(audio)
+    if dtype is None:
+        dtype = np.int16 if audio.dtype == np.int16 else np.float32
+    resampler = StreamingResampler(input_rate, output_rate, dtype)
+    out = resampler.resample(audio)
+    tail = resampler.flush()
+    if len(tail):
+        out = np.concatenate((out, tail))
+    return out
@@ -3,10 +3,10 @@ from pathlib import Path
 from typing import Literal, Protocol
 
 import click
-import librosa
 import numpy as np
 from numpy.typing import NDArray
 
+from ..resampler import resample_audio
 from ..utils import AudioChunk, audio_to_float32
 
 curr_dir = Path(__file__).parent
@@ -35,9 +35,7 @@ class MoonshineSTT(STTModel):
         if audio_np.dtype == np.int16:
             audio_np = audio_to_float32(audio)
         if sr != 16000:
-            audio_np: NDArray[np.float32] = librosa.resample(
-                audio_np, orig_sr=sr, target_sr=16000
-            )
+            audio_np = resample_audio(audio_np, sr, 16000, dtype=np.float32)
         if audio_np.ndim == 1:
             audio_np = audio_np.reshape(1, -1)
         tokens = self.model.generate(audio_np)
@@ -17,9 +17,11 @@ from gradio.components.base import Component
 from pydantic import BaseModel
 from typing_extensions import NotRequired
 
+from .executors import ExecutorOption
+from .jitter_buffer import JitterBufferOptions
 from .tracks import HandlerType, StreamHandlerImpl
 from .webrtc import WebRTC
-from .webrtc_connection_mixin import WebRTCConnectionMixin
+from .webrtc_connection_mixin import ConnectionOptions, WebRTCConnectionMixin
 from .websocket import WebSocketHandler
 
 logger = logging.getLogger(__name__)
@@ -63,8 +65,32 @@ class Stream(WebRTCConnectionMixin):
         additional_inputs: list[Component] | None = None,
         additional_outputs: list[Component] | None = None,
         ui_args: UIArgs | None = None,
+        executor: ExecutorOption = "default",
+        executor_workers: int | None = None,
+        output_buffer_ms: float | None = None,
+        prefetch: int = 0,
+        jitter_buffer: JitterBufferOptions | None = None,
+        decode_in_handler_layout: bool = False,
+        zero_copy_input: bool = False,
+        max_input_fps: float | None = None,
+        input_frame_size: tuple[int, int] | None = None,
+        input_pixel_format: str = "bgr24",
+        output_pixel_format: str = "bgr24",
     ):
         WebRTCConnectionMixin.__init__(self)
+        self._options = ConnectionOptions(
+            executor=executor,
+            executor_workers=executor_workers,
+            output_buffer_ms=output_buffer_ms,
+            prefetch=prefetch,
+            jitter_buffer=jitter_buffer,
+            decode_in_handler_layout=decode_in_handler_layout,
+            zero_copy_input=zero_copy_input,
+            max_input_fps=max_input_fps,
+            input_frame_size=input_frame_size,
+            input_pixel_format=input_pixel_format,
+            output_pixel_format=output_pixel_format,
+        )
         self.mode = mode
         self.modality = modality
         self.rtp_params = rtp_params
@@ -78,6 +104,14 @@ class Stream(WebRTCConnectionMixin):
         self.additional_input_components = additional_inputs
         self.additional_outputs_handler = additional_outputs_handler
         self.rtc_configuration = rtc_configuration
+        # The UI component shares the stream-wide pool instead of creating its own
+        self._ui_executor = (
+            self._options.executor
+            if self._options.executor in ("default", "connection")
+            else self.get_executor("stream")
+        )
+        # Passed to every WebRTC component of the default UI
+        self._webrtc_options = dict(vars(self._options), executor=self._ui_executor)
         self._ui = self._generate_default_ui(ui_args)
         self._ui.launch = self._wrap_gradio_launch(self._ui.launch)
 
@@ -212,6 +246,7 @@ class Stream(WebRTCConnectionMixin):
                         output_video = WebRTC(
                             label="Video Stream",
                             rtc_configuration=self.rtc_configuration,
+                            **self._webrtc_options,
                             mode="receive",
                             modality="video",
                         )
@@ -259,6 +294,7 @@ class Stream(WebRTCConnectionMixin):
                         output_video = WebRTC(
                             label="Video Stream",
                             rtc_configuration=self.rtc_configuration,
+                            **self._webrtc_options,
                             mode="send",
                             modality="video",
                         )
@@ -304,6 +340,7 @@ class Stream(WebRTCConnectionMixin):
                         image = WebRTC(
                             label="Stream",
                             rtc_configuration=self.rtc_configuration,
+                            **self._webrtc_options,
                             mode="send-receive",
                             modality="video",
                         )
@@ -356,6 +393,7 @@ class Stream(WebRTCConnectionMixin):
                             output_video = WebRTC(
                                 label="Audio Stream",
                                 rtc_configuration=self.rtc_configuration,
+                                **self._webrtc_options,
                                 mode="receive",
                                 modality="audio",
                                 icon=ui_args.get("icon"),
@@ -404,6 +442,7 @@ class Stream(WebRTCConnectionMixin):
                             image = WebRTC(
                                 label="Stream",
                                 rtc_configuration=self.rtc_configuration,
+                                **self._webrtc_options,
                                 mode="send",
                                 modality="audio",
                                 icon=ui_args.get("icon"),
@@ -455,6 +494,7 @@ class Stream(WebRTCConnectionMixin):
                             image = WebRTC(
                                 label="Stream",
                                 rtc_configuration=self.rtc_configuration,
+                                **self._webrtc_options,
                                 mode="send-receive",
                                 modality="audio",
                                 icon=ui_args.get("icon"),
@@ -507,6 +547,7 @@ class Stream(WebRTCConnectionMixin):
                             image = WebRTC(
                                 label="Stream",
                                 rtc_configuration=self.rtc_configuration,
+                                **self._webrtc_options,
                                 mode="send-receive",
                                 modality="audio-video",
                                 icon=ui_args.get("icon"),
@@ -582,10 +623,18 @@ class Stream(WebRTCConnectionMixin):
                 await websocket.close()
                 return
 
+        executor_key = f"telephone-{id(handler)}"
         ws = WebSocketHandler(
-            handler, set_handler, lambda s: None, lambda s: lambda a: None
+            handler,
+            set_handler,
+            lambda s: None,
+            lambda s: lambda a: None,
+            executor=self.get_executor(executor_key),
         )
-        await ws.handle_websocket(websocket)
+        try:
+            await ws.handle_websocket(websocket)
+        finally:
+            self.release_executor(executor_key)
 
     async def websocket_offer(self, websocket: WebSocket):
         handler = cast(StreamHandlerImpl, self.event_handler.copy())  # type: ignore
@@ -610,10 +659,18 @@ class Stream(WebRTCConnectionMixin):
         def clean_up(s):
             self.clean_up(s)
 
+        executor_key = f"websocket-{id(handler)}"
         ws = WebSocketHandler(
-            handler, set_handler, clean_up, lambda s: self.set_additional_outputs(s)
+            handler,
+            set_handler,
+            clean_up,
+            lambda s: self.set_additional_outputs(s),
+            executor=self.get_executor(executor_key),
         )
-        await ws.handle_websocket(websocket)
+        try:
+            await ws.handle_websocket(websocket)
+        finally:
+            self.release_executor(executor_key)
 
     def fastphone(
         self,
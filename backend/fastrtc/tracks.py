@@ -10,10 +10,10 @@ import threading
 import time
 import traceback
 from abc import ABC, abstractmethod
-from collections.abc import Callable
+from collections.abc import Callable, Generator
+from concurrent.futures import Executor
 from typing import (
     Any,
-    Generator,
     Literal,
     TypeAlias,
     Union,
@@ -32,14 +32,41 @@ from aiortc.contrib.media import AudioFrame, VideoFrame  # type: ignore
 from aiortc.mediastreams import MediaStreamError
 from numpy import typing as npt
 
+from fastrtc.decoder import EncodedAudio
+from fastrtc.interruption import (
+    CancellationToken,
+    InterruptStats,
+    fade_out,
+    is_cancelled,
+)
+from fastrtc.jitter_buffer import JitterBufferOptions, OutputJitterBuffer
+from fastrtc.pacing import PacingStats, get_pacing_clock
 from fastrtc.utils import (
+    AUDIO_PTIME,
+    PACKED_VIDEO_FORMATS,
     AdditionalOutputs,
     DataChannel,
+    FramePool,
+    InputAggregator,
+    OpusPacket,
+    PrefetchGenerator,
+    PrefetchStats,
     WebRTCError,
+    array_to_video_frame,
+    audio_frame_view,
+    audio_queue_size,
     create_message,
     current_channel,
+    frame_samples,
+    frame_time,
     player_worker_decode,
     split_output,
+    video_frame_view,
+)
+from fastrtc.video_processing import (
+    FrameRateLimiter,
+    VideoStats,
+    get_video_executor,
 )
 
 logger = logging.getLogger(__name__)
@@ -51,7 +78,10 @@ VideoNDArray: TypeAlias = Union[
 ]
 
 VideoEmitType = (
-    VideoNDArray | tuple[VideoNDArray, AdditionalOutputs] | AdditionalOutputs
+    VideoNDArray
+    | VideoFrame
+    | tuple[VideoNDArray | VideoFrame, AdditionalOutputs]
+    | AdditionalOutputs
 )
 VideoEventHandler = Callable[[npt.ArrayLike], VideoEmitType]
 
@@ -59,6 +89,10 @@ VideoEventHandler = Callable[[npt.ArrayLike], VideoEmitType]
 class VideoCallback(VideoStreamTrack):
     """
     This works for streaming input and output
+
+    The handler runs in a worker thread, one frame at a time. Frames that arrive
+    while it is busy replace each other, so only the latest one is processed
+    next and a slow handler drops frames instead of falling behind.
     """
 
     kind = "video"
@@ -70,8 +104,18 @@ class VideoCallback(VideoStreamTrack):
         channel: DataChannel | None = None,
         set_additional_outputs: Callable | None = None,
         mode: Literal["send-receive", "send"] = "send-receive",
+        zero_copy_input: bool = False,
+        executor: Executor | None = None,
+        max_input_fps: float | None = None,
+        input_frame_size: tuple[int, int] | None = None,
+        input_pixel_format: str = "bgr24",
+        output_pixel_format: str = "bgr24",
     ) -> None:
         super().__init__()  # don't forget this!
+        if input_pixel_format not in PACKED_VIDEO_FORMATS:
+            raise ValueError(
+                f"input_pixel_format must be one of {list(PACKED_VIDEO_FORMATS)}"
+            )
         self.track = track
         self.event_handler = event_handler
         self.latest_args: str | list[Any] = "not_set"
@@ -81,6 +125,37 @@ class VideoCallback(VideoStreamTrack):
         self.mode = mode
         self.channel_set = asyncio.Event()
         self.has_started = False
+        self.zero_copy_input = zero_copy_input
+        # (width, height) that input frames are scaled to
+        self.input_frame_size = input_frame_size
+        self.input_pixel_format = input_pixel_format
+        self.output_pixel_format = output_pixel_format
+        self.frame_pool = FramePool()
+        self.executor = executor
+        self.video_stats = VideoStats()
+        self.frame_rate_limiter = (
+            FrameRateLimiter(max_input_fps) if max_input_fps else None
+        )
+        self._latest_frame: VideoFrame | None = None
+        self._frame_ready = asyncio.Event()
+        self._output: VideoFrame | None = None
+        self._output_ready = asyncio.Event()
+        self._error: Exception | None = None
+        self._tasks: list[asyncio.Task] = []
+
+    def frame_to_array(self, frame: VideoFrame, pooled: bool = False) -> np.ndarray:
+        width, height = self.input_frame_size or (None, None)
+        if not self.zero_copy_input:
+            return frame.to_ndarray(
+                format=self.input_pixel_format, width=width, height=height
+            )
+        return video_frame_view(
+            frame,
+            self.frame_pool if pooled else None,
+            format=self.input_pixel_format,
+            width=width,
+            height=height,
+        )
 
     def set_channel(self, channel: DataChannel):
         self.channel = channel
@@ -101,25 +176,104 @@ class VideoCallback(VideoStreamTrack):
                 new_args.append(val)
         return new_args
 
-    def array_to_frame(self, array: np.ndarray) -> VideoFrame:
-        return VideoFrame.from_ndarray(array, format="bgr24")
+    def array_to_frame(self, array: np.ndarray | VideoFrame) -> VideoFrame:
+        return array_to_video_frame(array, self.output_pixel_format)
 
     async def process_frames(self):
+        """Receive frames, keeping only the latest one the handler has not taken."""
         while not self.thread_quit.is_set():
             try:
-                await self.recv()
-            except TimeoutError:
+                frame = cast(VideoFrame, await self.track.recv())
+            except MediaStreamError:
+                self.stop()
+                return
+            if self.frame_rate_limiter and not self.frame_rate_limiter.accept(frame):
+                self.video_stats.skipped += 1
+                continue
+            if self._latest_frame is not None:
+                self.video_stats.dropped += 1
+            self._latest_frame = frame
+            self._frame_ready.set()
+
+    def event_handler_process(
+        self, frame: VideoFrame, args: list[Any]
+    ) -> tuple[VideoFrame | None, AdditionalOutputs | None]:
+        current_channel.set(self.channel)
+        # The handler only sees the array during the call, so a pooled array can
+        # be reused for the next frame
+        frame_array = self.frame_to_array(frame, pooled=True)
+        try:
+            array, outputs = split_output(
+                self.event_handler(*self.add_frame_to_payload(args, frame_array))
+            )
+        finally:
+            self.frame_pool.release(frame_array)
+        if array is None or self.mode == "send":
+            return None, outputs
+        new_frame = self.array_to_frame(array)
+        new_frame.pts = frame.pts
+        new_frame.time_base = frame.time_base
+        return new_frame, outputs
+
+    async def process_latest_frames(self):
+        loop = asyncio.get_running_loop()
+        while not self.thread_quit.is_set():
+            await self._frame_ready.wait()
+            self._frame_ready.clear()
+            frame, self._latest_frame = self._latest_frame, None
+            if frame is None:
+                continue
+            await self.wait_for_channel()
+            if self.latest_args == "not_set":
+                self._output = frame
+                self._output_ready.set()
                 continue
+            start = time.monotonic()
+            try:
+                new_frame, outputs = await loop.run_in_executor(
+                    self.executor or get_video_executor(),
+                    self.event_handler_process,
+                    frame,
+                    cast(list, self.latest_args),
+                )
+            except Exception as e:  # noqa: BLE001 - raised again in recv
+                logger.debug("exception %s", e)
+                logger.debug("traceback %s", traceback.format_exc())
+                self._error = e
+                self._output_ready.set()
+                return
+            self.video_stats.record(time.monotonic() - start)
+            if (
+                isinstance(outputs, AdditionalOutputs)
+                and self.set_additional_outputs
+                and self.channel
+            ):
+                self.set_additional_outputs(outputs)
+                self.channel.send(create_message("fetch_output", []))
+            if new_frame is not None:
+                # Otherwise no frame is sent: recv keeps waiting for the next
+                # output and the peer keeps showing the last one
+                self._output = new_frame
+                self._output_ready.set()
 
     async def start(
         self,
     ):
-        asyncio.create_task(self.process_frames())
+        if not self.has_started:
+            self._tasks = [
+                asyncio.create_task(self.process_frames()),
+                asyncio.create_task(self.process_latest_frames()),
+            ]
+            self.has_started = True
 
     def stop(self):
         super().stop()
         logger.debug("video callback stop")
         self.thread_quit.set()
+        for task in self._tasks:
+            task.cancel()
+        # Wake up a pending recv
+        self._output_ready.set()
 
     async def wait_for_channel(self):
         if not self.channel_set.is_set():
@@ -128,49 +282,19 @@ class VideoCallback(VideoStreamTrack):
             current_channel.set(self.channel)
 
     async def recv(self):  # type: ignore
-        try:
-            try:
-                frame = cast(VideoFrame, await self.track.recv())
-            except MediaStreamError:
-                self.stop()
-                return
-
-            await self.wait_for_channel()
-            frame_array = frame.to_ndarray(format="bgr24")
-            if self.latest_args == "not_set":
-                return frame
-
-            args = self.add_frame_to_payload(cast(list, self.latest_args), frame_array)
-
-            array, outputs = split_output(self.event_handler(*args))
-            if (
-                isinstance(outputs, AdditionalOutputs)
-                and self.set_additional_outputs
-                and self.channel
-            ):
-                self.set_additional_outputs(outputs)
-                self.channel.send(create_message("fetch_output", []))
-            if array is None and self.mode == "send":
-                return
-
-            new_frame = self.array_to_frame(array)
-            if frame:
-                new_frame.pts = frame.pts
-                new_frame.time_base = frame.time_base
-            else:
-                pts, time_base = await self.next_timestamp()
-                new_frame.pts = pts
-                new_frame.time_base = time_base
-
-            return new_frame
-        except Exception as e:
-            logger.debug("exception %s", e)
-            exec = traceback.format_exc()
-            logger.debug("traceback %s", exec)
+        if self.readyState != "live":
+            raise MediaStreamError
+        await self.start()
+        await self._output_ready.wait()
+        self._output_ready.clear()
+        if self._error is not None:
+            e = self._error
             if isinstance(e, WebRTCError):
                 raise e
-            else:
-                raise WebRTCError(str(e)) from e
+            raise WebRTCError(str(e)) from e
+        if self.readyState != "live":
+            raise MediaStreamError
+        return self._output
 
 
 class StreamHandlerBase(ABC):
@@ -180,11 +304,17 @@ class StreamHandlerBase(ABC):
         output_sample_rate: int = 24000,
         output_frame_size: int = 960,
         input_sample_rate: int = 48000,
+        output_layout: Literal["mono", "stereo"] = "stereo",
+        input_chunk_duration: float | None = None,
     ) -> None:
         self.expected_layout = expected_layout
         self.output_sample_rate = output_sample_rate
         self.output_frame_size = output_frame_size
         self.input_sample_rate = input_sample_rate
+        self.output_layout = output_layout
+        # When set, receive is called with chunks of this many seconds instead
+        # of once per 20 ms frame
+        self.input_chunk_duration = input_chunk_duration
         self.latest_args: list[Any] = []
         self._resampler = None
         self._channel: DataChannel | None = None
@@ -193,6 +323,8 @@ class StreamHandlerBase(ABC):
         self.channel_set = asyncio.Event()
         self._phone_mode = False
         self._clear_queue: Callable | None = None
+        self._output_ready: asyncio.Event | None = None
+        self._output_loop: asyncio.AbstractEventLoop | None = None
 
     @property
     def clear_queue(self) -> Callable:
@@ -252,6 +384,30 @@ class StreamHandlerBase(ABC):
         except Exception as e:
             logger.debug("Exception sending msg %s", e)
 
+    def has_output(self) -> bool:
+        """Whether emit may return output right now.
+
+        Handlers that override this must call `signal_output` whenever it becomes
+        True, so the output worker can wait instead of polling emit.
+        """
+        return True
+
+    def signal_output(self):
+        """Wake up the output worker. Safe to call from any thread."""
+        if self._output_ready is not None and self._output_loop is not None:
+            self._output_loop.call_soon_threadsafe(self._output_ready.set)
+
+    async def wait_for_output(self):
+        """Wait until `has_output` is True."""
+        if self._output_ready is None:
+            self._output_loop = asyncio.get_running_loop()
+            self._output_ready = asyncio.Event()
+        while not self.has_output():
+            self._output_ready.clear()
+            if self.has_output():
+                break
+            await self._output_ready.wait()
+
     def set_args(self, args: list[Any]):
         logger.debug("setting args in audio callback %s", args)
         self.latest_args = ["__webrtc_value__"] + list(args)
@@ -264,6 +420,15 @@ class StreamHandlerBase(ABC):
         pass
 
     def resample(self, frame: AudioFrame) -> Generator[AudioFrame, None, None]:
+        if (
+            self._resampler is None
+            and frame.format.name == "s16"
+            and frame.layout.name == self.expected_layout
+            and frame.sample_rate == self.input_sample_rate
+        ):
+            # Already decoded in the input format, e.g. mono Opus at 48 kHz
+            yield frame
+            return
         if self._resampler is None:
             self._resampler = av.AudioResampler(  # type: ignore
                 format="s16",
@@ -279,6 +444,11 @@ EmitType: TypeAlias = (
     | tuple[int, npt.NDArray[np.int16 | np.float32], Literal["mono", "stereo"]]
     | AdditionalOutputs
     | tuple[tuple[int, npt.NDArray[np.int16 | np.float32]], AdditionalOutputs]
+    | OpusPacket
+    | list[OpusPacket]
+    | tuple[OpusPacket | list[OpusPacket], AdditionalOutputs]
+    | EncodedAudio
+    | tuple[EncodedAudio, AdditionalOutputs]
     | None
 )
 AudioEmitType = EmitType
@@ -322,6 +492,17 @@ StreamHandlerImpl = StreamHandler | AsyncStreamHandler
 
 
 class AudioVideoStreamHandler(StreamHandler):
+    # Frames above this rate are dropped before they are converted and passed
+    # to video_receive. Overrides the max_input_fps option of the Stream.
+    max_input_fps: float | None = None
+    # (width, height) and pixel format of the arrays passed to video_receive.
+    # Override the input_frame_size and input_pixel_format options of the Stream.
+    input_frame_size: tuple[int, int] | None = None
+    input_pixel_format: str | None = None
+    # Pixel format of the arrays returned by video_emit. Overrides the
+    # output_pixel_format option of the Stream.
+    output_pixel_format: str | None = None
+
     @abstractmethod
     def video_receive(self, frame: VideoFrame) -> None:
         pass
@@ -336,6 +517,12 @@ class AudioVideoStreamHandler(StreamHandler):
 
 
 class AsyncAudioVideoStreamHandler(AsyncStreamHandler):
+    # See AudioVideoStreamHandler
+    max_input_fps: float | None = None
+    input_frame_size: tuple[int, int] | None = None
+    input_pixel_format: str | None = None
+    output_pixel_format: str | None = None
+
     @abstractmethod
     async def video_receive(self, frame: npt.NDArray[np.float32]) -> None:
         pass
@@ -357,17 +544,65 @@ HandlerType = StreamHandlerImpl | VideoStreamHandlerImpl | VideoEventHandler | C
 
 
 class VideoStreamHandler(VideoCallback):
+    def __init__(
+        self,
+        track: MediaStreamTrack,
+        event_handler: VideoStreamHandlerImpl,
+        channel: DataChannel | None = None,
+        set_additional_outputs: Callable | None = None,
+        mode: Literal["send-receive", "send"] = "send-receive",
+        zero_copy_input: bool = False,
+        executor: Executor | None = None,
+        max_input_fps: float | None = None,
+        input_frame_size: tuple[int, int] | None = None,
+        input_pixel_format: str = "bgr24",
+        output_pixel_format: str = "bgr24",
+    ) -> None:
+        super().__init__(
+            track,
+            event_handler,  # type: ignore
+            channel=channel,
+            set_additional_outputs=set_additional_outputs,
+            mode=mode,
+            zero_copy_input=zero_copy_input,
+            executor=executor,
+            # A rate declared by the handler takes precedence
+            max_input_fps=getattr(event_handler, "max_input_fps", None)
+            or max_input_fps,
+            input_frame_size=getattr(event_handler, "input_frame_size", None)
+            or input_frame_size,
+            input_pixel_format=getattr(event_handler, "input_pixel_format", None)
+            or input_pixel_format,
+            output_pixel_format=getattr(event_handler, "output_pixel_format", None)
+            or output_pixel_format,
+        )
+
     async def process_frames(self):
         while not self.thread_quit.is_set():
             try:
                 await self.channel_set.wait()
                 frame = cast(VideoFrame, await self.track.recv())
-                frame_array = frame.to_ndarray(format="bgr24")
+                if self.frame_rate_limiter and not self.frame_rate_limiter.accept(
+                    frame
+                ):
+                    self.video_stats.skipped += 1
+                    continue
+                start = time.monotonic()
+                # Handlers usually keep the frame for video_emit, so it is
+                # never taken from the pool
+                frame_array = self.frame_to_array(frame)
                 handler = cast(VideoStreamHandlerImpl, self.event_handler)
                 if inspect.iscoroutinefunction(handler.video_receive):
                     await handler.video_receive(frame_array)
                 else:
-                    handler.video_receive(frame_array)  # type: ignore
+                    # Sync handlers run in the video executor so that model
+                    # calls do not block the event loop
+                    await asyncio.get_running_loop().run_in_executor(
+                        self.executor or get_video_executor(),
+                        handler.video_receive,
+                        frame_array,
+                    )
+                self.video_stats.record(time.monotonic() - start)
             except MediaStreamError:
                 self.stop()
 
@@ -383,7 +618,9 @@ class VideoStreamHandler(VideoCallback):
             if inspect.iscoroutinefunction(handler.video_emit):
                 outputs = await handler.video_emit()
             else:
-                outputs = handler.video_emit()
+                outputs = await asyncio.get_running_loop().run_in_executor(
+                    self.executor or get_video_executor(), handler.video_emit
+                )
 
             array, outputs = split_output(outputs)
             if (
@@ -419,30 +656,111 @@ class AudioCallback(AudioStreamTrack):
         event_handler: StreamHandlerBase,
         channel: DataChannel | None = None,
         set_additional_outputs: Callable | None = None,
+        executor: Executor | None = None,
+        output_buffer_ms: float | None = None,
+        jitter_buffer: JitterBufferOptions | None = None,
+        zero_copy_input: bool = False,
     ) -> None:
         super().__init__()
+        self.executor = executor
+        self.zero_copy_input = zero_copy_input
         self.track = track
         self.event_handler = cast(StreamHandlerImpl, event_handler)
         self.event_handler._clear_queue = self.clear_queue
         self.current_timestamp = 0
         self.latest_args: str | list[Any] = "not_set"
-        self.queue = asyncio.Queue()
+        # When bounded, emit is only called again once playback has made room
+        self.queue = asyncio.Queue(
+            audio_queue_size(
+                output_buffer_ms,
+                self.event_handler.output_sample_rate,
+                self.event_handler.output_frame_size,
+            )
+        )
         self.thread_quit = asyncio.Event()
         self._start: float | None = None
         self.has_started = False
         self.last_timestamp = 0
+        self.pacing_stats = PacingStats()
+        self.jitter_buffer = (
+            OutputJitterBuffer(self.queue, jitter_buffer, self.pacing_stats)
+            if jitter_buffer is not None
+            else None
+        )
+        self.input_aggregator = (
+            InputAggregator(
+                self.event_handler.input_chunk_duration,
+                2 if self.event_handler.expected_layout == "stereo" else 1,
+            )
+            if self.event_handler.input_chunk_duration
+            else None
+        )
+        self.reply_token = CancellationToken()
+        self.interrupt_stats = InterruptStats()
+        # MIME type of the codec negotiated for sending, set with the answer
+        self.output_codec: str | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._playout_end = 0.0
+        self._pending_interrupt: tuple[CancellationToken, av.AudioFrame] | None = None
         self.channel = channel
         self.set_additional_outputs = set_additional_outputs
 
-    def clear_queue(self):
+    def clear_queue(self, fade_out_ms: float = 0):
+        """Stop playing the current reply.
+
+        The reply's token is cancelled right away, so frames that are still being
+        produced or are waiting for their deadline are dropped as well. The queue
+        is flushed on the event loop. With `fade_out_ms`, the first frames of the
+        queue are faded to silence instead of being cut off.
+        """
+        token = self.reply_token
+        self.reply_token = CancellationToken()
+        token.cancel()
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if self._loop is None or running_loop is self._loop:
+            self._flush(token, fade_out_ms)
+        else:
+            self._loop.call_soon_threadsafe(self._flush, token, fade_out_ms)
+
+    def _flush(self, token: CancellationToken, fade_out_ms: float):
         logger.debug("clearing queue")
         logger.debug("queue size: %d", self.queue.qsize())
-        i = 0
+        frames = []
         while not self.queue.empty():
-            self.queue.get_nowait()
-            i += 1
-        logger.debug("popped %d items from queue", i)
+            frames.append(self.queue.get_nowait())
+        logger.debug("popped %d items from queue", len(frames))
+        cancelled = [frame for frame in frames if is_cancelled(frame)]
+        # Frames of the next reply may already be queued if the flush was
+        # scheduled from another thread
+        next_reply = [frame for frame in frames if not is_cancelled(frame)]
+        faded = fade_out(cancelled, fade_out_ms) if fade_out_ms > 0 else []
+        for frame in faded:
+            self.reply_token.mark(frame)
+        for frame in faded + next_reply:
+            self.queue.put_nowait(frame)
         self._start = None
+        if self.jitter_buffer is not None:
+            if faded:
+                self.jitter_buffer.finish()
+            else:
+                self.jitter_buffer.reset()
+
+        if self._pending_interrupt is not None:
+            # The fade-out of an earlier interruption was cut short
+            self.interrupt_stats.record(
+                cast(float, token.cancelled_at)
+                - cast(float, self._pending_interrupt[0].cancelled_at)
+            )
+            self._pending_interrupt = None
+        if faded:
+            self._pending_interrupt = (token, faded[-1])
+        elif cancelled or self._playout_end > cast(float, token.cancelled_at):
+            self.interrupt_stats.record(
+                self._playout_end - cast(float, token.cancelled_at)
+            )
 
     async def wait_for_channel(self):
         if not self.event_handler.channel_set.is_set():
@@ -470,19 +788,33 @@ class AudioCallback(AudioStreamTrack):
             try:
                 frame = cast(AudioFrame, await self.track.recv())
                 for frame in self.event_handler.resample(frame):
-                    numpy_array = frame.to_ndarray()
-                    if isinstance(self.event_handler, AsyncHandler):
-                        await self.event_handler.receive(
-                            (frame.sample_rate, numpy_array)  # type: ignore
-                        )
+                    numpy_array = (
+                        audio_frame_view(frame)
+                        if self.zero_copy_input
+                        else frame.to_ndarray()
+                    )
+                    if self.input_aggregator is None:
+                        chunks = [(frame.sample_rate, numpy_array)]
                     else:
-                        await anyio.to_thread.run_sync(
-                            self.event_handler_receive, (frame.sample_rate, numpy_array)
+                        chunks = self.input_aggregator.push(
+                            frame.sample_rate, numpy_array
                         )
+                    for chunk in chunks:
+                        await self._receive_chunk(chunk)
             except MediaStreamError:
                 logger.debug("MediaStreamError in process_input_frames")
                 break
 
+    async def _receive_chunk(self, chunk: tuple[int, np.ndarray]) -> None:
+        if isinstance(self.event_handler, AsyncHandler):
+            await self.event_handler.receive(chunk)  # type: ignore
+        elif self.executor is not None:
+            await asyncio.get_running_loop().run_in_executor(
+                self.executor, self.event_handler_receive, chunk
+            )
+        else:
+            await anyio.to_thread.run_sync(self.event_handler_receive, chunk)
+
     async def start(self):
         if not self.has_started:
             loop = asyncio.get_running_loop()
@@ -497,7 +829,7 @@ class AudioCallback(AudioStreamTrack):
 
             else:
                 callable = functools.partial(
-                    loop.run_in_executor, None, self.event_handler_emit
+                    loop.run_in_executor, self.executor, self.event_handler_emit
                 )
                 start_up = anyio.to_thread.run_sync(self.event_handler.start_up)
             self.process_input_task = asyncio.create_task(self.process_input_frames())
@@ -518,9 +850,15 @@ class AudioCallback(AudioStreamTrack):
                     False,
                     self.event_handler.output_sample_rate,
                     self.event_handler.output_frame_size,
+                    wait_for_output=self.event_handler.wait_for_output,
+                    output_layout=self.event_handler.output_layout,
+                    reply_token=lambda: self.reply_token,
+                    output_codec=lambda: self.output_codec,
+                    executor=self.executor,
                 )
             )
             self.decode_task.add_done_callback(lambda _: logger.debug("decode_done"))
+            self._loop = loop
             self.has_started = True
 
     async def recv(self):  # type: ignore
@@ -534,12 +872,28 @@ class AudioCallback(AudioStreamTrack):
                 current_channel.set(self.event_handler.channel)
             await self.start()
 
+            if self.jitter_buffer is not None:
+                frame = await self.jitter_buffer.get()
+            else:
+                frame = await self._next_paced_frame()
+            self._track_playout(frame)
+            return frame
+        except Exception as e:
+            logger.debug("exception %s", e)
+            exec = traceback.format_exc()
+            logger.debug("traceback %s", exec)
+
+    async def _next_paced_frame(self) -> av.AudioFrame | av.Packet:
+        clock = get_pacing_clock()
+        while True:
             frame = await self.queue.get()
             logger.debug("frame %s", frame)
+            if is_cancelled(frame):
+                continue
 
-            data_time = frame.time
+            data_time = frame_time(frame)
 
-            if time.time() - self.last_timestamp > 10 * (
+            if clock.now() - self.last_timestamp > 10 * (
                 self.event_handler.output_frame_size
                 / self.event_handler.output_sample_rate
             ):
@@ -547,20 +901,35 @@ class AudioCallback(AudioStreamTrack):
 
             # control playback rate
             if self._start is None:
-                self._start = time.time() - data_time  # type: ignore
+                self._start = clock.now() - data_time  # type: ignore
             else:
-                wait = self._start + data_time - time.time()
-                await asyncio.sleep(wait)
-            self.last_timestamp = time.time()
+                await clock.wait_until(self._start + data_time, self.pacing_stats)
+            if is_cancelled(frame):
+                # Interrupted while waiting for its deadline
+                continue
+            self.last_timestamp = clock.now()
             return frame
-        except Exception as e:
-            logger.debug("exception %s", e)
-            exec = traceback.format_exc()
-            logger.debug("traceback %s", exec)
+
+    def _track_playout(self, frame: av.AudioFrame | av.Packet | None):
+        if frame is None:
+            return
+        self._playout_end = get_pacing_clock().now() + float(
+            frame_samples(frame) * frame.time_base
+        )
+        if self._pending_interrupt is not None and frame is self._pending_interrupt[1]:
+            # The last frame of a fade-out
+            token = self._pending_interrupt[0]
+            self.interrupt_stats.record(
+                self._playout_end - cast(float, token.cancelled_at)
+            )
+            self._pending_interrupt = None
 
     def stop(self):
         logger.debug("audio callback stop")
         self.thread_quit.set()
+        if self.has_started:
+            # The decode task may be waiting for room in a bounded queue
+            self.decode_task.cancel()
         super().stop()
 
 
@@ -576,17 +945,19 @@ class ServerToClientVideo(VideoStreamTrack):
         event_handler: Callable,
         channel: DataChannel | None = None,
         set_additional_outputs: Callable | None = None,
+        output_pixel_format: str = "bgr24",
     ) -> None:
         super().__init__()  # don't forget this!
         self.event_handler = event_handler
+        self.output_pixel_format = output_pixel_format
         self.args_set = asyncio.Event()
         self.latest_args: str | list[Any] = "not_set"
         self.generator: Generator[Any, None, Any] | None = None
         self.channel = channel
         self.set_additional_outputs = set_additional_outputs
 
-    def array_to_frame(self, array: np.ndarray) -> VideoFrame:
-        return VideoFrame.from_ndarray(array, format="bgr24")
+    def array_to_frame(self, array: np.ndarray | VideoFrame) -> VideoFrame:
+        return array_to_video_frame(array, self.output_pixel_format)
 
     def set_channel(self, channel: DataChannel):
         self.channel = channel
@@ -639,19 +1010,30 @@ class ServerToClientAudio(AudioStreamTrack):
         event_handler: Callable,
         channel: DataChannel | None = None,
         set_additional_outputs: Callable | None = None,
+        executor: Executor | None = None,
+        output_buffer_ms: float | None = None,
+        prefetch: int = 0,
     ) -> None:
-        self.generator: Generator[Any, None, Any] | None = None
+        self.executor = executor
+        self.prefetch = prefetch
+        self.prefetch_stats = PrefetchStats()
+        self.generator: Generator[Any, None, Any] | PrefetchGenerator | None = None
         self.event_handler = event_handler
         self.event_handler._clear_queue = self.clear_queue
         self.current_timestamp = 0
         self.latest_args: str | list[Any] = "not_set"
         self.args_set = threading.Event()
-        self.queue = asyncio.Queue()
+        self.queue = asyncio.Queue(
+            audio_queue_size(output_buffer_ms, 48000, int(48000 * AUDIO_PTIME))
+        )
         self.thread_quit = asyncio.Event()
         self.channel = channel
         self.set_additional_outputs = set_additional_outputs
         self.has_started = False
         self._start: float | None = None
+        self.pacing_stats = PacingStats()
+        # MIME type of the codec negotiated for sending, set with the answer
+        self.output_codec: str | None = None
         super().__init__()
 
     def clear_queue(self):
@@ -671,6 +1053,10 @@ class ServerToClientAudio(AudioStreamTrack):
         current_channel.set(self.channel)
         if self.generator is None:
             self.generator = self.event_handler(*self.latest_args)
+            if self.prefetch and self.generator is not None:
+                self.generator = PrefetchGenerator(
+                    self.generator, self.prefetch, self.prefetch_stats
+                )
         if self.generator is not None:
             try:
                 frame = next(self.generator)
@@ -681,8 +1067,8 @@ class ServerToClientAudio(AudioStreamTrack):
     async def start(self):
         if not self.has_started:
             loop = asyncio.get_running_loop()
-            callable = functools.partial(loop.run_in_executor, None, self.next)
-            asyncio.create_task(
+            callable = functools.partial(loop.run_in_executor, self.executor, self.next)
+            self.decode_task = asyncio.create_task(
                 player_worker_decode(
                     callable,
                     self.queue,
@@ -690,6 +1076,8 @@ class ServerToClientAudio(AudioStreamTrack):
                     lambda: self.channel,
                     self.set_additional_outputs,
                     True,
+                    output_codec=lambda: self.output_codec,
+                    executor=self.executor,
                 )
             )
             self.has_started = True
@@ -705,15 +1093,15 @@ class ServerToClientAudio(AudioStreamTrack):
                 self.stop()
                 return
 
-            data_time = data.time
+            data_time = frame_time(data)
 
             # control playback rate
             if data_time is not None:
+                clock = get_pacing_clock()
                 if self._start is None:
-                    self._start = time.time() - data_time  # type: ignore
+                    self._start = clock.now() - data_time  # type: ignore
                 else:
-                    wait = self._start + data_time - time.time()
-                    await asyncio.sleep(wait)
+                    await clock.wait_until(self._start + data_time, self.pacing_stats)
 
             return data
         except Exception as e:
@@ -728,4 +1116,8 @@ class ServerToClientAudio(AudioStreamTrack):
     def stop(self):
         logger.debug("audio-to-client stop callback")
         self.thread_quit.set()
+        if self.has_started:
+            self.decode_task.cancel()
+        if isinstance(self.generator, PrefetchGenerator):
+            self.generator.close()
         super().stop()
@@ -5,16 +5,32 @@ import inspect
 import io
 import json
 import logging
+import math
+import queue
 import tempfile
+import threading
+import time
 import traceback
-from contextvars import ContextVar
-from typing import Any, Callable, Literal, Protocol, TypedDict, cast
+from collections.abc import Awaitable, Callable, Generator
+from concurrent.futures import Executor
+from contextvars import ContextVar, copy_context
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Literal,
+    Protocol,
+    TypedDict,
+    cast,
+)
 
 import av
 import numpy as np
-from numpy.typing import NDArray
+from numpy.typing import DTypeLike, NDArray
 from pydub import AudioSegment
 
+from .decoder import AudioStreamDecoder, EncodedAudio
+from .interruption import CancellationToken
+
 logger = logging.getLogger(__name__)
 
 
@@ -24,7 +40,8 @@ AUDIO_PTIME = 0.020
 class Message(TypedDict):
     type: str
     data: Any
-    
+
+
 class AudioChunk(TypedDict):
     start: int
     end: int
@@ -35,6 +52,27 @@ class AdditionalOutputs:
         self.args = args
 
 
+@dataclass
+class OpusPacket:
+    """
+    An Opus encoded packet that is sent to the client without being re-encoded.
+
+    Handlers can yield a single packet or a list of packets. Browsers use the
+    Opus codec by default. If the peer negotiated another codec, the packets are
+    decoded and re-encoded like any other audio.
+
+    Parameters
+    ----------
+    data : bytes
+        The encoded packet, without any container framing
+    duration : float
+        Duration in seconds of the audio in the packet
+    """
+
+    data: bytes
+    duration: float = AUDIO_PTIME
+
+
 class DataChannel(Protocol):
     def send(self, message: str) -> None: ...
 
@@ -120,6 +158,46 @@ def split_output(data: tuple | Any) -> tuple[Any, AdditionalOutputs | None]:
     return data, None
 
 
+def frame_samples(frame: av.AudioFrame | av.Packet) -> int:
+    """Duration of an output frame or packet, in units of its time base."""
+    if isinstance(frame, av.Packet):
+        return frame.duration
+    return frame.samples
+
+
+def frame_time(frame: av.AudioFrame | av.Packet) -> float | None:
+    """Presentation time in seconds of an output frame or packet."""
+    if frame.pts is None or frame.time_base is None:
+        return None
+    return float(frame.pts * frame.time_base)
+
+
+def _split_frames(
+    audio_array: np.ndarray,
+    layout: str,
+    output_layout: str,
+    frame_size: int,
+) -> list[np.ndarray] | None:
+    """Cut a packed int16 array into frames of `frame_size` samples.
+
+    Returns None when the array is not already in the output format and has to go
+    through a resampler. Channel conversion is left to the resampler so that the
+    output level does not depend on which path a chunk takes.
+    """
+    if audio_array.dtype != np.int16 or layout != output_layout:
+        return None
+    if audio_array.ndim == 2 and audio_array.shape[0] != 1:
+        return None
+    audio_array = audio_array.reshape(-1)
+    step = frame_size * (2 if layout == "stereo" else 1)
+    if audio_array.size % step:
+        return None
+    return [
+        audio_array[i : i + step].reshape(1, -1)
+        for i in range(0, audio_array.size, step)
+    ]
+
+
 async def player_worker_decode(
     next_frame: Callable,
     queue: asyncio.Queue,
@@ -129,18 +207,83 @@ async def player_worker_decode(
     quit_on_none: bool = False,
     sample_rate: int = 48000,
     frame_size: int = int(48000 * AUDIO_PTIME),
+    wait_for_output: Callable[[], Awaitable[None]] | None = None,
+    output_layout: Literal["mono", "stereo"] = "stereo",
+    reply_token: Callable[[], CancellationToken] | None = None,
+    output_codec: Callable[[], str | None] | None = None,
+    executor: Executor | None = None,
 ):
     audio_samples = 0
     audio_time_base = fractions.Fraction(1, sample_rate)
-    audio_resampler = av.AudioResampler(  # type: ignore
-        format="s16",
-        layout="stereo",
-        rate=sample_rate,
-        frame_size=frame_size,
-    )
+    audio_resampler = None
+    resampler_input = None
+    decoder = AudioStreamDecoder()
+    loop = asyncio.get_running_loop()
+    token: CancellationToken | None = None
+
+    def flush_resampler() -> list[av.AudioFrame]:
+        # Samples still held by the resampler from a previous chunk are played
+        # before audio that bypasses it
+        nonlocal audio_resampler
+        if audio_resampler is None:
+            return []
+        frames = audio_resampler.resample(None)
+        audio_resampler = None
+        return frames
+
+    def resample(frame: av.AudioFrame) -> list[av.AudioFrame]:
+        nonlocal audio_resampler, resampler_input
+        frame_input = (frame.format.name, frame.layout.name, frame.sample_rate)
+        frames = []
+        if audio_resampler is not None and frame_input != resampler_input:
+            # A resampler only accepts frames matching the first one it was given
+            frames = flush_resampler()
+        if audio_resampler is None:
+            audio_resampler = av.AudioResampler(  # type: ignore
+                format="s16",
+                layout=output_layout,
+                rate=sample_rate,
+                frame_size=frame_size,
+            )
+            resampler_input = frame_input
+        return frames + audio_resampler.resample(frame)
+
+    async def flush_decoder() -> list[av.AudioFrame]:
+        # End of an encoded stream, e.g. the last mp3 frame held by the parser
+        if not decoder.is_active:
+            return []
+        decoded = await loop.run_in_executor(executor, decoder.flush)
+        return [f for decoded_frame in decoded for f in resample(decoded_frame)]
+
+    def interrupted() -> bool:
+        # Audio still held by the resampler or decoder belongs to the
+        # interrupted reply and must not leak into the next one
+        nonlocal audio_resampler
+        if token is None or not token.cancelled:
+            return False
+        audio_resampler = None
+        decoder.reset()
+        return True
+
+    async def put_frames(frames: list[av.AudioFrame | av.Packet]):
+        nonlocal audio_samples
+        for processed_frame in frames:
+            if interrupted():
+                return
+            processed_frame.pts = audio_samples
+            processed_frame.time_base = audio_time_base
+            if token is not None:
+                token.mark(processed_frame)
+            audio_samples += frame_samples(processed_frame)
+            await queue.put(processed_frame)
 
     while not thread_quit.is_set():
         try:
+            if wait_for_output is not None:
+                # Idle handlers are not polled until they have something to emit
+                await wait_for_output()
+            interrupted()
+            token = reply_token() if reply_token is not None else None
             # Get next frame
             frame, outputs = split_output(
                 await asyncio.wait_for(next_frame(), timeout=60)
@@ -154,48 +297,107 @@ async def player_worker_decode(
                 set_additional_outputs(outputs)
                 cast(DataChannel, channel()).send(create_message("fetch_output", []))
 
+            if frame is not None and interrupted():
+                # The reply was interrupted while this chunk was being produced
+                continue
+
             if frame is None:
+                await put_frames(await flush_decoder())
                 if quit_on_none:
+                    await put_frames(flush_resampler())
                     await queue.put(None)
                     break
                 continue
 
+            if isinstance(frame, EncodedAudio):
+                # The codec context persists across chunks and decoding runs
+                # off the event loop
+                decoded = await loop.run_in_executor(executor, decoder.decode, frame)
+                await put_frames(
+                    [f for decoded_frame in decoded for f in resample(decoded_frame)]
+                )
+                continue
+            if isinstance(frame, OpusPacket) or (
+                isinstance(frame, list) and frame and isinstance(frame[0], OpusPacket)
+            ):
+                codec = output_codec() if output_codec is not None else None
+                if codec is not None and codec.lower() != "audio/opus":
+                    # The encoder of another codec, e.g. PCMU, would send the
+                    # Opus bytes as its own samples
+                    pending = await flush_decoder() if decoder.format != "opus" else []
+                    packets = [frame] if isinstance(frame, OpusPacket) else frame
+                    decoded = await loop.run_in_executor(
+                        executor, decoder.decode_opus, [p.data for p in packets]
+                    )
+                    pending += [f for d in decoded for f in resample(d)]
+                    await put_frames(pending)
+                    continue
+
+            pending = await flush_decoder()
+
+            if isinstance(frame, OpusPacket) or (
+                isinstance(frame, list) and frame and isinstance(frame[0], OpusPacket)
+            ):
+                # Pre-encoded audio is packetized by aiortc as is
+                processed_frames = pending + flush_resampler()
+                for opus_packet in [frame] if isinstance(frame, OpusPacket) else frame:
+                    packet = av.Packet(opus_packet.data)
+                    packet.time_base = audio_time_base
+                    packet.duration = round(opus_packet.duration * sample_rate)
+                    processed_frames.append(packet)
+                await put_frames(processed_frames)
+                continue
+
             if not isinstance(frame, tuple) and not isinstance(frame[1], np.ndarray):
                 raise WebRTCError(
                     "The frame must be a tuple containing a sample rate and a numpy array."
                 )
 
             if len(frame) == 2:
-                sample_rate, audio_array = frame
+                frame_rate, audio_array = frame
                 layout = "mono"
             elif len(frame) == 3:
-                sample_rate, audio_array, layout = frame
+                frame_rate, audio_array, layout = frame
 
             logger.debug(
                 "received array with shape %s sample rate %s layout %s",
                 audio_array.shape,  # type: ignore
-                sample_rate,
+                frame_rate,
                 layout,  # type: ignore
             )
-            format = "s16" if audio_array.dtype == "int16" else "fltp"  # type: ignore
 
-            if audio_array.ndim == 1:
-                audio_array = audio_array.reshape(1, -1)
-
-            # Convert to audio frame and resample
-            # This runs in the same timeout context
-            frame = av.AudioFrame.from_ndarray(  # type: ignore
-                audio_array,  # type: ignore
-                format=format,
-                layout=layout,  # type: ignore
+            chunks = (
+                _split_frames(audio_array, layout, output_layout, frame_size)  # type: ignore
+                if frame_rate == sample_rate
+                else None
             )
-            frame.sample_rate = sample_rate
+            if chunks is not None:
+                # Already in the output format, so frames are cut straight
+                # from the array
+                processed_frames = pending + flush_resampler()
+                for chunk in chunks:
+                    processed_frame = av.AudioFrame.from_ndarray(  # type: ignore
+                        chunk, format="s16", layout=output_layout
+                    )
+                    processed_frame.sample_rate = sample_rate
+                    processed_frames.append(processed_frame)
+            else:
+                format = "s16" if audio_array.dtype == "int16" else "fltp"  # type: ignore
 
-            for processed_frame in audio_resampler.resample(frame):
-                processed_frame.pts = audio_samples
-                processed_frame.time_base = audio_time_base
-                audio_samples += processed_frame.samples
-                await queue.put(processed_frame)
+                if audio_array.ndim == 1:
+                    audio_array = audio_array.reshape(1, -1)
+
+                # Convert to audio frame and resample
+                # This runs in the same timeout context
+                frame = av.AudioFrame.from_ndarray(  # type: ignore
+                    audio_array,  # type: ignore
+                    format=format,
+                    layout=layout,  # type: ignore
+                )
+                frame.sample_rate = frame_rate
+                processed_frames = pending + resample(frame)
+
+            await put_frames(processed_frames)
 
         except (TimeoutError, asyncio.TimeoutError):
             logger.warning(
@@ -214,6 +416,419 @@ async def player_worker_decode(
                 continue
 
 
+def audio_queue_size(buffer_ms: float | None, sample_rate: int, frame_size: int) -> int:
+    """
+    Number of frames of `frame_size` samples needed to hold `buffer_ms` of audio.
+
+    Used as the `maxsize` of the queue between `player_worker_decode` and `recv`,
+    so 0 (unbounded) is returned when `buffer_ms` is None.
+    """
+    if buffer_ms is None:
+        return 0
+    if buffer_ms <= 0:
+        raise ValueError("output_buffer_ms must be positive")
+    return max(1, math.ceil(buffer_ms / 1000 * sample_rate / frame_size))
+
+
+@dataclass
+class PrefetchStats:
+    """
+    Counters of a `PrefetchGenerator`.
+
+    Attributes:
+      chunks: Chunks handed to the consumer.
+      underruns: Times the consumer had to wait for the generator after the first chunk.
+      underrun_time: Total seconds spent waiting in those underruns.
+    """
+
+    chunks: int = 0
+    underruns: int = 0
+    underrun_time: float = 0.0
+
+
+class _PrefetchError:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+_PREFETCH_DONE = object()
+
+
+class PrefetchGenerator:
+    """
+    Runs a sync generator in a worker thread, up to `max_prefetch` chunks ahead.
+
+    Slow steps of the generator (an LLM token, a TTS request) then overlap with
+    playback of the previous chunks instead of adding up. `close` cancels the
+    generator: queued chunks are dropped and the generator is closed in the worker
+    as soon as its current step returns.
+
+    Parameters
+    ----------
+    generator : Generator
+        The generator to run ahead
+    max_prefetch : int
+        Maximum number of chunks produced but not yet consumed
+    stats : PrefetchStats | None
+        Counters to update, e.g. to aggregate over several replies
+    """
+
+    def __init__(
+        self,
+        generator: Generator[Any, None, Any],
+        max_prefetch: int,
+        stats: PrefetchStats | None = None,
+    ):
+        if max_prefetch < 1:
+            raise ValueError("max_prefetch must be at least 1")
+        self.generator = generator
+        self.stats = stats if stats is not None else PrefetchStats()
+        self._items: queue.SimpleQueue = queue.SimpleQueue()
+        self._slots = threading.Semaphore(max_prefetch)
+        self._cancelled = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._finished = False
+
+    def _produce(self):
+        end: object = _PREFETCH_DONE
+        try:
+            while True:
+                self._slots.acquire()
+                if self._cancelled.is_set():
+                    break
+                try:
+                    item = next(self.generator)
+                except StopIteration:
+                    break
+                except Exception as e:  # noqa: BLE001 - raised again in the consumer
+                    end = _PrefetchError(e)
+                    break
+                self._items.put(item)
+        finally:
+            # Also reached when a BaseException ends the thread, so the consumer
+            # is never left waiting for a chunk that will not come
+            self._items.put(end)
+            self.generator.close()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._finished:
+            raise StopIteration
+        if self._thread is None:
+            # The generator inherits the context, e.g. the current data channel
+            context = copy_context()
+            self._thread = threading.Thread(
+                target=context.run, args=(self._produce,), daemon=True
+            )
+            self._thread.start()
+        try:
+            item = self._items.get_nowait()
+        except queue.Empty:
+            start = time.monotonic()
+            item = self._items.get()
+            if self.stats.chunks:
+                self.stats.underruns += 1
+                self.stats.underrun_time += time.monotonic() - start
+        self._slots.release()
+        if item is _PREFETCH_DONE or isinstance(item, _PrefetchError):
+            self._finished = True
+            if isinstance(item, _PrefetchError):
+                raise item.error
+            raise StopIteration
+        self.stats.chunks += 1
+        return item
+
+    def close(self):
+        """Stop the generator and drop the chunks produced so far."""
+        self._finished = True
+        self._cancelled.set()
+        # Wake up the worker if it is waiting for a free slot
+        self._slots.release()
+
+
+class AudioAccumulator:
+    """
+    Preallocated buffer that audio chunks are appended to.
+
+    Storage grows by doubling, so appending n samples costs amortized O(n) instead
+    of the O(n²) of repeated `np.concatenate`. When `max_samples` is set the buffer
+    only keeps the most recent `max_samples` samples (ring-buffer mode), which is
+    useful for fixed-size windows.
+
+    Parameters
+    ----------
+    max_samples : int | None
+        If set, only the most recent max_samples samples are kept
+    dtype : DTypeLike | None
+        Data type of the stored samples. Defaults to the data type of the first
+        appended chunk.
+    capacity : int
+        Initial number of samples to allocate
+
+    Example
+    -------
+    >>> acc = AudioAccumulator()
+    >>> acc.append(np.zeros(960, dtype=np.int16))
+    >>> last_20ms = acc.tail(960)  # view, no copy
+    >>> utterance = acc.to_array()  # single copy
+    """
+
+    def __init__(
+        self,
+        max_samples: int | None = None,
+        dtype: DTypeLike | None = None,
+        capacity: int = 48000,
+    ) -> None:
+        self.max_samples = max_samples
+        self.dtype = np.dtype(dtype) if dtype is not None else None
+        if max_samples is not None:
+            # Twice the window so the kept samples can be moved back to the
+            # start of the buffer in one copy per max_samples appended.
+            capacity = 2 * max_samples
+        self._capacity = max(capacity, 1)
+        self._data: np.ndarray | None = None
+        self._start = 0
+        self._end = 0
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def _reserve(self, n: int) -> np.ndarray:
+        if self._data is None:
+            self._data = np.empty(self._capacity, dtype=self.dtype)
+        if self._end + n <= len(self._data):
+            return self._data
+        size = len(self)
+        if self.max_samples is None:
+            new_capacity = len(self._data)
+            while new_capacity < size + n:
+                new_capacity *= 2
+            new_data = np.empty(new_capacity, dtype=self.dtype)
+            new_data[:size] = self._data[self._start : self._end]
+            self._data = new_data
+        else:
+            self._data[:size] = self._data[self._start : self._end]
+        self._start, self._end = 0, size
+        return self._data
+
+    def append(self, audio: np.ndarray) -> None:
+        """Append a chunk of audio. Multi-dimensional chunks are flattened."""
+        audio = np.asarray(audio).reshape(-1)
+        if self.dtype is None:
+            self.dtype = audio.dtype
+        if self.max_samples is not None and len(audio) >= self.max_samples:
+            self.clear()
+            audio = audio[-self.max_samples :]
+        data = self._reserve(len(audio))
+        data[self._end : self._end + len(audio)] = audio
+        self._end += len(audio)
+        if self.max_samples is not None and len(self) > self.max_samples:
+            self._start = self._end - self.max_samples
+
+    def view(self) -> np.ndarray:
+        """Read-only view of the buffered audio. Valid until the next append."""
+        if self._data is None:
+            return np.zeros(0, dtype=self.dtype or np.int16)
+        view = self._data[self._start : self._end]
+        view.flags.writeable = False
+        return view
+
+    def tail(self, n: int) -> np.ndarray:
+        """Read-only view of the last n samples. Valid until the next append."""
+        view = self.view()
+        return view[max(len(view) - n, 0) :]
+
+    def to_array(self) -> np.ndarray:
+        """Copy of the buffered audio that stays valid after further appends."""
+        return self.view().copy()
+
+    def clear(self) -> None:
+        self._start = self._end = 0
+
+
+class InputAggregator:
+    """
+    Joins input frames into chunks of a fixed duration.
+
+    Frames are copied into a preallocated chunk. A full chunk is handed out as is
+    and a new one is allocated, so each sample is copied only once. Chunks have
+    the shape of the frames, e.g. `(1, n)` for the frames of an audio track.
+
+    Parameters
+    ----------
+    chunk_duration : float
+        Duration of a chunk in seconds
+    channels : int
+        Number of interleaved channels of the frames
+
+    Example
+    -------
+    >>> aggregator = InputAggregator(0.6)
+    >>> chunks = aggregator.push(48000, np.zeros((1, 960), dtype=np.int16))
+    >>> len(chunks)  # 29 more frames are needed to fill a chunk
+    0
+    """
+
+    def __init__(self, chunk_duration: float, channels: int = 1) -> None:
+        self.chunk_duration = chunk_duration
+        self.channels = channels
+        self._chunk: np.ndarray | None = None
+        self._filled = 0
+        self._format: tuple[int, np.dtype, int] | None = None
+
+    def reset(self) -> None:
+        """Drop the partially filled chunk."""
+        self._chunk = None
+        self._filled = 0
+
+    def push(self, sample_rate: int, frame: np.ndarray) -> list[tuple[int, np.ndarray]]:
+        """Add a frame. Returns the chunks it completed, usually none or one."""
+        data = frame.reshape(-1)
+        format = (sample_rate, data.dtype, frame.ndim)
+        if format != self._format:
+            # Samples of a different rate or type cannot share a chunk
+            self.reset()
+            self._format = format
+        size = max(1, round(self.chunk_duration * sample_rate)) * self.channels
+        chunks = []
+        while len(data):
+            if self._chunk is None:
+                self._chunk = np.empty(
+                    (1, size) if frame.ndim == 2 else size, dtype=data.dtype
+                )
+                self._filled = 0
+            n = min(size - self._filled, len(data))
+            self._chunk.reshape(-1)[self._filled : self._filled + n] = data[:n]
+            self._filled += n
+            data = data[n:]
+            if self._filled == size:
+                chunks.append((sample_rate, self._chunk))
+                self._chunk = None
+        return chunks
+
+
+_PACKED_SAMPLE_DTYPES = {"s16": np.int16, "s32": np.int32, "flt": np.float32}
+
+
+def audio_frame_view(frame: av.AudioFrame) -> np.ndarray:
+    """
+    Read-only array of the samples of an audio frame, without copying them.
+
+    The array has the `(1, samples * channels)` shape of `frame.to_ndarray()` and
+    keeps the frame alive. Planar frames are copied with `to_ndarray()`.
+    """
+    dtype = _PACKED_SAMPLE_DTYPES.get(frame.format.name)
+    if dtype is None:
+        return frame.to_ndarray()
+    view = np.frombuffer(
+        frame.planes[0],
+        dtype=dtype,
+        count=frame.samples * len(frame.layout.channels),
+    ).reshape(1, -1)
+    view.flags.writeable = False
+    return view
+
+
+class FramePool:
+    """
+    Recycles the arrays that video frames are converted into.
+
+    An array returned by `acquire` must not be used after it was passed to
+    `release`.
+
+    Parameters
+    ----------
+    max_arrays : int
+        Number of released arrays kept for reuse, per shape
+    """
+
+    def __init__(self, max_arrays: int = 4) -> None:
+        self.max_arrays = max_arrays
+        self._free: dict[tuple[tuple[int, ...], np.dtype], list[np.ndarray]] = {}
+        self._leased: dict[int, np.ndarray] = {}
+
+    def acquire(self, shape: tuple[int, ...], dtype: DTypeLike) -> np.ndarray:
+        free = self._free.get((shape, np.dtype(dtype)))
+        array = free.pop() if free else np.empty(shape, dtype=dtype)
+        array.flags.writeable = True
+        self._leased[id(array)] = array
+        return array
+
+    def release(self, array: np.ndarray) -> None:
+        """Return an array to the pool. Arrays that were not acquired are ignored."""
+        if self._leased.pop(id(array), None) is None:
+            return
+        free = self._free.setdefault((array.shape, array.dtype), [])
+        if len(free) < self.max_arrays:
+            free.append(array)
+
+
+# Packed 8-bit pixel formats and their number of channels
+PACKED_VIDEO_FORMATS = {
+    "bgr24": 3,
+    "rgb24": 3,
+    "bgra": 4,
+    "rgba": 4,
+    "gray": 1,
+    "gray8": 1,
+}
+
+
+def video_frame_view(
+    frame: av.VideoFrame,
+    pool: FramePool | None = None,
+    format: str = "bgr24",
+    width: int | None = None,
+    height: int | None = None,
+) -> np.ndarray:
+    """
+    Read-only array of a video frame in a packed pixel format.
+
+    Frames in another pixel format or size are converted and scaled in a single
+    step, and the array is a view of the converted frame instead of a copy of it.
+    When rows of the frame are padded the view is strided, unless a `pool` is
+    given, in which case the rows are packed into an array from the pool.
+    Grayscale frames are returned as 2D arrays.
+    """
+    channels = PACKED_VIDEO_FORMATS[format]
+    if (
+        frame.format.name != av.VideoFormat(format).name
+        or (width is not None and width != frame.width)
+        or (height is not None and height != frame.height)
+    ):
+        frame = frame.reformat(format=format, width=width, height=height)
+    plane = frame.planes[0]
+    shape: tuple[int, ...] = (frame.height, frame.width, channels)
+    strides: tuple[int, ...] = (plane.line_size, channels, 1)
+    if channels == 1:
+        shape, strides = shape[:2], strides[:2]
+    view = np.ndarray(shape, dtype=np.uint8, buffer=plane, strides=strides)
+    if pool is not None and plane.line_size != frame.width * channels:
+        array = pool.acquire(shape, np.uint8)
+        np.copyto(array, view)
+        view = array
+    view.flags.writeable = False
+    return view
+
+
+def array_to_video_frame(
+    array: np.ndarray | av.VideoFrame, format: str = "bgr24"
+) -> av.VideoFrame:
+    """
+    Video frame of a handler output in pixel format `format`.
+
+    Frames are passed through untouched, so handlers can return frames in any
+    pixel format. Returning `yuv420p` avoids a color conversion in the encoder;
+    such arrays are the stacked planes of shape (height * 3 / 2, width), as
+    produced by `cv2.cvtColor(image, cv2.COLOR_BGR2YUV_I420)`.
+    """
+    if isinstance(array, av.VideoFrame):
+        return array
+    return av.VideoFrame.from_ndarray(array, format=format)
+
+
 def audio_to_bytes(audio: tuple[int, NDArray[np.int16 | np.float32]]) -> bytes:
     """
     Convert an audio tuple containing sample rate and numpy array data into bytes.
@@ -447,10 +1062,11 @@ async def wait_for_item(queue: asyncio.Queue, timeout: float = 0.1) -> Any:
     except (TimeoutError, asyncio.TimeoutError):
         return None
 
+
 def parse_json_safely(str: str):
     try:
         result = json.loads(str)
         return result, None
     except json.JSONDecodeError as e:
         print(f"JSON解析错误: {e.msg}")
-        return None, e
\ No newline at end of file
+        return None, e
@@ -0,0 +1,529 @@
+"""Running video handlers off the event loop."""
+
+from __future__ import annotations
+
+import atexit
+import functools
+import logging
+import multiprocessing
+import os
+import pickle
+import queue
+import shutil
+import threading
+import time
+from collections.abc import Callable, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from multiprocessing.connection import Connection, wait
+from multiprocessing.process import BaseProcess
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, cast
+
+import numpy as np
+from av import VideoFrame
+
+from fastrtc.utils import split_output
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class VideoStats:
+    """Frames handled by the video handler of one track.
+
+    Attributes:
+      processed: Frames passed to the handler.
+      dropped: Frames replaced by a newer frame before the handler was free.
+      skipped: Frames discarded on arrival to stay under the maximum input frame rate.
+      mean_processing_time: Mean time in seconds the handler took per frame.
+      max_processing_time: Longest time in seconds the handler took for a frame.
+    """
+
+    processed: int = 0
+    dropped: int = 0
+    skipped: int = 0
+    mean_processing_time: float = 0.0
+    max_processing_time: float = 0.0
+
+    def record(self, processing_time: float):
+        self.processed += 1
+        self.mean_processing_time += (
+            processing_time - self.mean_processing_time
+        ) / self.processed
+        self.max_processing_time = max(self.max_processing_time, processing_time)
+
+
+@lru_cache
+def get_video_executor() -> ThreadPoolExecutor:
+    """Executor shared by all video handlers that are not given their own.
+
+    It is separate from the default executor, so slow video models cannot hold
+    up the threads that audio handlers run in.
+    """
+    return ThreadPoolExecutor(thread_name_prefix="fastrtc-video")
+
+
+class FrameRateLimiter:
+    """Accepts at most `max_fps` frames per second of a video track.
+
+    Frames are spaced by their presentation timestamps, so a burst of frames
+    delivered late is thinned out the same way as frames arriving on time.
+    Frames without a timestamp are spaced by their arrival time.
+    """
+
+    def __init__(self, max_fps: float):
+        if max_fps <= 0:
+            raise ValueError("max_fps must be positive")
+        self.interval = 1 / max_fps
+        self._next: float | None = None
+
+    def accept(self, frame: VideoFrame) -> bool:
+        t = frame.time if frame.time is not None else time.monotonic()
+        if self._next is not None and self._next - self.interval <= t < self._next:
+            return False
+        # Keep a steady cadence, unless the track paused for longer than an
+        # interval or its timestamps jumped back
+        if self._next is None or not 0 <= t - self._next < self.interval:
+            self._next = t
+        self._next += self.interval
+        return True
+
+
+@dataclass
+class _BatchRequest:
+    frame: np.ndarray
+    future: Future = field(default_factory=Future)
+
+
+class VideoBatcher:
+    """Batches frames submitted by the video handlers of many connections into one model call.
+
+    Handlers submit a frame and wait for its result. A worker thread collects the
+    pending frames for up to `max_wait_ms` (or until `max_batch_size` frames are
+    waiting), stacks frames of the same shape and dtype, runs the model once and
+    hands every handler back its own result.
+
+    A frame that finds no other frame waiting is run at once unless the previous
+    batch had several frames, so a single connection never waits and `max_wait_ms`
+    is only added to the latency of frames while several connections are sending.
+
+    Args:
+      run: Function running the model on a batch: it receives the frames stacked
+        along a new first axis and returns a sequence with one result per frame.
+      max_batch_size: Maximum number of frames in one model call.
+      max_wait_ms: Maximum time a frame waits for other frames to join its batch.
+    """
+
+    def __init__(
+        self,
+        run: Callable[[np.ndarray], Sequence[Any]],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 5.0,
+    ):
+        self.run = run
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.n_batches = 0
+        self.n_frames = 0
+        self._queue: queue.SimpleQueue[_BatchRequest | None] = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        # Whether the last batch had frames from several callers
+        self._concurrent = False
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.n_frames / self.n_batches if self.n_batches else 0.0
+
+    def start(self):
+        with self._lock:
+            if not self.is_running:
+                self._thread = threading.Thread(
+                    target=self._worker, name="video-batcher", daemon=True
+                )
+                self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            if self._thread is not None:
+                self._queue.put(None)
+                self._thread.join()
+                self._thread = None
+
+    def submit(self, frame: np.ndarray) -> Future:
+        """Queue a frame. The future resolves to the result of the model for it.
+
+        The worker is started on the first call. The frame is copied into the
+        batch before the future resolves, so it may be reused afterwards.
+        """
+        self.start()
+        request = _BatchRequest(frame)
+        self._queue.put(request)
+        return request.future
+
+    def __call__(self, frame: np.ndarray) -> Any:
+        """Run the model on a frame as part of a batch, blocking until it is done.
+
+        Meant for sync handlers, which run in a worker thread. Async handlers can
+        await `asyncio.wrap_future(batcher.submit(frame))` instead.
+        """
+        return self.submit(frame).result()
+
+    def _collect(self, first: _BatchRequest) -> tuple[list[_BatchRequest], bool]:
+        batch = [first]
+        # Frames that are already queued join without waiting
+        while len(batch) < self.max_batch_size:
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                return batch, True
+            batch.append(request)
+        if len(batch) == 1 and not self._concurrent:
+            return batch, False
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is None:
+                return batch, True
+            batch.append(request)
+        return batch, False
+
+    def _run_group(self, group: list[_BatchRequest]):
+        try:
+            results = self.run(np.stack([r.frame for r in group]))
+            if len(results) != len(group):
+                raise ValueError(
+                    f"The model returned {len(results)} results for a batch of {len(group)} frames."
+                )
+        except Exception as e:  # noqa: BLE001 - raised again in every waiting caller
+            for request in group:
+                request.future.set_exception(e)
+            return
+        self.n_batches += 1
+        self.n_frames += len(group)
+        for request, result in zip(group, results):
+            request.future.set_result(result)
+
+    def _worker(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch, quit = self._collect(first)
+            self._concurrent = len(batch) > 1
+            groups: dict[tuple[tuple[int, ...], np.dtype], list[_BatchRequest]] = {}
+            for request in batch:
+                key = (request.frame.shape, request.frame.dtype)
+                groups.setdefault(key, []).append(request)
+            for group in groups.values():
+                self._run_group(group)
+            logger.debug("Video batch of %d frames", len(batch))
+            if quit:
+                return
+
+
+# An array passed between processes is sent as ("slot", shape, dtype) when it was
+# written to the shared memory slot, and as is otherwise
+
+
+def _to_slot(buf: memoryview, offset: int, size: int, array: Any) -> Any:
+    if not isinstance(array, np.ndarray) or array.nbytes > size:
+        return array
+    np.copyto(np.ndarray(array.shape, array.dtype, buffer=buf, offset=offset), array)
+    return ("slot", array.shape, array.dtype.str)
+
+
+def _in_slot(value: Any) -> bool:
+    return isinstance(value, tuple) and len(value) == 3 and value[0] == "slot"
+
+
+def _from_slot(buf: memoryview, offset: int, value: Any) -> Any:
+    if not _in_slot(value):
+        return value
+    _, shape, dtype = value
+    return np.ndarray(shape, np.dtype(dtype), buffer=buf, offset=offset)
+
+
+def _pickle_error(e: BaseException) -> bytes:
+    e = e.with_traceback(None)
+    try:
+        payload = pickle.dumps((None, None, e))
+        # Exceptions with a custom __init__ pickle fine but fail to unpickle
+        pickle.loads(payload)
+    except Exception:  # noqa: BLE001 - any pickling error is reported the same way
+        payload = pickle.dumps((None, None, RuntimeError(repr(e))))
+    return payload
+
+
+def _process_worker(
+    handler: Callable,
+    shm_name: str,
+    offset: int,
+    slot_bytes: int,
+    tasks: Connection,
+    results: Connection,
+):
+    shm = SharedMemory(name=shm_name)
+    try:
+        while (task := tasks.recv()) is not None:
+            frame, args = task
+            array = None
+            try:
+                array, additional_outputs = split_output(
+                    handler(_from_slot(shm.buf, offset, frame), *args)
+                )
+                array = _to_slot(shm.buf, offset + slot_bytes, slot_bytes, array)
+                # Pickled here, so outputs that cannot be pickled are reported as
+                # an error instead of being lost
+                payload = pickle.dumps((array, additional_outputs, None))
+            except Exception as e:  # noqa: BLE001 - handler errors go to the caller
+                payload = _pickle_error(e)
+            results.send_bytes(payload)
+            # Drop the views of the slot before the memory is closed
+            del frame, array, task
+    except EOFError:
+        # The server process exited
+        pass
+    finally:
+        shm.close()
+
+
+class _Worker:
+    def __init__(self, process: BaseProcess, tasks: Connection, results: Connection):
+        self.process = process
+        self.tasks = tasks
+        self.results = results
+
+
+class VideoProcessPool:
+    """Runs a video handler in worker processes.
+
+    Heavy numpy or OpenCV work in the server process competes for the GIL with
+    the media stack. Wrapping the handler runs it in `processes` separate
+    processes instead. Every process has a slot of preallocated shared memory,
+    through which frames and returned arrays are exchanged rather than pickled;
+    only the additional inputs and outputs are pickled, as are arrays larger
+    than the slot.
+
+    The pool is used in place of the handler, e.g.
+    `Stream(handler=VideoProcessPool(detection), modality="video", ...)`.
+    The handler must be picklable, i.e. defined at the top level of a module,
+    since the worker processes are started with the "spawn" method. They are
+    started on the first call, or by `start`. Each worker imports the module of
+    the handler, which can take a few seconds for modules that load a model.
+    A worker that dies is replaced, and the call it was running raises a
+    `RuntimeError`.
+
+    The shared memory takes `processes * 2 * max_frame_bytes` bytes of
+    /dev/shm, 25 MB with the defaults.
+
+    Args:
+      handler: Video handler called with the frame and the additional inputs.
+      processes: Number of worker processes, i.e. frames processed at once.
+        Further calls wait for a free process.
+      max_frame_bytes: Size of the input and output buffers of each process.
+        The default fits a 1080p bgr24 frame.
+    """
+
+    def __init__(
+        self,
+        handler: Callable,
+        processes: int = 2,
+        max_frame_bytes: int = 1920 * 1080 * 3,
+    ):
+        functools.update_wrapper(self, handler)
+        self.handler = handler
+        self.processes = processes
+        self.max_frame_bytes = max_frame_bytes
+        self._shm: SharedMemory | None = None
+        self._workers: list[_Worker] = []
+        self._idle: queue.SimpleQueue[int] = queue.SimpleQueue()
+        self._pending: dict[int, Future] = {}
+        self._reader: threading.Thread | None = None
+        self._wakeup: tuple[Connection, Connection] | None = None
+        self._closing = False
+        self._lock = threading.Lock()
+        # Whether the last batch had frames from several callers
+        self._concurrent = False
+
+    @property
+    def is_running(self) -> bool:
+        return self._shm is not None
+
+    def start(self):
+        with self._lock:
+            if self._shm is not None:
+                return
+            size = self.processes * 2 * self.max_frame_bytes
+            if os.path.isdir("/dev/shm") and shutil.disk_usage("/dev/shm").free < size:
+                # Writing past the end of /dev/shm kills the process with SIGBUS
+                raise RuntimeError(
+                    f"The video process pool needs {size / 2**20:.0f} MB of shared "
+                    "memory but /dev/shm does not have that much free space. Lower "
+                    "processes or max_frame_bytes, or increase the size of /dev/shm "
+                    "(e.g. docker run --shm-size)."
+                )
+            self._shm = SharedMemory(create=True, size=size)
+            self._closing = False
+            self._idle = queue.SimpleQueue()
+            self._workers = [self._start_worker(i) for i in range(self.processes)]
+            for i in range(self.processes):
+                self._idle.put(i)
+            self._wakeup = multiprocessing.Pipe(duplex=False)
+            self._reader = threading.Thread(
+                target=self._read_results, name="video-process-pool", daemon=True
+            )
+            self._reader.start()
+            atexit.register(self.close)
+
+    def _start_worker(self, i: int) -> _Worker:
+        ctx = multiprocessing.get_context("spawn")
+        tasks_recv, tasks_send = ctx.Pipe(duplex=False)
+        results_recv, results_send = ctx.Pipe(duplex=False)
+        process = ctx.Process(
+            target=_process_worker,
+            args=(
+                self.handler,
+                cast(SharedMemory, self._shm).name,
+                i * 2 * self.max_frame_bytes,
+                self.max_frame_bytes,
+                tasks_recv,
+                results_send,
+            ),
+            name=f"fastrtc-video-{i}",
+            daemon=True,
+        )
+        process.start()
+        # Only the worker keeps these ends open, so a dead worker is seen as EOF
+        tasks_recv.close()
+        results_send.close()
+        return _Worker(process, tasks_send, results_recv)
+
+    def close(self):
+        """Stop the worker processes and free the shared memory."""
+        with self._lock:
+            if self._shm is None:
+                return
+            self._closing = True
+            wakeup_recv, wakeup_send = cast(tuple, self._wakeup)
+            wakeup_send.send_bytes(b"")
+            cast(threading.Thread, self._reader).join()
+            for worker in self._workers:
+                try:
+                    worker.tasks.send(None)
+                except OSError:
+                    pass
+            for worker in self._workers:
+                worker.process.join(timeout=5)
+                if worker.process.is_alive():
+                    worker.process.terminate()
+                worker.tasks.close()
+                worker.results.close()
+            for future in self._pending.values():
+                future.set_exception(RuntimeError("The video process pool was closed"))
+            self._pending.clear()
+            wakeup_recv.close()
+            wakeup_send.close()
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+            self._workers = []
+            atexit.unregister(self.close)
+
+    def _receive(self, i: int):
+        try:
+            payload = self._workers[i].results.recv_bytes()
+        except (EOFError, OSError):
+            # The worker died, which is handled through its sentinel
+            return
+        try:
+            result = pickle.loads(payload)
+        except Exception as e:  # noqa: BLE001 - reported to the caller
+            result = (
+                None,
+                None,
+                RuntimeError(f"Could not unpickle the output of the handler: {e!r}"),
+            )
+        future = self._pending.pop(i, None)
+        if future is None:
+            return
+        array, additional_outputs, error = result
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result((array, additional_outputs))
+
+    def _replace_worker(self, i: int):
+        worker = self._workers[i]
+        # A result sent just before the worker died is still in the pipe
+        if worker.results.poll():
+            self._receive(i)
+        worker.process.join()
+        worker.tasks.close()
+        worker.results.close()
+        logger.warning(
+            "Video worker process %d exited with code %s, restarting it",
+            i,
+            worker.process.exitcode,
+        )
+        self._workers[i] = self._start_worker(i)
+        future = self._pending.pop(i, None)
+        if future is not None:
+            future.set_exception(
+                RuntimeError(
+                    f"The video worker process exited with code {worker.process.exitcode}"
+                )
+            )
+
+    def _read_results(self):
+        wakeup = cast(tuple, self._wakeup)[0]
+        while not self._closing:
+            results = {w.results: i for i, w in enumerate(self._workers)}
+            sentinels = {w.process.sentinel: i for i, w in enumerate(self._workers)}
+            ready = wait([wakeup, *results, *sentinels])
+            if self._closing:
+                return
+            for obj in ready:
+                if obj in results:
+                    self._receive(results[obj])
+            for obj in ready:
+                if obj in sentinels:
+                    self._replace_worker(sentinels[obj])
+
+    def __call__(self, frame: np.ndarray, *args: Any) -> Any:
+        self.start()
+        shm = cast(SharedMemory, self._shm)
+        i = self._idle.get()
+        offset = i * 2 * self.max_frame_bytes
+        try:
+            future: Future = Future()
+            self._pending[i] = future
+            frame = _to_slot(shm.buf, offset, self.max_frame_bytes, frame)
+            try:
+                self._workers[i].tasks.send((frame, args))
+            except BaseException:
+                self._pending.pop(i, None)
+                raise
+            array, additional_outputs = future.result()
+            if _in_slot(array):
+                # Copy the output out of the slot before it is reused
+                array = _from_slot(shm.buf, offset + self.max_frame_bytes, array).copy()
+        finally:
+            self._idle.put(i)
+        if additional_outputs is not None:
+            return array, additional_outputs
+        return array
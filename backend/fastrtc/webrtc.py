@@ -21,6 +21,8 @@ from gradio import wasm_utils
 from gradio.components.base import Component, server
 from gradio_client import handle_file
 
+from .executors import ExecutorOption
+from .jitter_buffer import JitterBufferOptions
 from .tracks import (
     AudioVideoStreamHandlerImpl,
     StreamHandler,
@@ -28,7 +30,7 @@ from .tracks import (
     StreamHandlerImpl,
     VideoEventHandler,
 )
-from .webrtc_connection_mixin import WebRTCConnectionMixin
+from .webrtc_connection_mixin import ConnectionOptions, WebRTCConnectionMixin
 
 if TYPE_CHECKING:
     from gradio.blocks import Block
@@ -91,6 +93,17 @@ class WebRTC(Component, WebRTCConnectionMixin):
         icon_radius: int | None = None,
         button_labels: dict | None = None,
         video_chat: bool = True,
+        executor: ExecutorOption = "default",
+        executor_workers: int | None = None,
+        output_buffer_ms: float | None = None,
+        prefetch: int = 0,
+        jitter_buffer: JitterBufferOptions | None = None,
+        decode_in_handler_layout: bool = False,
+        zero_copy_input: bool = False,
+        max_input_fps: float | None = None,
+        input_frame_size: tuple[int, int] | None = None,
+        input_pixel_format: str = "bgr24",
+        output_pixel_format: str = "bgr24",
     ):
         """
         Parameters:
@@ -123,8 +136,32 @@ class WebRTC(Component, WebRTCConnectionMixin):
             pulse_color: Color of the pulse animation. Default is var(--color-accent) of the demo theme.
             button_labels: Text to display on the audio or video start, stop, waiting buttons. Dict with keys "start", "stop", "waiting" mapping to the text to display on the buttons.
             icon_radius: Border radius of the icon button expressed as a percentage of the button size. Default is 50%
+            executor: Where the `receive` and `emit` methods of sync stream handlers run. "default" uses the shared default thread pools, "stream" a thread pool dedicated to this component, "connection" a pair of threads per connection. An `Executor` instance can also be passed.
+            executor_workers: Number of threads of the "stream" pool, or per connection for "connection".
+            output_buffer_ms: Maximum milliseconds of output audio decoded ahead of playback. When the buffer is full the handler is not asked for more audio until playback catches up. Unbounded by default.
+            prefetch: In "receive" mode, number of chunks a sync generator handler is run ahead of playback in a worker thread. 0 disables prefetching.
+            jitter_buffer: In "send-receive" mode, buffers a short adaptive pre-roll before each reply and plays silence instead of stuttering when the handler falls behind. See `JitterBufferOptions`.
+            decode_in_handler_layout: Decode incoming Opus audio in the `expected_layout` of the stream handler instead of stereo. Mono handlers skip the downmix, and handlers with an `input_sample_rate` of 48000 skip resampling altogether.
+            zero_copy_input: Pass input audio and video to the handler as read-only views of the decoded frames instead of copies. Handlers that modify the arrays must copy them first. The video frames passed to a plain function handler are only valid until it returns.
+            max_input_fps: Maximum number of input video frames per second passed to the handler. Frames above this rate are dropped before they are converted to arrays. Audio-video handlers can set a `max_input_fps` class attribute instead, which takes precedence.
+            input_frame_size: (width, height) that input video frames are scaled to before they are passed to the handler. The scaling happens in the same step as the pixel format conversion. Audio-video handlers can set an `input_frame_size` class attribute instead, which takes precedence.
+            input_pixel_format: Pixel format of the input video arrays. One of "bgr24", "rgb24", "bgra", "rgba" or "gray8". Audio-video handlers can set an `input_pixel_format` class attribute instead, which takes precedence.
+            output_pixel_format: Pixel format of the video arrays returned by the handler, such as "bgr24", "rgb24" or "yuv420p". "yuv420p" arrays skip the color conversion before encoding. Handlers can also return `av.VideoFrame` objects, which are sent as they are. Audio-video handlers can set an `output_pixel_format` class attribute instead, which takes precedence.
         """
         WebRTCConnectionMixin.__init__(self)
+        self._options = ConnectionOptions(
+            executor=executor,
+            executor_workers=executor_workers,
+            output_buffer_ms=output_buffer_ms,
+            prefetch=prefetch,
+            jitter_buffer=jitter_buffer,
+            decode_in_handler_layout=decode_in_handler_layout,
+            zero_copy_input=zero_copy_input,
+            max_input_fps=max_input_fps,
+            input_frame_size=input_frame_size,
+            input_pixel_format=input_pixel_format,
+            output_pixel_format=output_pixel_format,
+        )
         self.time_limit = time_limit
         self.height = height
         self.width = width
@@ -8,6 +8,7 @@ import inspect
 import logging
 from collections import defaultdict
 from collections.abc import Callable
+from concurrent.futures import Executor
 from dataclasses import dataclass, field
 from typing import (
     AsyncGenerator,
@@ -20,10 +21,21 @@ from typing import (
 from aiortc import (
     RTCPeerConnection,
     RTCSessionDescription,
+    sdp,
 )
 from aiortc.contrib.media import MediaRelay  # type: ignore
 from fastapi.responses import JSONResponse
 
+from fastrtc.executors import (
+    ExecutorOption,
+    ExecutorStats,
+    InstrumentedExecutor,
+    create_executor,
+)
+from fastrtc.input_decoding import decode_in_layout
+from fastrtc.interruption import InterruptStats
+from fastrtc.jitter_buffer import JitterBufferOptions, JitterBufferStats
+from fastrtc.pacing import PacingStats
 from fastrtc.tracks import (
     AudioCallback,
     HandlerType,
@@ -41,6 +53,7 @@ from fastrtc.utils import (
     parse_json_safely,
     webrtc_error_handler,
 )
+from fastrtc.video_processing import VideoStats
 
 Track = (
     VideoCallback
@@ -66,6 +79,26 @@ class OutputQueue:
     quit: asyncio.Event = field(default_factory=asyncio.Event)
 
 
+@dataclass
+class ConnectionOptions:
+    """Options of the connections of a `Stream` or `WebRTC` component.
+
+    They are documented with the parameters of `WebRTC`.
+    """
+
+    executor: ExecutorOption = "default"
+    executor_workers: int | None = None
+    output_buffer_ms: float | None = None
+    prefetch: int = 0
+    jitter_buffer: JitterBufferOptions | None = None
+    decode_in_handler_layout: bool = False
+    zero_copy_input: bool = False
+    max_input_fps: float | None = None
+    input_frame_size: tuple[int, int] | None = None
+    input_pixel_format: str = "bgr24"
+    output_pixel_format: str = "bgr24"
+
+
 class WebRTCConnectionMixin:
     def __init__(self):
         self.pcs = set([])
@@ -75,6 +108,8 @@ class WebRTCConnectionMixin:
         self.additional_outputs = defaultdict(OutputQueue)
         self.handlers = {}
         self.connection_timeouts = defaultdict(asyncio.Event)
+        self._options = ConnectionOptions()
+        self.executors: dict[str, InstrumentedExecutor] = {}
         # These attributes should be set by subclasses:
         self.concurrency_limit: int | float | None
         self.event_handler: HandlerType | None
@@ -102,8 +137,109 @@ class WebRTCConnectionMixin:
             self.connection_timeouts[webrtc_id].clear()
             self.clean_up(webrtc_id)
 
+    def get_executor(
+        self, webrtc_id: str, kind: Literal["audio", "video"] | None = None
+    ) -> InstrumentedExecutor | None:
+        """Executor that runs the sync handler of the given connection.
+
+        With the "connection" executor, each `kind` of track gets its own pool,
+        so a slow video handler cannot delay the audio of the same connection.
+        Returns None when the default thread pools should be used.
+        """
+        if self._options.executor == "default":
+            return None
+        if self._options.executor == "connection":
+            key = f"{webrtc_id}-{kind}" if kind else webrtc_id
+            if key not in self.executors:
+                # receive and emit each run sequentially, so two threads act
+                # as a pair of single-thread actors for this track
+                prefix = f"fastrtc-{webrtc_id[:8]}" + (f"-{kind}" if kind else "")
+                self.executors[key] = create_executor(
+                    self._options.executor_workers or 2, prefix
+                )
+            return self.executors[key]
+        if "stream" not in self.executors:
+            if self._options.executor == "stream":
+                self.executors["stream"] = create_executor(
+                    self._options.executor_workers
+                )
+            else:
+                self.executors["stream"] = (
+                    self._options.executor
+                    if isinstance(self._options.executor, InstrumentedExecutor)
+                    else InstrumentedExecutor(cast(Executor, self._options.executor))
+                )
+        return self.executors["stream"]
+
+    def executor_stats(self) -> dict[str, ExecutorStats]:
+        """Queue depth and wait times of the handler executors, keyed by
+        connection id and track kind, or "stream" for an executor shared by all
+        connections."""
+        return {key: executor.stats() for key, executor in self.executors.items()}
+
+    def pacing_stats(self) -> dict[str, PacingStats]:
+        """Lateness of the outgoing audio frames of each connection, keyed by connection id."""
+        return {
+            webrtc_id: conn.pacing_stats
+            for webrtc_id, conns in self.connections.items()
+            for conn in conns
+            if isinstance(conn, (AudioCallback, ServerToClientAudio))
+        }
+
+    def jitter_buffer_stats(self) -> dict[str, JitterBufferStats]:
+        """Underruns and buffer depth of the output jitter buffer of each connection."""
+        return {
+            webrtc_id: conn.jitter_buffer.stats
+            for webrtc_id, conns in self.connections.items()
+            for conn in conns
+            if isinstance(conn, AudioCallback) and conn.jitter_buffer is not None
+        }
+
+    def interrupt_stats(self) -> dict[str, InterruptStats]:
+        """Time from each interruption until the interrupted reply went silent, per connection."""
+        return {
+            webrtc_id: conn.interrupt_stats
+            for webrtc_id, conns in self.connections.items()
+            for conn in conns
+            if isinstance(conn, AudioCallback)
+        }
+
+    def video_stats(self) -> dict[str, VideoStats]:
+        """Frames processed and dropped by the video handler of each connection."""
+        return {
+            webrtc_id: conn.video_stats
+            for webrtc_id, conns in self.connections.items()
+            for conn in conns
+            if isinstance(conn, VideoCallback)
+        }
+
+    @staticmethod
+    def set_output_codecs(pc: RTCPeerConnection):
+        """Tell the audio tracks which codec was negotiated for sending.
+
+        aiortc encodes with the first codec of each media section of the answer.
+        """
+        description = sdp.SessionDescription.parse(pc.localDescription.sdp)
+        codecs = {
+            media.rtp.muxId: media.rtp.codecs[0].mimeType
+            for media in description.media
+            if media.rtp.codecs
+        }
+        for transceiver in pc.getTransceivers():
+            track = transceiver.sender.track
+            if isinstance(track, (AudioCallback, ServerToClientAudio)):
+                track.output_codec = codecs.get(transceiver.mid)
+
+    def release_executor(self, webrtc_id: str):
+        if self._options.executor == "connection":
+            for key in (webrtc_id, f"{webrtc_id}-audio", f"{webrtc_id}-video"):
+                executor = self.executors.pop(key, None)
+                if executor is not None:
+                    executor.shutdown(wait=False)
+
     def clean_up(self, webrtc_id: str):
         self.handlers.pop(webrtc_id, None)
+        self.release_executor(webrtc_id)
         self.connection_timeouts.pop(webrtc_id, None)
         connection = self.connections.pop(webrtc_id, [])
         for conn in connection:
@@ -219,20 +355,46 @@ class WebRTCConnectionMixin:
                     event_handler=cast(Callable, handler),
                     set_additional_outputs=set_outputs,
                     mode=cast(Literal["send", "send-receive"], self.mode),
+                    zero_copy_input=self._options.zero_copy_input,
+                    executor=self.get_executor(body["webrtc_id"], "video"),
+                    max_input_fps=self._options.max_input_fps,
+                    input_frame_size=self._options.input_frame_size,
+                    input_pixel_format=self._options.input_pixel_format,
+                    output_pixel_format=self._options.output_pixel_format,
                 )
             elif self.modality == "audio-video" and track.kind == "video":
                 cb = VideoStreamHandler(
                     relay.subscribe(track),
                     event_handler=handler,  # type: ignore
                     set_additional_outputs=set_outputs,
+                    zero_copy_input=self._options.zero_copy_input,
+                    executor=self.get_executor(body["webrtc_id"], "video"),
+                    max_input_fps=self._options.max_input_fps,
+                    input_frame_size=self._options.input_frame_size,
+                    input_pixel_format=self._options.input_pixel_format,
+                    output_pixel_format=self._options.output_pixel_format,
                 )
             elif self.modality in ["audio", "audio-video"] and track.kind == "audio":
                 eh = cast(StreamHandlerImpl, handler)
                 eh._loop = asyncio.get_running_loop()
+                if self._options.decode_in_handler_layout and not decode_in_layout(
+                    track, eh.expected_layout
+                ):
+                    logger.warning(
+                        "decode_in_handler_layout is not supported by the installed "
+                        "aiortc version, the input audio is decoded as stereo"
+                    )
                 cb = AudioCallback(
                     relay.subscribe(track),
                     event_handler=eh,
                     set_additional_outputs=set_outputs,
+                    executor=self.get_executor(body["webrtc_id"], "audio"),
+                    # Nothing drains the output queue in send mode
+                    output_buffer_ms=self._options.output_buffer_ms
+                    if self.mode == "send-receive"
+                    else None,
+                    jitter_buffer=self._options.jitter_buffer,
+                    zero_copy_input=self._options.zero_copy_input,
                 )
             else:
                 raise ValueError("Modality must be either video, audio, or audio-video")
@@ -254,11 +416,15 @@ class WebRTCConnectionMixin:
                 cb = ServerToClientVideo(
                     cast(Callable, self.event_handler),
                     set_additional_outputs=set_outputs,
+                    output_pixel_format=self._options.output_pixel_format,
                 )
             elif self.modality == "audio":
                 cb = ServerToClientAudio(
                     cast(Callable, self.event_handler),
                     set_additional_outputs=set_outputs,
+                    executor=self.get_executor(body["webrtc_id"], "audio"),
+                    output_buffer_ms=self._options.output_buffer_ms,
+                    prefetch=self._options.prefetch,
                 )
             else:
                 raise ValueError("Modality must be either video or audio")
@@ -302,6 +468,7 @@ class WebRTCConnectionMixin:
         # send answer
         answer = await pc.createAnswer()
         await pc.setLocalDescription(answer)  # type: ignore
+        self.set_output_codecs(pc)
         logger.debug("done handling offer about to return")
         await asyncio.sleep(0.1)
 
@@ -2,15 +2,25 @@ import asyncio
 import audioop
 import base64
 import logging
-from typing import Any, Awaitable, Callable, Optional, cast
+from collections.abc import Awaitable, Callable
+from concurrent.futures import Executor
+from typing import Any, cast
 
 import anyio
-import librosa
 import numpy as np
-from fastapi import WebSocket
+from fastapi import WebSocket, WebSocketDisconnect
 
+from .decoder import AudioStreamDecoder, EncodedAudio, frames_to_array
+from .interruption import CancellationToken
+from .resampler import StreamingResampler, resample_audio
 from .tracks import AsyncStreamHandler, StreamHandlerImpl
-from .utils import AdditionalOutputs, DataChannel, split_output
+from .utils import (
+    AdditionalOutputs,
+    DataChannel,
+    InputAggregator,
+    OpusPacket,
+    split_output,
+)
 
 
 class WebSocketDataChannel(DataChannel):
@@ -26,19 +36,28 @@ logger = logging.getLogger(__file__)
 
 
 def convert_to_mulaw(
-    audio_data: np.ndarray, original_rate: int, target_rate: int
+    audio_data: np.ndarray,
+    original_rate: int,
+    target_rate: int,
+    resampler: StreamingResampler | None = None,
 ) -> bytes:
-    """Convert audio data to 8kHz mu-law format"""
+    """Convert audio data to mu-law format at target_rate.
 
-    if audio_data.dtype != np.float32:
-        audio_data = audio_data.astype(np.float32) / 32768.0
+    Pass the same resampler for consecutive chunks of a stream to avoid
+    artifacts at chunk boundaries.
+    """
 
     if original_rate != target_rate:
-        audio_data = librosa.resample(audio_data, orig_sr=original_rate, target_sr=8000)
-
-    audio_data = (audio_data * 32768).astype(np.int16)
+        if resampler is None:
+            audio_data = resample_audio(
+                audio_data, original_rate, target_rate, np.int16
+            )
+        else:
+            audio_data = resampler.resample(audio_data)
+    elif audio_data.dtype != np.int16:
+        audio_data = (np.clip(audio_data, -1.0, 1.0) * 32767).astype(np.int16)
 
-    return audioop.lin2ulaw(audio_data, 2)  # type: ignore
+    return audioop.lin2ulaw(np.ascontiguousarray(audio_data).tobytes(), 2)  # type: ignore
 
 
 run_sync = anyio.to_thread.run_sync  # type: ignore
@@ -53,35 +72,103 @@ class WebSocketHandler:
         additional_outputs_factory: Callable[
             [str], Callable[[AdditionalOutputs], None]
         ],
+        executor: Executor | None = None,
     ):
+        self.executor = executor
         self.stream_handler = stream_handler
         self.stream_handler._clear_queue = self._clear_queue
-        self.websocket: Optional[WebSocket] = None
-        self._emit_task: Optional[asyncio.Task] = None
-        self.stream_id: Optional[str] = None
+        self.websocket: WebSocket | None = None
+        self._emit_task: asyncio.Task | None = None
+        self.stream_id: str | None = None
         self.set_additional_outputs_factory = additional_outputs_factory
         self.set_additional_outputs: Callable[[AdditionalOutputs], None]
         self.set_handler = set_handler
         self.quit = asyncio.Event()
         self.clean_up = clean_up
         self.queue = asyncio.Queue()
+        self._input_resampler: StreamingResampler | None = None
+        self._output_resampler: StreamingResampler | None = None
+        self._decoder = AudioStreamDecoder()
+        self._input_aggregator = (
+            InputAggregator(stream_handler.input_chunk_duration)
+            if stream_handler.input_chunk_duration
+            else None
+        )
+        self.reply_token = CancellationToken()
+        self._output_token = self.reply_token
+        self.loop: asyncio.AbstractEventLoop | None = None
+        # Clear messages in flight, referenced so they are not garbage collected
+        self._clear_tasks: set[asyncio.Task] = set()
+
+    def _decode(
+        self, encoded: EncodedAudio | OpusPacket | list[OpusPacket]
+    ) -> tuple[int, np.ndarray] | None:
+        # The phone and websocket clients expect mu-law, so encoded audio is
+        # decoded here instead of being passed through
+        if isinstance(encoded, EncodedAudio):
+            frames = self._decoder.decode(encoded)
+        else:
+            packets = [encoded] if isinstance(encoded, OpusPacket) else encoded
+            frames = self._decoder.decode_opus([packet.data for packet in packets])
+        return frames_to_array(frames)
+
+    def _output_resampler_for(self, input_rate: int, target_rate: int):
+        if (
+            self._output_resampler is None
+            or self._output_resampler.input_rate != input_rate
+            or self._output_resampler.output_rate != target_rate
+        ):
+            self._output_resampler = StreamingResampler(input_rate, target_rate)
+        return self._output_resampler
+
+    def _clear_queue(self, fade_out_ms: float = 0):
+        # Audio that was already sent cannot be faded, so fade_out_ms is ignored
+        token = self.reply_token
+        self.reply_token = CancellationToken()
+        token.cancel()
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if self.loop is None or running_loop is self.loop:
+            self._flush()
+        else:
+            self.loop.call_soon_threadsafe(self._flush)
 
-    def _clear_queue(self):
-        old_queue = self.queue
-        self.queue = asyncio.Queue()
+    def _flush(self):
         logger.debug("clearing queue")
         i = 0
-        while not old_queue.empty():
+        while not self.queue.empty():
             try:
-                old_queue.get_nowait()
+                self.queue.get_nowait()
                 i += 1
             except asyncio.QueueEmpty:
                 break
         logger.debug("popped %d items from queue", i)
+        if self.stream_handler.phone_mode and self.websocket and self.stream_id:
+            # Twilio buffers the media it was sent, a clear message drops the
+            # part that has not been played yet
+            task = asyncio.create_task(self._send_clear(self.websocket, self.stream_id))
+            self._clear_tasks.add(task)
+            task.add_done_callback(self._clear_tasks.discard)
+
+    async def _send_clear(self, websocket: WebSocket, stream_id: str):
+        try:
+            await websocket.send_json({"event": "clear", "streamSid": stream_id})
+        except (WebSocketDisconnect, RuntimeError, OSError) as e:
+            # The call may have ended while the clear message was queued
+            logger.warning("Could not send clear message to Twilio: %s", e)
 
     def set_args(self, args: list[Any]):
         self.stream_handler.set_args(args)
 
+    async def run_sync(self, fn: Callable, *args: Any) -> Any:
+        if self.executor is None:
+            return await run_sync(fn, *args)
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, fn, *args
+        )
+
     async def handle_websocket(self, websocket: WebSocket):
         await websocket.accept()
         loop = asyncio.get_running_loop()
@@ -110,22 +197,22 @@ class WebSocketHandler:
                     )
 
                     if self.stream_handler.input_sample_rate != 8000:
-                        audio_array = audio_array.astype(np.float32) / 32768.0
-                        audio_array = librosa.resample(
-                            audio_array,
-                            orig_sr=8000,
-                            target_sr=self.stream_handler.input_sample_rate,
-                        )
-                        audio_array = (audio_array * 32768).astype(np.int16)
-                    if isinstance(self.stream_handler, AsyncStreamHandler):
-                        await self.stream_handler.receive(
-                            (self.stream_handler.input_sample_rate, audio_array)
-                        )
-                    else:
-                        await run_sync(
-                            self.stream_handler.receive,
-                            (self.stream_handler.input_sample_rate, audio_array),
-                        )
+                        if self._input_resampler is None:
+                            self._input_resampler = StreamingResampler(
+                                8000, self.stream_handler.input_sample_rate
+                            )
+                        audio_array = self._input_resampler.resample(audio_array)
+                    chunk = (self.stream_handler.input_sample_rate, audio_array)
+                    chunks = (
+                        [chunk]
+                        if self._input_aggregator is None
+                        else self._input_aggregator.push(*chunk)
+                    )
+                    for chunk in chunks:
+                        if isinstance(self.stream_handler, AsyncStreamHandler):
+                            await self.stream_handler.receive(chunk)
+                        else:
+                            await self.run_sync(self.stream_handler.receive, chunk)
 
                 elif message["event"] == "start":
                     if self.stream_handler.phone_mode:
@@ -161,10 +248,16 @@ class WebSocketHandler:
     async def _emit_to_queue(self):
         try:
             while not self.quit.is_set():
+                await self.stream_handler.wait_for_output()
+                token = self.reply_token
                 if isinstance(self.stream_handler, AsyncStreamHandler):
                     output = await self.stream_handler.emit()
                 else:
-                    output = await run_sync(self.stream_handler.emit)
+                    output = await self.run_sync(self.stream_handler.emit)
+                if token.cancelled:
+                    # The reply was interrupted while this chunk was being
+                    # produced, only its additional outputs are kept
+                    output = split_output(output)[1]
                 self.queue.put_nowait(output)
         except asyncio.CancelledError:
             logger.debug("Emit loop cancelled")
@@ -178,12 +271,20 @@ class WebSocketHandler:
         try:
             while not self.quit.is_set():
                 output = await self.queue.get()
+                token = self.reply_token
+                if token is not self._output_token:
+                    # Decoder and resampler state of an interrupted reply
+                    self._output_token = token
+                    self._output_resampler = None
+                    self._decoder.reset()
 
                 if output is not None:
                     frame, output = split_output(output)
                     if output is not None:
                         self.set_additional_outputs(output)
-                    if not isinstance(frame, tuple):
+                    if isinstance(frame, (EncodedAudio, OpusPacket, list)) and frame:
+                        frame = await self.run_sync(self._decode, frame)
+                    if not isinstance(frame, tuple) or token.cancelled:
                         continue
                     target_rate = (
                         self.stream_handler.output_sample_rate
@@ -191,7 +292,10 @@ class WebSocketHandler:
                         else 8000
                     )
                     mulaw_audio = convert_to_mulaw(
-                        frame[1], frame[0], target_rate=target_rate
+                        frame[1],
+                        frame[0],
+                        target_rate=target_rate,
+                        resampler=self._output_resampler_for(frame[0], target_rate),
                     )
                     audio_payload = base64.b64encode(mulaw_audio).decode("utf-8")
 
@@ -1,5 +1,5 @@
 import fastapi
-from fastrtc import ReplyOnPause, Stream, AlgoOptions, SileroVadOptions
+from fastrtc import ReplyOnPause, Stream, AlgoOptions, SileroVadOptions, EncodedAudio
 from fastrtc.utils import audio_to_bytes
 from openai import OpenAI
 import logging
@@ -7,7 +7,6 @@ import time
 from fastapi.middleware.cors import CORSMiddleware
 from elevenlabs import VoiceSettings, stream
 from elevenlabs.client import ElevenLabs
-import numpy as np
 
 from .env import LLM_API_KEY, ELEVENLABS_API_KEY
 
@@ -78,10 +77,7 @@ def echo(audio):
     )
 
     for audio_chunk in audio_stream:
-        audio_array = (
-            np.frombuffer(audio_chunk, dtype=np.int16).astype(np.float32) / 32768.0
-        )
-        yield (24000, audio_array)
+        yield EncodedAudio(audio_chunk, "pcm_s16le", sample_rate=24000)
 
     messages.append({"role": "assistant", "content": full_response + " "})
     logging.info(f"LLM response: {full_response}")
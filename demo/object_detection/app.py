@@ -26,7 +26,6 @@ model = YOLOv10(model_file)
 
 
 def detection(image, conf_threshold=0.3):
-    image = cv2.resize(image, (model.input_width, model.input_height))
     print("conf_threshold", conf_threshold)
     new_image = model.detect_objects(image, conf_threshold)
     return cv2.resize(new_image, (500, 500))
@@ -36,6 +35,7 @@ stream = Stream(
     handler=detection,
     modality="video",
     mode="send-receive",
+    input_frame_size=(model.input_width, model.input_height),
     additional_inputs=[gr.Slider(minimum=0, maximum=1, step=0.01, value=0.3)],
     rtc_configuration=get_twilio_turn_credentials() if get_space() else None,
     concurrency_limit=2 if get_space() else None,
@@ -10,8 +10,14 @@ from dotenv import load_dotenv
 from elevenlabs import ElevenLabs
 from fastapi import FastAPI
 from fastapi.responses import HTMLResponse, StreamingResponse
-from fastrtc import AdditionalOutputs, ReplyOnPause, Stream, get_twilio_turn_credentials
-from fastrtc.utils import aggregate_bytes_to_16bit, audio_to_bytes
+from fastrtc import (
+    AdditionalOutputs,
+    EncodedAudio,
+    ReplyOnPause,
+    Stream,
+    get_twilio_turn_credentials,
+)
+from fastrtc.utils import audio_to_bytes
 from gradio.utils import get_space
 from groq import Groq
 from pydantic import BaseModel
@@ -74,9 +80,8 @@ def response(
         model_id="eleven_multilingual_v2",
         output_format="pcm_24000",
     )
-    for chunk in aggregate_bytes_to_16bit(iterator):
-        audio_array = np.frombuffer(chunk, dtype=np.int16).reshape(1, -1)
-        yield (24000, audio_array, "mono")
+    for chunk in iterator:
+        yield EncodedAudio(chunk, "pcm_s16le", sample_rate=24000)
 
 
 chatbot = gr.Chatbot(type="messages")
@@ -0,0 +1,121 @@
+import numpy as np
+import pytest
+from fastrtc import AudioAccumulator
+from fastrtc.resampler import StreamingResampler
+from fastrtc.utils import InputAggregator
+
+
+def _ramp(start: int, n: int) -> np.ndarray:
+    return np.arange(start, start + n, dtype=np.int16)
+
+
+def test_accumulator_joins_chunks_across_growth():
+    acc = AudioAccumulator(capacity=4)
+    chunks = [_ramp(0, 3), _ramp(3, 5), _ramp(8, 0), _ramp(8, 17)]
+    for chunk in chunks:
+        acc.append(chunk)
+    assert len(acc) == 25
+    np.testing.assert_array_equal(acc.to_array(), _ramp(0, 25))
+    np.testing.assert_array_equal(acc.tail(4), _ramp(21, 4))
+    assert acc.to_array().dtype == np.int16
+
+
+def test_accumulator_keeps_the_last_max_samples():
+    acc = AudioAccumulator(max_samples=10)
+    start = 0
+    for n in [3, 7, 4, 9, 1, 12, 5]:
+        acc.append(_ramp(start, n))
+        start += n
+        np.testing.assert_array_equal(
+            acc.view(), _ramp(max(start - 10, 0), min(start, 10))
+        )
+
+
+def test_accumulator_views_are_read_only_and_copies_are_not():
+    acc = AudioAccumulator()
+    acc.append(np.zeros((1, 960), dtype=np.int16))
+    with pytest.raises(ValueError):
+        acc.view()[0] = 1
+    copy = acc.to_array()
+    acc.append(np.ones(960, dtype=np.int16))
+    assert copy.shape == (960,) and not copy.any()
+
+
+def test_accumulator_clear():
+    acc = AudioAccumulator()
+    assert len(acc.view()) == 0
+    acc.append(_ramp(0, 100))
+    acc.clear()
+    assert len(acc) == 0
+    acc.append(_ramp(100, 5))
+    np.testing.assert_array_equal(acc.to_array(), _ramp(100, 5))
+
+
+def _push_all(aggregator, sample_rate, frames):
+    return [c for f in frames for c in aggregator.push(sample_rate, f)]
+
+
+@pytest.mark.parametrize("frame_size", [960, 700, 3000])
+def test_aggregator_chunks_have_the_chunk_duration(frame_size):
+    audio = _ramp(0, 12000).reshape(1, -1)
+    frames = [
+        audio[:, i : i + frame_size] for i in range(0, audio.shape[1], frame_size)
+    ]
+    chunks = _push_all(InputAggregator(0.1), 16000, frames)
+    # 12000 samples fill seven chunks of 1600 and leave the rest pending
+    assert len(chunks) == 7
+    assert all(rate == 16000 and c.shape == (1, 1600) for rate, c in chunks)
+    np.testing.assert_array_equal(
+        np.concatenate([c for _, c in chunks], axis=1), audio[:, : 7 * 1600]
+    )
+
+
+def test_aggregator_hands_out_new_chunks():
+    aggregator = InputAggregator(0.01)
+    first = aggregator.push(16000, _ramp(0, 160))[0][1]
+    aggregator.push(16000, _ramp(160, 160))
+    np.testing.assert_array_equal(first, _ramp(0, 160))
+
+
+def test_aggregator_interleaves_stereo_samples():
+    aggregator = InputAggregator(0.01, channels=2)
+    chunks = aggregator.push(8000, _ramp(0, 200).reshape(1, -1))
+    assert len(chunks) == 1 and chunks[0][1].shape == (1, 160)
+
+
+def test_aggregator_follows_resampled_input():
+    # A resampler returns frames of uneven sizes
+    resampler = StreamingResampler(48000, 16000)
+    aggregator = InputAggregator(0.02)
+    audio = (10000 * np.sin(np.arange(48000) / 10)).astype(np.int16)
+    chunks = []
+    resampled = []
+    for i in range(0, len(audio), 1000):
+        frame = resampler.resample(audio[i : i + 1000])
+        resampled.append(frame)
+        chunks += aggregator.push(16000, frame)
+    resampled = np.concatenate(resampled)
+    assert all(c.shape == (320,) for _, c in chunks)
+    assert len(chunks) == len(resampled) // 320
+    np.testing.assert_array_equal(
+        np.concatenate([c for _, c in chunks]), resampled[: len(chunks) * 320]
+    )
+
+
+def test_aggregator_starts_a_new_chunk_when_the_rate_changes():
+    aggregator = InputAggregator(0.01)
+    assert aggregator.push(16000, _ramp(0, 100)) == []
+    # The 100 pending samples at 16 kHz are dropped
+    chunks = aggregator.push(8000, _ramp(0, 80))
+    assert len(chunks) == 1
+    rate, chunk = chunks[0]
+    assert rate == 8000
+    np.testing.assert_array_equal(chunk, _ramp(0, 80))
+
+
+def test_aggregator_reset_drops_the_partial_chunk():
+    aggregator = InputAggregator(0.01)
+    aggregator.push(16000, _ramp(0, 100))
+    aggregator.reset()
+    chunks = aggregator.push(16000, _ramp(1000, 160))
+    np.testing.assert_array_equal(chunks[0][1], _ramp(1000, 160))
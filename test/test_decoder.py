@@ -0,0 +1,123 @@
+import asyncio
+import io
+
+import av
+import numpy as np
+import pytest
+from fastrtc.decoder import AudioStreamDecoder, EncodedAudio, frames_to_array
+from fastrtc.executors import create_executor
+from fastrtc.utils import player_worker_decode
+
+RATE = 48000
+
+
+def _sine(seconds: float = 1.0) -> np.ndarray:
+    t = np.arange(int(RATE * seconds)) / RATE
+    return (10000 * np.sin(2 * np.pi * 440 * t)).astype(np.int16)
+
+
+def _encode(container_format: str, codec: str, audio: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    with av.open(buffer, "w", format=container_format) as container:
+        stream = container.add_stream(codec, rate=RATE, layout="mono")  # type: ignore
+        frame_size = 960
+        for start in range(0, len(audio), frame_size):
+            frame = av.AudioFrame.from_ndarray(
+                audio[start : start + frame_size].reshape(1, -1),
+                format="s16",
+                layout="mono",
+            )
+            frame.sample_rate = RATE
+            frame.pts = start
+            for packet in stream.encode(frame):
+                container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+    return buffer.getvalue()
+
+
+def _decode_in_chunks(data: bytes, format: str, chunk_size: int):
+    decoder = AudioStreamDecoder()
+    # The output of the first chunks must not wait for the end of the stream
+    first_output = None
+    frames = []
+    for start in range(0, len(data), chunk_size):
+        decoded = decoder.decode(EncodedAudio(data[start : start + chunk_size], format))  # type: ignore
+        if decoded and first_output is None:
+            first_output = start + chunk_size
+        frames += decoded
+    frames += decoder.flush()
+    return first_output, frames_to_array(frames)
+
+
+@pytest.mark.parametrize(
+    "container_format,codec,format",
+    [("mp3", "libmp3lame", "mp3"), ("ogg", "libopus", "ogg")],
+)
+def test_incremental_decoding(container_format, codec, format):
+    # Several Ogg pages, which are only decoded once they are complete
+    audio = _sine(3.0)
+    data = _encode(container_format, codec, audio)
+    # An odd chunk size splits frames, Ogg pages and headers at arbitrary offsets
+    first_output, decoded = _decode_in_chunks(data, format, 777)
+    assert decoded is not None
+    rate, samples = decoded
+    assert rate == RATE
+    assert first_output is not None and first_output < len(data) / 2
+    # Encoder delay and padding add at most a few frames
+    assert abs(len(samples) - len(audio)) < RATE * 0.1
+    assert np.sqrt(np.mean(samples.astype(np.float64) ** 2)) > 5000
+
+
+def test_pcm_samples_split_across_chunks():
+    audio = _sine(0.1)
+    data = audio.tobytes()
+    decoder = AudioStreamDecoder()
+    frames = []
+    for start in range(0, len(data), 101):
+        chunk = EncodedAudio(data[start : start + 101], "pcm_s16le", sample_rate=RATE)
+        frames += decoder.decode(chunk)
+    decoded = frames_to_array(frames)
+    assert decoded is not None
+    np.testing.assert_array_equal(decoded[1], audio)
+
+
+def test_pcm_requires_a_sample_rate():
+    with pytest.raises(ValueError, match="sample_rate"):
+        AudioStreamDecoder().decode(EncodedAudio(b"\0\0", "pcm_s16le"))
+
+
+def test_format_change_starts_a_new_stream():
+    decoder = AudioStreamDecoder()
+    decoder.decode(EncodedAudio(b"\0\0", "pcm_s16le", sample_rate=RATE))
+    assert decoder.format == "pcm_s16le"
+    decoder.decode(EncodedAudio(b"", "mp3"))
+    assert decoder.format == "mp3"
+    decoder.reset()
+    assert not decoder.is_active
+
+
+def test_player_decodes_in_the_given_executor():
+    chunks = iter([EncodedAudio(_encode("mp3", "libmp3lame", _sine(0.5)), "mp3")])
+    executor = create_executor(1)
+
+    async def next_frame():
+        return next(chunks, None)
+
+    async def main():
+        queue = asyncio.Queue()
+        await player_worker_decode(
+            next_frame, queue, asyncio.Event(), None, None, True, executor=executor
+        )
+        frames = []
+        while (frame := queue.get_nowait()) is not None:
+            frames.append(frame)
+        return frames
+
+    try:
+        frames = asyncio.run(main())
+        assert sum(f.samples for f in frames) > RATE * 0.4
+        # One call to decode the chunk and one to flush the decoder
+        assert executor.stats().completed == 2
+    finally:
+        executor.shutdown()
@@ -0,0 +1,88 @@
+import numpy as np
+from fastrtc.pause_detection import EnergyGate, EnergyGateOptions
+
+RATE = 16000
+
+
+def _noise(level: float, seconds: float = 0.5, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return (level * rng.standard_normal(int(RATE * seconds))).astype(np.float32)
+
+
+def _tone(level: float, seconds: float = 0.5) -> np.ndarray:
+    t = np.arange(int(RATE * seconds)) / RATE
+    return (level * np.sin(2 * np.pi * 200 * t)).astype(np.float32)
+
+
+def test_digital_silence_is_silent():
+    gate = EnergyGate()
+    assert gate.is_silent(np.zeros(RATE // 2, dtype=np.int16), RATE)
+    assert gate.is_silent(np.zeros(0, dtype=np.float32), RATE)
+
+
+def test_fresh_gate_does_not_gate_a_loud_tone():
+    # Nothing has been learned about the background yet, so only the absolute
+    # threshold applies
+    for seconds in (0.032, 0.6):
+        gate = EnergyGate()
+        assert not gate.is_silent(_tone(0.3, seconds), RATE)
+        assert gate.noise_floor is None
+
+
+def test_speech_level_tone_is_not_silent():
+    gate = EnergyGate()
+    gate.is_silent(_noise(0.0005), RATE)
+    assert gate.noise_floor is not None
+    assert not gate.is_silent(_tone(0.3), RATE)
+
+
+def test_noise_near_the_floor_is_silent():
+    gate = EnergyGate()
+    # About -66 dBFS, which teaches the gate the noise floor
+    assert gate.is_silent(_noise(0.0005), RATE)
+    # About -60 dBFS: above the absolute threshold but within the margin
+    for seed in range(1, 4):
+        assert gate.is_silent(_noise(0.001, seed=seed), RATE)
+    assert gate.n_windows == gate.n_skipped == 4
+
+
+def test_loud_audio_does_not_raise_the_floor():
+    gate = EnergyGate()
+    gate.is_silent(_noise(0.0005), RATE)
+    floor = gate.noise_floor
+    for _ in range(10):
+        gate.is_silent(_tone(0.3), RATE)
+    assert gate.noise_floor == floor
+
+
+def test_noise_floor_rises_slowly():
+    options = EnergyGateOptions(noise_floor_rise_db=3.0)
+    gate = EnergyGate(options)
+    gate.is_silent(_noise(0.00005), RATE)
+    floor = gate.noise_floor
+    assert floor is not None
+    gate.is_silent(_noise(0.0005, seed=1), RATE)
+    assert gate.noise_floor is not None
+    assert floor < gate.noise_floor <= floor + options.noise_floor_rise_db * 0.5 + 1e-6
+
+
+def test_int16_and_float32_agree():
+    gates = {dtype: EnergyGate() for dtype in (np.float32, np.int16)}
+    for audio in (_noise(0.0005), _tone(0.3), _noise(0.001, seed=1)):
+        results = [
+            gate.is_silent(
+                audio if dtype == np.float32 else (audio * 32767).astype(np.int16),
+                RATE,
+            )
+            for dtype, gate in gates.items()
+        ]
+        assert results[0] == results[1]
+    assert [gate.n_skipped for gate in gates.values()] == [2, 2]
+
+
+def test_reset_keeps_the_noise_floor():
+    gate = EnergyGate()
+    gate.is_silent(_noise(0.0005), RATE)
+    floor = gate.noise_floor
+    gate.reset()
+    assert gate.noise_floor == floor
@@ -0,0 +1,83 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastrtc.executors import InstrumentedExecutor, create_executor
+from fastrtc.webrtc_connection_mixin import ConnectionOptions, WebRTCConnectionMixin
+
+
+def test_stats_count_waiting_and_completed_calls():
+    executor = create_executor(1)
+    release = threading.Event()
+    try:
+        blocking = executor.submit(release.wait)
+        queued = [executor.submit(lambda i=i: i) for i in range(3)]
+        assert executor.stats().queue_depth == 3
+        release.set()
+        assert [f.result() for f in queued] == [0, 1, 2]
+        blocking.result()
+        stats = executor.stats()
+        assert stats.queue_depth == 0
+        assert stats.completed == 4
+        assert stats.max_wait >= stats.mean_wait > 0
+    finally:
+        executor.shutdown()
+
+
+def test_rejected_calls_leave_the_queue():
+    executor = create_executor(1)
+    executor.shutdown()
+    with pytest.raises(RuntimeError):
+        executor.submit(print)
+    assert executor.stats().queue_depth == 0
+
+
+def _mixin(**options) -> WebRTCConnectionMixin:
+    mixin = WebRTCConnectionMixin()
+    mixin._options = ConnectionOptions(**options)
+    return mixin
+
+
+def test_default_executor():
+    assert _mixin().get_executor("a") is None
+
+
+def test_stream_executor_is_shared():
+    mixin = _mixin(executor="stream", executor_workers=2)
+    executor = mixin.get_executor("a")
+    assert isinstance(executor, InstrumentedExecutor)
+    assert mixin.get_executor("b") is executor
+    assert list(mixin.executor_stats()) == ["stream"]
+    executor.shutdown()
+
+
+def test_connection_executors_are_separate():
+    mixin = _mixin(executor="connection")
+    a, b = mixin.get_executor("a", "audio"), mixin.get_executor("b", "audio")
+    assert a is not b
+    assert mixin.get_executor("a", "audio") is a
+    assert set(mixin.executor_stats()) == {"a-audio", "b-audio"}
+    for executor in (a, b):
+        assert executor is not None
+        executor.shutdown()
+
+
+def test_connection_tracks_get_their_own_executor():
+    mixin = _mixin(executor="connection")
+    audio, video = mixin.get_executor("a", "audio"), mixin.get_executor("a", "video")
+    assert audio is not video
+    mixin.release_executor("a")
+    assert mixin.executor_stats() == {}
+    for executor in (audio, video):
+        assert executor is not None
+        with pytest.raises(RuntimeError):
+            executor.submit(print)
+
+
+def test_custom_executor_is_instrumented():
+    pool = ThreadPoolExecutor(1)
+    executor = _mixin(executor=pool).get_executor("a")
+    assert isinstance(executor, InstrumentedExecutor)
+    assert executor.executor is pool
+    assert executor.submit(lambda: 42).result() == 42
+    pool.shutdown()
@@ -0,0 +1,50 @@
+import asyncio
+
+from aiortc import AudioStreamTrack, RTCPeerConnection
+from fastrtc.input_decoding import SUPPORTED, decode_in_layout
+
+
+async def _receive_layout(layout: str | None) -> str:
+    sender = RTCPeerConnection()
+    receiver = RTCPeerConnection()
+    received: asyncio.Future = asyncio.get_running_loop().create_future()
+
+    @receiver.on("track")
+    def on_track(track):
+        if layout is not None:
+            assert decode_in_layout(track, layout)  # type: ignore
+
+        async def first_frame():
+            frame = await track.recv()
+            received.set_result(frame.layout.name)
+
+        asyncio.create_task(first_frame())
+
+    sender.addTrack(AudioStreamTrack())
+    try:
+        await sender.setLocalDescription(await sender.createOffer())
+        await receiver.setRemoteDescription(sender.localDescription)
+        await receiver.setLocalDescription(await receiver.createAnswer())
+        await sender.setRemoteDescription(receiver.localDescription)
+        return await asyncio.wait_for(received, 10)
+    finally:
+        await sender.close()
+        await receiver.close()
+
+
+def test_aiortc_receiver_internals_are_supported():
+    # Fails when aiortc changes how its receivers create decoders, in which case
+    # input_decoding has to be updated
+    assert SUPPORTED
+
+
+def test_decode_in_layout_mono():
+    assert asyncio.run(_receive_layout("mono")) == "mono"
+
+
+def test_other_tracks_decode_as_stereo():
+    assert asyncio.run(_receive_layout(None)) == "stereo"
+
+
+def test_decode_in_layout_rejects_local_tracks():
+    assert not decode_in_layout(AudioStreamTrack(), "mono")
@@ -0,0 +1,199 @@
+import asyncio
+from fractions import Fraction
+
+import av
+import numpy as np
+from fastrtc import ReplyOnPause, StreamHandler
+from fastrtc.interruption import CancellationToken, fade_out, is_cancelled
+from fastrtc.jitter_buffer import JitterBufferOptions
+from fastrtc.tracks import AudioCallback
+from fastrtc.websocket import WebSocketHandler
+
+RATE = 48000
+SAMPLES = 960
+
+
+class Handler(StreamHandler):
+    def receive(self, frame):
+        pass
+
+    def emit(self):
+        return None
+
+    def copy(self):
+        return Handler()
+
+
+def _frame(value: int = 1000) -> av.AudioFrame:
+    frame = av.AudioFrame.from_ndarray(
+        np.full((1, SAMPLES), value, dtype=np.int16), format="s16", layout="mono"
+    )
+    frame.sample_rate = RATE
+    frame.time_base = Fraction(1, RATE)
+    frame.pts = 0
+    return frame
+
+
+def _marked(token: CancellationToken, n: int) -> list[av.AudioFrame]:
+    frames = [_frame() for _ in range(n)]
+    for frame in frames:
+        token.mark(frame)
+    return frames
+
+
+def test_cancelling_a_token_cancels_its_frames():
+    token = CancellationToken()
+    frames = _marked(token, 3)
+    other = _marked(CancellationToken(), 1)[0]
+    assert not any(is_cancelled(f) for f in frames)
+    token.cancel()
+    cancelled_at = token.cancelled_at
+    token.cancel()
+    assert token.cancelled_at == cancelled_at
+    assert all(is_cancelled(f) for f in frames)
+    assert not is_cancelled(other)
+    assert not is_cancelled(_frame())
+    assert not is_cancelled(None)
+
+
+def test_fade_out_ramps_to_silence():
+    faded = fade_out([_frame(10000) for _ in range(4)], 30)
+    # Whole frames covering 30 ms
+    assert len(faded) == 2
+    samples = np.concatenate([f.to_ndarray().reshape(-1) for f in faded])
+    assert samples[0] == 10000
+    assert samples[-1] == 0
+    assert np.all(np.diff(samples.astype(np.int32)) <= 0)
+
+
+def test_fade_out_stops_at_packets():
+    packet = av.Packet(b"\0")
+    assert fade_out([packet, _frame()], 100) == []  # type: ignore
+
+
+def _callback(jitter_buffer: bool = False) -> AudioCallback:
+    return AudioCallback(
+        None,  # type: ignore
+        Handler(),
+        jitter_buffer=JitterBufferOptions() if jitter_buffer else None,
+    )
+
+
+def test_clear_queue_flushes_the_reply():
+    async def main():
+        callback = _callback()
+        old_token = callback.reply_token
+        for frame in _marked(old_token, 5):
+            callback.queue.put_nowait(frame)
+        callback.clear_queue()
+        return callback, old_token
+
+    callback, old_token = asyncio.run(main())
+    assert old_token.cancelled
+    assert callback.reply_token is not old_token
+    assert callback.queue.empty()
+    assert callback.interrupt_stats.interruptions == 1
+
+
+def test_clear_queue_keeps_the_next_reply_and_fades():
+    async def main():
+        callback = _callback(jitter_buffer=True)
+        old_token = callback.reply_token
+        for frame in _marked(old_token, 5):
+            callback.queue.put_nowait(frame)
+        callback.clear_queue(fade_out_ms=20)
+        # A frame of the reply after the interruption
+        callback.queue.put_nowait(_marked(callback.reply_token, 1)[0])
+        played = []
+        while not callback.queue.empty():
+            played.append(await callback.jitter_buffer.get())  # type: ignore
+        return played
+
+    played = asyncio.run(main())
+    assert len(played) == 2
+    faded, next_reply = played
+    assert faded.to_ndarray()[0, -1] == 0
+    assert not is_cancelled(faded)
+    assert next_reply.to_ndarray()[0, 0] == 1000
+
+
+def test_jitter_buffer_drops_cancelled_frames():
+    async def main():
+        callback = _callback(jitter_buffer=True)
+        token = callback.reply_token
+        for frame in _marked(token, 3):
+            callback.queue.put_nowait(frame)
+        token.cancel()
+        callback.queue.put_nowait(_frame(7))
+        return await callback.jitter_buffer.get()  # type: ignore
+
+    assert asyncio.run(main()).to_ndarray()[0, 0] == 7
+
+
+class FakeWebSocket:
+    def __init__(self, error: Exception | None = None):
+        self.error = error
+        self.sent = []
+
+    async def send_json(self, data):
+        if self.error is not None:
+            raise self.error
+        self.sent.append(data)
+
+
+def _websocket_handler(websocket: FakeWebSocket) -> WebSocketHandler:
+    handler = Handler()
+    handler.phone_mode = True
+    ws_handler = WebSocketHandler(handler, None, None, lambda _: None)  # type: ignore
+    ws_handler.websocket = websocket  # type: ignore
+    ws_handler.stream_id = "stream"
+    return ws_handler
+
+
+def test_websocket_clear_flushes_and_tells_twilio():
+    async def main():
+        ws_handler = _websocket_handler(FakeWebSocket())
+        ws_handler.loop = asyncio.get_running_loop()
+        old_token = ws_handler.reply_token
+        ws_handler.queue.put_nowait(("audio",))
+        ws_handler._clear_queue()
+        await asyncio.gather(*ws_handler._clear_tasks)
+        return ws_handler, old_token
+
+    ws_handler, old_token = asyncio.run(main())
+    assert old_token.cancelled
+    assert ws_handler.queue.empty()
+    assert ws_handler.websocket.sent == [{"event": "clear", "streamSid": "stream"}]  # type: ignore
+    assert not ws_handler._clear_tasks
+
+
+def test_websocket_clear_survives_a_closed_socket(caplog):
+    async def main():
+        ws_handler = _websocket_handler(FakeWebSocket(RuntimeError("closed")))
+        ws_handler.loop = asyncio.get_running_loop()
+        ws_handler._clear_queue()
+        await asyncio.gather(*ws_handler._clear_tasks)
+
+    asyncio.run(main())
+    assert "Could not send clear message" in caplog.text
+
+
+class AlwaysPause(ReplyOnPause):
+    def determine_pause(self, audio, sampling_rate, state):
+        return True
+
+
+def test_a_pause_flushes_the_output_once():
+    handler = AlwaysPause(lambda audio: iter(()), model=object())  # type: ignore
+    clears = []
+    handler._clear_queue = lambda fade_out_ms=0: clears.append(fade_out_ms)
+    frame = (48000, np.zeros((1, 960), dtype=np.int16))
+    state = handler.state
+    for _ in range(5):
+        handler.receive(frame)
+    # Later frames of the same pause must not cancel the reply being started
+    assert len(clears) == 1
+    assert handler.state is state and state.pause_handled
+    handler.state = state.new()
+    handler.receive(frame)
+    assert len(clears) == 2
@@ -0,0 +1,94 @@
+import asyncio
+from fractions import Fraction
+
+import av
+import numpy as np
+from fastrtc.jitter_buffer import JitterBufferOptions, OutputJitterBuffer
+
+RATE = 48000
+SAMPLES = 960  # 20 ms
+
+
+def _frame(value: int = 1000, pts: int = 0) -> av.AudioFrame:
+    frame = av.AudioFrame.from_ndarray(
+        np.full((1, SAMPLES), value, dtype=np.int16), format="s16", layout="mono"
+    )
+    frame.sample_rate = RATE
+    frame.time_base = Fraction(1, RATE)
+    frame.pts = pts
+    return frame
+
+
+def _buffer(**options) -> OutputJitterBuffer:
+    return OutputJitterBuffer(asyncio.Queue(), JitterBufferOptions(**options))
+
+
+def test_preroll_waits_for_buffered_audio():
+    async def main():
+        buffer = _buffer(preroll_ms=60)
+        loop = asyncio.get_running_loop()
+        buffer.queue.put_nowait(_frame())
+        start = loop.time()
+        # The rest of the pre-roll arrives 30 ms later
+        loop.call_later(0.03, buffer.queue.put_nowait, _frame())
+        loop.call_later(0.03, buffer.queue.put_nowait, _frame())
+        await buffer.get()
+        return loop.time() - start
+
+    assert 0.025 <= asyncio.run(main()) < 0.06
+
+
+def test_preroll_gives_up_after_preroll_ms():
+    async def main():
+        buffer = _buffer(preroll_ms=50)
+        buffer.queue.put_nowait(_frame())
+        start = asyncio.get_running_loop().time()
+        await buffer.get()
+        return asyncio.get_running_loop().time() - start
+
+    assert 0.04 <= asyncio.run(main()) < 0.1
+
+
+def test_frames_are_restamped_on_a_continuous_timeline():
+    async def main():
+        buffer = _buffer(preroll_ms=0)
+        # Handlers may stamp their frames arbitrarily
+        for pts in (5000, 0, 123):
+            buffer.queue.put_nowait(_frame(pts=pts))
+        return [(await buffer.get()).pts for _ in range(3)]
+
+    assert asyncio.run(main()) == [0, SAMPLES, 2 * SAMPLES]
+
+
+def test_gaps_are_filled_with_silence_and_grow_the_preroll():
+    async def main():
+        buffer = _buffer(preroll_ms=20, max_comfort_ms=1000)
+        buffer.queue.put_nowait(_frame())
+        frames = [await buffer.get()]
+        # Nothing queued: the next two frames are comfort noise
+        frames += [await buffer.get(), await buffer.get()]
+        buffer.queue.put_nowait(_frame())
+        frames.append(await buffer.get())
+        return buffer, frames
+
+    buffer, frames = asyncio.run(main())
+    assert [f.pts for f in frames] == [i * SAMPLES for i in range(4)]
+    assert [int(np.abs(f.to_ndarray()).max()) for f in frames] == [1000, 0, 0, 1000]
+    assert buffer.stats.comfort_frames == 2
+    assert buffer.stats.underruns == 1
+    assert buffer.stats.preroll_ms == 20 + 40
+
+
+def test_long_gap_ends_the_reply():
+    async def main():
+        buffer = _buffer(preroll_ms=0, max_comfort_ms=40)
+        buffer.queue.put_nowait(_frame())
+        await buffer.get()
+        await buffer.get()
+        await buffer.get()
+        return buffer
+
+    buffer = asyncio.run(main())
+    # The reply is over, the next frame starts with a new pre-roll
+    assert buffer._start is None
+    assert buffer.stats.underruns == 0
@@ -0,0 +1,140 @@
+import asyncio
+
+import av
+import numpy as np
+import pytest
+from fastrtc.utils import OpusPacket, _split_frames, player_worker_decode
+
+RATE = 48000
+FRAME_SIZE = 960
+
+
+def _tone(n: int) -> np.ndarray:
+    return (10000 * np.sin(np.arange(n) / 7)).astype(np.int16)
+
+
+def _play(chunks, output_layout="mono", output_codec=None) -> list:
+    items = iter(chunks)
+
+    async def next_frame():
+        return next(items, None)
+
+    async def main():
+        queue = asyncio.Queue()
+        await player_worker_decode(
+            next_frame,
+            queue,
+            asyncio.Event(),
+            None,
+            None,
+            True,
+            RATE,
+            FRAME_SIZE,
+            output_layout=output_layout,
+            output_codec=output_codec,
+        )
+        frames = []
+        while (frame := queue.get_nowait()) is not None:
+            frames.append(frame)
+        return frames
+
+    return asyncio.run(main())
+
+
+def _samples(frames: list[av.AudioFrame]) -> np.ndarray:
+    return np.concatenate([f.to_ndarray().reshape(-1) for f in frames])
+
+
+def test_split_frames_cuts_views_of_the_array():
+    audio = _tone(3 * FRAME_SIZE)
+    frames = _split_frames(audio.reshape(1, -1), "mono", "mono", FRAME_SIZE)
+    assert frames is not None and len(frames) == 3
+    assert all(f.shape == (1, FRAME_SIZE) for f in frames)
+    assert all(np.shares_memory(f, audio) for f in frames)
+    np.testing.assert_array_equal(np.concatenate(frames, axis=1)[0], audio)
+
+
+@pytest.mark.parametrize(
+    "audio,layout,output_layout",
+    [
+        (_tone(1000), "mono", "mono"),
+        (_tone(FRAME_SIZE).astype(np.float32), "mono", "mono"),
+        (_tone(FRAME_SIZE), "mono", "stereo"),
+        (_tone(2 * FRAME_SIZE).reshape(2, -1), "stereo", "stereo"),
+    ],
+)
+def test_split_frames_leaves_other_arrays_to_the_resampler(
+    audio, layout, output_layout
+):
+    assert _split_frames(audio, layout, output_layout, FRAME_SIZE) is None
+
+
+@pytest.mark.parametrize("output_layout", ["mono", "stereo"])
+def test_fast_path_matches_the_resampler(output_layout):
+    channels = 2 if output_layout == "stereo" else 1
+    audio = _tone(4 * FRAME_SIZE * channels).reshape(1, -1)
+    fast = _play([(RATE, audio, output_layout)], output_layout)
+    # Float samples always go through the resampler, as planar fltp
+    planar = np.ascontiguousarray(audio.reshape(-1, channels).T, np.float32) / 32768
+    resampled = _play([(RATE, planar, output_layout)], output_layout)
+    assert [f.samples for f in fast] == [f.samples for f in resampled]
+    assert [f.pts for f in fast] == [f.pts for f in resampled]
+    assert all(f.layout.name == output_layout for f in fast + resampled)
+    np.testing.assert_array_equal(_samples(fast), audio[0])
+    assert np.abs(_samples(resampled) - audio[0].astype(np.int32)).max() <= 1
+
+
+def test_lengths_that_are_not_a_multiple_of_the_frame_fall_back():
+    audio = _tone(2 * FRAME_SIZE + 100)
+    frames = _play([(RATE, audio)])
+    # The resampler holds the last 100 samples until the end of the reply
+    assert [f.samples for f in frames] == [FRAME_SIZE, FRAME_SIZE, 100]
+    np.testing.assert_array_equal(_samples(frames), audio)
+
+
+def test_samples_held_by_the_resampler_play_before_the_fast_path():
+    first, second = _tone(100), _tone(FRAME_SIZE) // 2
+    frames = _play([(RATE, first), (RATE, second)])
+    np.testing.assert_array_equal(_samples(frames), np.concatenate([first, second]))
+    assert [f.pts for f in frames] == [0, 100]
+
+
+def _opus_packets(n: int) -> list[bytes]:
+    encoder = av.CodecContext.create("libopus", "w")
+    encoder.sample_rate = RATE  # type: ignore
+    encoder.layout = "mono"  # type: ignore
+    encoder.format = av.AudioFormat("s16")  # type: ignore
+    audio = _tone(n * FRAME_SIZE)
+    packets = []
+    for i in range(n):
+        frame = av.AudioFrame.from_ndarray(
+            audio[i * FRAME_SIZE : (i + 1) * FRAME_SIZE].reshape(1, -1),
+            format="s16",
+            layout="mono",
+        )
+        frame.sample_rate = RATE
+        frame.pts = i * FRAME_SIZE
+        packets += [bytes(p) for p in encoder.encode(frame)]  # type: ignore
+    return packets
+
+
+def test_opus_packets_are_passed_through():
+    data = _opus_packets(3)
+    chunks = [OpusPacket(data[0]), [OpusPacket(d) for d in data[1:]]]
+    packets = _play(chunks, output_codec=lambda: "audio/opus")
+    assert all(isinstance(p, av.Packet) for p in packets)
+    assert [bytes(p) for p in packets] == data
+    assert [p.pts for p in packets] == [0, FRAME_SIZE, 2 * FRAME_SIZE]
+    assert all(p.duration == FRAME_SIZE for p in packets)
+
+
+def test_opus_packets_are_decoded_for_other_codecs():
+    data = _opus_packets(3)
+    frames = _play(
+        [[OpusPacket(d) for d in data]],
+        output_layout="stereo",
+        output_codec=lambda: "audio/PCMU",
+    )
+    assert all(isinstance(f, av.AudioFrame) for f in frames)
+    assert all(f.layout.name == "stereo" for f in frames)
+    assert sum(f.samples for f in frames) > 0
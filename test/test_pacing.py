@@ -0,0 +1,72 @@
+import asyncio
+import time
+
+from fastrtc.pacing import PacingClock, PacingStats, get_pacing_clock
+
+
+def test_frames_are_released_at_their_deadline():
+    async def main():
+        clock = PacingClock(tick=0.01)
+        start = clock.now()
+        released = {}
+
+        async def wait(name: str, delay: float):
+            await clock.wait_until(start + delay)
+            released[name] = clock.now() - start
+
+        # Submitted out of order, the earlier deadline must wake the clock
+        await asyncio.gather(wait("late", 0.1), wait("early", 0.03))
+        return released, clock.n_ticks
+
+    released, n_ticks = asyncio.run(main())
+    assert released["early"] < released["late"]
+    assert 0.02 <= released["early"] < 0.08
+    assert 0.09 <= released["late"] < 0.15
+    assert n_ticks == 2
+
+
+def test_many_tracks_share_ticks():
+    async def main():
+        clock = PacingClock(tick=0.01)
+        deadline = clock.now() + 0.05
+        await asyncio.gather(*(clock.wait_until(deadline) for _ in range(50)))
+        return clock.n_ticks
+
+    assert asyncio.run(main()) == 1
+
+
+def test_past_deadlines_are_released_immediately_and_recorded():
+    async def main():
+        clock = PacingClock(tick=0.01)
+        stats = PacingStats()
+        start = time.monotonic()
+        await clock.wait_until(clock.now() - 0.05, stats)
+        return time.monotonic() - start, stats
+
+    elapsed, stats = asyncio.run(main())
+    assert elapsed < 0.01
+    assert stats.frames == stats.late_frames == 1
+    assert stats.max_lateness >= 0.05
+
+
+def test_no_drift_over_many_frames():
+    async def main():
+        clock = PacingClock(tick=0.005)
+        stats = PacingStats()
+        start = clock.now()
+        for i in range(1, 51):
+            await clock.wait_until(start + i * 0.01, stats)
+        return clock.now() - start, stats
+
+    elapsed, stats = asyncio.run(main())
+    assert stats.frames == 50
+    assert 0.49 <= elapsed < 0.6
+
+
+def test_clock_is_shared_per_loop():
+    async def main():
+        return get_pacing_clock(), get_pacing_clock()
+
+    first, second = asyncio.run(main())
+    assert first is second
+    assert asyncio.run(main())[0] is not first
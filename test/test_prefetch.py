@@ -0,0 +1,132 @@
+import threading
+import time
+from contextvars import ContextVar
+
+import pytest
+from fastrtc.utils import PrefetchGenerator, PrefetchStats
+
+
+def test_chunks_keep_their_order():
+    prefetch = PrefetchGenerator(iter(range(10)), max_prefetch=3)
+    assert list(prefetch) == list(range(10))
+    assert prefetch.stats.chunks == 10
+    with pytest.raises(StopIteration):
+        next(prefetch)
+
+
+def test_runs_at_most_max_prefetch_chunks_ahead():
+    produced = []
+
+    def gen():
+        for i in range(10):
+            produced.append(i)
+            yield i
+
+    prefetch = PrefetchGenerator(gen(), max_prefetch=2)
+    assert next(prefetch) == 0
+    time.sleep(0.1)
+    # The consumed chunk freed a slot for one more
+    assert len(produced) == 3
+    prefetch.close()
+
+
+def test_exceptions_reach_the_consumer_in_order():
+    def gen():
+        yield 1
+        yield 2
+        raise ValueError("tts failed")
+
+    prefetch = PrefetchGenerator(gen(), max_prefetch=4)
+    assert next(prefetch) == 1
+    assert next(prefetch) == 2
+    with pytest.raises(ValueError, match="tts failed"):
+        next(prefetch)
+    with pytest.raises(StopIteration):
+        next(prefetch)
+
+
+def test_close_stops_the_generator_mid_stream():
+    step = threading.Event()
+    closed = threading.Event()
+    produced = []
+
+    def gen():
+        try:
+            for i in range(10):
+                step.wait()
+                produced.append(i)
+                yield i
+        finally:
+            closed.set()
+
+    prefetch = PrefetchGenerator(gen(), max_prefetch=1)
+    step.set()
+    assert next(prefetch) == 0
+    # The worker is now inside a step, which finishes before the generator closes
+    step.clear()
+    prefetch.close()
+    step.set()
+    assert closed.wait(1)
+    assert len(produced) <= 2
+    with pytest.raises(StopIteration):
+        next(prefetch)
+
+
+def test_close_wakes_a_worker_waiting_for_a_slot():
+    closed = threading.Event()
+
+    def gen():
+        try:
+            yield from range(10)
+        finally:
+            closed.set()
+
+    prefetch = PrefetchGenerator(gen(), max_prefetch=1)
+    assert next(prefetch) == 0
+    time.sleep(0.05)
+    prefetch.close()
+    assert closed.wait(1)
+
+
+def test_underruns_are_counted_after_the_first_chunk():
+    def gen():
+        # Waiting for the first chunk is not an underrun
+        time.sleep(0.05)
+        yield 0
+        yield 1
+        time.sleep(0.05)
+        yield 2
+
+    stats = PrefetchStats()
+    prefetch = PrefetchGenerator(gen(), max_prefetch=2, stats=stats)
+    assert next(prefetch) == 0
+    time.sleep(0.01)
+    assert next(prefetch) == 1
+    assert stats.underruns == 0
+    assert next(prefetch) == 2
+    assert stats.underruns == 1
+    assert stats.underrun_time > 0.01
+    list(prefetch)
+    assert stats.chunks == 3
+
+
+def test_stats_can_be_shared_by_several_replies():
+    stats = PrefetchStats()
+    for _ in range(2):
+        list(PrefetchGenerator(iter(range(3)), max_prefetch=2, stats=stats))
+    assert stats.chunks == 6
+
+
+def test_generator_runs_in_the_callers_context():
+    var: ContextVar[str] = ContextVar("var", default="unset")
+    var.set("channel")
+
+    def gen():
+        yield var.get()
+
+    assert list(PrefetchGenerator(gen(), max_prefetch=1)) == ["channel"]
+
+
+def test_max_prefetch_must_be_positive():
+    with pytest.raises(ValueError):
+        PrefetchGenerator(iter([]), max_prefetch=0)
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from fastrtc.resampler import StreamingResampler, resample_audio
+
+
+def _sine(rate: int, seconds: float, freq: float = 440.0) -> np.ndarray:
+    t = np.arange(int(rate * seconds)) / rate
+    return (0.5 * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+@pytest.mark.parametrize("input_rate,output_rate", [(48000, 16000), (24000, 48000)])
+def test_chunks_match_one_shot_resampling(input_rate, output_rate):
+    audio = _sine(input_rate, 1.0)
+    resampler = StreamingResampler(input_rate, output_rate, dtype=np.float32)
+    # Uneven and empty chunks, so samples are carried over between calls
+    chunks = np.array_split(audio, [137, 960, 2000, 2000, 2001, 7000])
+    streamed = np.concatenate(
+        [resampler.resample(chunk) for chunk in chunks] + [resampler.flush()]
+    )
+    expected = resample_audio(audio, input_rate, output_rate)
+
+    assert len(streamed) == len(expected)
+    assert abs(len(streamed) - len(audio) * output_rate / input_rate) <= 1
+    np.testing.assert_allclose(streamed, expected, atol=1e-5)
+
+
+def test_flush_resets_the_stream():
+    resampler = StreamingResampler(48000, 16000)
+    resampler.resample(np.ones(1000, dtype=np.int16))
+    resampler.flush()
+    assert len(resampler.flush()) == 0
+
+
+def test_same_rate_only_converts_dtype():
+    resampler = StreamingResampler(16000, 16000, dtype=np.float32)
+    out = resampler.resample(np.array([16384, -32768], dtype=np.int16))
+    assert out.dtype == np.float32
+    np.testing.assert_array_equal(out, [0.5, -1.0])
+
+
+def test_unsupported_dtype():
+    with pytest.raises(TypeError):
+        StreamingResampler(48000, 16000, dtype=np.float64)
@@ -0,0 +1,105 @@
+import numpy as np
+from fastrtc import AlgoOptions, ReplyOnPause
+from fastrtc.pause_detection.silero import SileroVADModel, SileroVadOptions
+
+RATE = 48000
+FRAME = 960
+
+
+class FakeSession:
+    """Scores a window as speech when it is loud and counts the calls in the state."""
+
+    def __init__(self):
+        self.states: list[float] = []
+
+    def run(self, _, inputs):
+        x = inputs["input"]
+        self.states.append(float(inputs["h"][0, 0, 0]))
+        prob = (np.sqrt((x**2).mean(axis=1, keepdims=True)) > 0.05).astype(np.float32)
+        return prob, inputs["h"] + 1, inputs["c"]
+
+
+def _model() -> SileroVADModel:
+    # The ONNX model is not loaded, only the session is replaced
+    model = object.__new__(SileroVADModel)
+    model.session = FakeSession()  # type: ignore
+    model.scheduler = None
+    return model
+
+
+def _frames(seconds: float, loud: bool) -> list[np.ndarray]:
+    n = int(RATE * seconds)
+    audio = (10000 * np.sin(np.arange(n) / 7) if loud else np.zeros(n)).astype(np.int16)
+    return [audio[i : i + FRAME] for i in range(0, n, FRAME)]
+
+
+OPTIONS = SileroVadOptions(window_size_samples=512, min_silence_duration_ms=100)
+
+
+def test_state_is_carried_across_windows():
+    model = _model()
+    stream = model.create_stream(OPTIONS)
+    for frame in _frames(1.0, loud=True):
+        stream.process((RATE, frame))
+    states = model.session.states  # type: ignore
+    # Each window is scored once, with the state left by the previous one,
+    # although 20 ms frames do not line up with 512 sample windows
+    assert len(states) in (30, 31)
+    assert states == list(range(len(states)))
+    n_scored = len(states)
+    stream.reset()
+    stream.process((RATE, np.concatenate(_frames(0.1, loud=True))))
+    assert states[n_scored:] == [0, 1, 2]
+
+
+def test_frame_size_does_not_change_the_result():
+    frames = _frames(0.5, loud=True) + _frames(0.5, loud=False)
+    small = _model().create_stream(OPTIONS)
+    small_results = [small.process((RATE, frame)) for frame in frames]
+    large = _model().create_stream(OPTIONS)
+    result = large.process((RATE, np.concatenate(frames)))
+    assert result.end_of_speech
+    assert sum(r.end_of_speech for r in small_results) == 1
+    last = small_results[-1]
+    assert (last.speech_prob, last.speech_duration, last.speaking) == (
+        result.speech_prob,
+        result.speech_duration,
+        result.speaking,
+    )
+
+
+def test_speech_segments_end_after_min_silence():
+    stream = _model().create_stream(OPTIONS)
+    results = [stream.process((RATE, f)) for f in _frames(0.5, loud=True)]
+    assert results[-1].speaking and results[-1].speech_prob == 1.0
+    assert results[-1].speech_duration > 0.4
+    results = [stream.process((RATE, f)) for f in _frames(0.7, loud=False)]
+    assert sum(r.end_of_speech for r in results) == 1
+    assert not results[-1].speaking
+    # The trailing window holds only silence
+    assert results[-1].speech_duration == 0
+
+
+def test_determine_pause_streaming():
+    handler = ReplyOnPause(
+        lambda audio: iter(()),
+        algo_options=AlgoOptions(streaming_vad=True),
+        model_options=OPTIONS,
+        model=_model(),
+    )
+    state = handler.state
+    quiet = _frames(0.3, loud=False)
+    assert not any(handler.determine_pause_streaming(f, RATE, state) for f in quiet)
+    assert not state.started_talking
+    speech = _frames(0.5, loud=True)
+    assert not any(handler.determine_pause_streaming(f, RATE, state) for f in speech)
+    assert state.started_talking
+    pauses = [
+        handler.determine_pause_streaming(f, RATE, state)
+        for f in _frames(0.6, loud=False)
+    ]
+    assert pauses[-1] and not pauses[0]
+    # The utterance starts with the buffered audio before speech was detected,
+    # at most one audio_chunk_duration of it
+    assert len(state.stream) > RATE * 1.1
+    assert len(state.stream) <= RATE * (0.6 + 0.5 + 0.6)
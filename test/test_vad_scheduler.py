@@ -0,0 +1,110 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+from fastrtc.pause_detection import VADBatchScheduler
+
+
+def _state(value: float = 0.0):
+    h = np.full((2, 1, 64), value, dtype=np.float32)
+    return h, h.copy()
+
+
+def _run(x, h, c, sr):
+    # Probability and state rows derived from the input rows, so every caller
+    # can check that it got its own slice back
+    return x[:, :1] * 2, h + x[:, :1].T[..., None], c - 1
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = VADBatchScheduler(_run, max_wait_ms=20)
+    scheduler.start()
+    yield scheduler
+    scheduler.stop()
+
+
+def test_results_are_scattered_back_in_order(scheduler):
+    results = {}
+
+    def submit(i: int):
+        for step in range(5):
+            x = np.full((1, 512), i, dtype=np.float32)
+            out, (h, c) = scheduler.submit(x, _state(step), 16000).result()
+            results[i, step] = (out[0, 0], h[0, 0, 0], c[0, 0, 0])
+
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for (i, step), (out, h, c) in results.items():
+        assert out == 2 * i
+        assert h == step + i
+        assert c == step - 1
+    assert scheduler.mean_batch_size > 1
+
+
+def test_exceptions_reach_every_waiter():
+    started = threading.Event()
+    release = threading.Event()
+
+    def run(x, h, c, sr):
+        if x[0, 0] == 0:
+            # Hold the worker so the next requests are batched together
+            started.set()
+            release.wait()
+            return _run(x, h, c, sr)
+        raise ValueError("model failed")
+
+    scheduler = VADBatchScheduler(run, max_wait_ms=1)
+    scheduler.start()
+    try:
+        first = scheduler.submit(np.zeros((1, 512), np.float32), _state(), 16000)
+        started.wait()
+        futures = [
+            scheduler.submit(np.ones((1, 512), np.float32), _state(), 16000)
+            for _ in range(3)
+        ]
+        release.set()
+        first.result()
+        for future in futures:
+            with pytest.raises(ValueError, match="model failed"):
+                future.result()
+        assert scheduler.n_batches == 1
+    finally:
+        scheduler.stop()
+
+
+def test_single_caller_does_not_wait():
+    scheduler = VADBatchScheduler(_run, max_wait_ms=500)
+    scheduler.start()
+    try:
+        start = time.monotonic()
+        for _ in range(3):
+            scheduler.submit(np.ones((1, 512), np.float32), _state(), 16000).result()
+        assert time.monotonic() - start < 0.5
+    finally:
+        scheduler.stop()
+
+
+def test_windows_of_different_sizes_run_separately(scheduler):
+    started = threading.Event()
+    release = threading.Event()
+
+    def run(x, h, c, sr):
+        started.set()
+        release.wait()
+        return _run(x, h, c, sr)
+
+    scheduler.run = run
+    first = scheduler.submit(np.ones((1, 512), np.float32), _state(), 16000)
+    started.wait()
+    small = scheduler.submit(np.ones((1, 256), np.float32), _state(), 8000)
+    large = scheduler.submit(np.ones((1, 512), np.float32), _state(), 16000)
+    release.set()
+    for future in (first, small, large):
+        assert future.result()[0][0, 0] == 2
+    assert scheduler.n_batches == 3
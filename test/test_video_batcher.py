@@ -0,0 +1,113 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from fastrtc import VideoBatcher
+
+
+def _frame(value: int, shape=(4, 4, 3)) -> np.ndarray:
+    return np.full(shape, value, dtype=np.uint8)
+
+
+def test_results_are_scattered_back_in_order():
+    batcher = VideoBatcher(lambda frames: frames[:, 0, 0, 0] * 2, max_wait_ms=20)
+    try:
+        with ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(lambda i: batcher(_frame(i)), range(32)))
+        assert results == [2 * i for i in range(32)]
+        assert batcher.n_frames == 32
+        assert batcher.mean_batch_size > 1
+    finally:
+        batcher.stop()
+
+
+def _blocked_batcher(run):
+    # The first frame holds the worker, so the following ones form one batch
+    started = threading.Event()
+    release = threading.Event()
+
+    def blocking_run(frames):
+        if frames[0, 0, 0, 0] == 0:
+            started.set()
+            release.wait()
+            return list(frames)
+        return run(frames)
+
+    batcher = VideoBatcher(blocking_run, max_wait_ms=1)
+    first = batcher.submit(_frame(0))
+    started.wait()
+    return batcher, first, release
+
+
+def test_exceptions_reach_every_waiter():
+    def run(frames):
+        raise ValueError("model failed")
+
+    batcher, first, release = _blocked_batcher(run)
+    try:
+        futures = [batcher.submit(_frame(1)) for _ in range(4)]
+        release.set()
+        first.result()
+        for future in futures:
+            with pytest.raises(ValueError, match="model failed"):
+                future.result()
+    finally:
+        batcher.stop()
+
+
+def test_wrong_number_of_results():
+    batcher, first, release = _blocked_batcher(lambda frames: [1])
+    try:
+        futures = [batcher.submit(_frame(1)) for _ in range(3)]
+        release.set()
+        first.result()
+        for future in futures:
+            with pytest.raises(ValueError, match="1 results for a batch of 3"):
+                future.result()
+    finally:
+        batcher.stop()
+
+
+def test_frames_of_different_shapes_run_separately():
+    shapes = []
+
+    def run(frames):
+        shapes.append(frames.shape)
+        return list(frames)
+
+    batcher, first, release = _blocked_batcher(run)
+    try:
+        small = [batcher.submit(_frame(1, (2, 2, 3))) for _ in range(2)]
+        large = [batcher.submit(_frame(1)) for _ in range(2)]
+        release.set()
+        first.result()
+        assert all(f.result().shape == (2, 2, 3) for f in small)
+        assert all(f.result().shape == (4, 4, 3) for f in large)
+        assert sorted(shapes) == [(2, 2, 2, 3), (2, 4, 4, 3)]
+    finally:
+        batcher.stop()
+
+
+def test_frames_can_be_reused_after_the_result():
+    batcher = VideoBatcher(lambda frames: list(frames))
+    try:
+        frame = _frame(3)
+        result = batcher(frame)
+        frame[:] = 0
+        assert result[0, 0, 0] == 3
+    finally:
+        batcher.stop()
+    assert not batcher.is_running
+
+
+def test_single_caller_does_not_wait():
+    batcher = VideoBatcher(lambda frames: list(frames), max_wait_ms=500)
+    try:
+        start = time.monotonic()
+        for i in range(3):
+            batcher(_frame(i))
+        assert time.monotonic() - start < 0.5
+    finally:
+        batcher.stop()
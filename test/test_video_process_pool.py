@@ -0,0 +1,106 @@
+import os
+import signal
+
+import numpy as np
+import pytest
+from fastrtc import AdditionalOutputs, VideoProcessPool
+
+
+class OddError(Exception):
+    # Pickles, but cannot be unpickled since __init__ takes two arguments
+    def __init__(self, a, b):
+        super().__init__(f"{a} {b}")
+
+
+def handler(frame: np.ndarray, mode: str = "flip"):
+    # Defined at the top level so that the spawned workers can import it
+    if mode == "flip":
+        return frame[::-1]
+    if mode == "outputs":
+        return frame, AdditionalOutputs(int(frame.sum()))
+    if mode == "large":
+        return np.ones((128, 128, 3), dtype=np.uint8)
+    if mode == "boom":
+        raise ValueError("boom")
+    if mode == "odd":
+        raise OddError(1, 2)
+    if mode == "unpicklable":
+        return frame, AdditionalOutputs(lambda: None)
+    if mode == "kill":
+        os.kill(os.getpid(), signal.SIGKILL)
+    raise AssertionError(mode)
+
+
+@pytest.fixture(scope="module")
+def pool():
+    # Workers take a few seconds to start, so they are shared by all tests
+    pool = VideoProcessPool(handler, processes=1, max_frame_bytes=64 * 64 * 3)
+    pool.start()
+    yield pool
+    pool.close()
+
+
+def _frame() -> np.ndarray:
+    return np.arange(16 * 16 * 3, dtype=np.uint8).reshape(16, 16, 3)
+
+
+def test_round_trip(pool):
+    frame = _frame()
+    result = pool(frame)
+    np.testing.assert_array_equal(result, frame[::-1])
+    # The result is copied out of the shared memory before the slot is reused
+    pool(np.zeros_like(frame))
+    np.testing.assert_array_equal(result, frame[::-1])
+
+
+def test_additional_outputs(pool):
+    frame = _frame()
+    result, outputs = pool(frame, "outputs")
+    np.testing.assert_array_equal(result, frame)
+    assert isinstance(outputs, AdditionalOutputs)
+    assert outputs.args == (int(frame.sum()),)
+
+
+def test_output_larger_than_the_slot(pool):
+    assert pool(_frame(), "large").shape == (128, 128, 3)
+
+
+def test_handler_errors_are_raised(pool):
+    with pytest.raises(ValueError, match="boom"):
+        pool(_frame(), "boom")
+
+
+def test_errors_that_cannot_be_unpickled(pool):
+    with pytest.raises(RuntimeError, match="OddError"):
+        pool(_frame(), "odd")
+    np.testing.assert_array_equal(pool(_frame()), _frame()[::-1])
+
+
+def test_outputs_that_cannot_be_pickled(pool):
+    with pytest.raises(Exception, match="pickle"):
+        pool(_frame(), "unpicklable")
+    np.testing.assert_array_equal(pool(_frame()), _frame()[::-1])
+
+
+def test_killed_worker_is_replaced(pool):
+    with pytest.raises(RuntimeError, match="exited with code"):
+        pool(_frame(), "kill")
+    np.testing.assert_array_equal(pool(_frame()), _frame()[::-1])
+
+
+def test_close_frees_the_shared_memory():
+    pool = VideoProcessPool(handler, processes=1, max_frame_bytes=1024)
+    pool.start()
+    name = pool._shm.name  # type: ignore
+    pool.close()
+    assert not pool.is_running
+    assert not os.path.exists(f"/dev/shm/{name}")
+    # Closing twice is fine
+    pool.close()
+
+
+def test_not_enough_shared_memory():
+    pool = VideoProcessPool(handler, processes=1, max_frame_bytes=2**50)
+    with pytest.raises(RuntimeError, match="/dev/shm"):
+        pool.start()
+    assert not pool.is_running